@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for vcard_validators.validate_uri.
+
+Compares the per-value cost of the current implementation with the original
+one, which ran urlparse on every value, for short URLs and for long unique
+URIs like inline data, which also evict each other from the urlparse cache.
+
+Usage: python benchmarks/bench_validate_uri.py [repetitions]
+"""
+import os
+import sys
+import timeit
+
+import six
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from vcard import vcard_validators  # noqa: E402
+from vcard.vcard_errors import NOTE_INVALID_URI, VCardValueError  # noqa: E402
+
+URI_COUNT = 1000
+
+
+def legacy_validate_uri(text):
+    parts = six.moves.urllib.parse.urlparse(text)
+    if parts[0] == '' or (parts[1] == '' and parts[2] == ''):
+        raise VCardValueError(NOTE_INVALID_URI, {'String': text})
+
+
+def get_uris():
+    return (
+        ('short', ['http://example.org/people/{0:d}/profile'.format(index) for index in range(URI_COUNT)]),
+        ('long', ['data:image/jpeg;base64,{0:d}{1}'.format(index, 'A' * 2048) for index in range(URI_COUNT)]),
+    )
+
+
+def validate_all(uris, validate):
+    for uri in uris:
+        validate(uri)
+
+
+def main(arguments):
+    repetitions = int(arguments[0]) if arguments else 20
+
+    for kind, uris in get_uris():
+        for name, validate in (('before', legacy_validate_uri), ('after', vcard_validators.validate_uri)):
+            seconds = min(timeit.repeat(lambda: validate_all(uris, validate), number=repetitions, repeat=3))
+            print('{0:5} {1:6} {2:8.2f} us/URI'.format(kind, name, seconds / repetitions / len(uris) * 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Memory benchmark for parsed properties.
+
+Reports the bytes per property which tracemalloc sees for a synthetic corpus
+of TEL and EMAIL properties, as returned by get_vcard_property, frozen with
+VcardProperty.freeze(), and as kept by VCard objects. The VCard figure also
+includes the fixed properties of each vCard. The property line cache is
+disabled, so only the returned objects are counted.
+
+Usage: python benchmarks/bench_vcard_property_memory.py [property count]
+"""
+import os
+import sys
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from vcard.vcard_validator import VCard, get_vcard_property, property_cache  # noqa: E402
+
+PROPERTIES_PER_VCARD = 100
+
+VCARD_TEMPLATE = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\n{0}END:VCARD\r\n\r\n'
+
+
+def get_property_line(index):
+    if index % 2:
+        return u'TEL;TYPE=CELL:+47 {0:08d}\r\n'.format(index)
+    return u'EMAIL;TYPE=PREF:user{0:d}@example.org\r\n'.format(index)
+
+
+def get_bytes_per_property(create, inputs, count):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [create(item) for item in inputs]
+        return float(tracemalloc.get_traced_memory()[0] - before) / count, objects
+    finally:
+        tracemalloc.stop()
+
+
+def main(arguments):
+    count = int(arguments[0]) if arguments else 1000000
+    lines = [get_property_line(index) for index in range(count)]
+    vcard_texts = [
+        VCARD_TEMPLATE.format(u''.join(lines[start:start + PROPERTIES_PER_VCARD]))
+        for start in range(0, count, PROPERTIES_PER_VCARD)]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        max_size = property_cache.max_size
+        property_cache.clear()
+        property_cache.max_size = 0
+        try:
+            for name, create, inputs in (
+                    ('get_vcard_property', get_vcard_property, lines),
+                    ('freeze', lambda line: get_vcard_property(line).freeze(), lines),
+                    ('VCard', lambda text: VCard(text).properties, vcard_texts)):
+                bytes_per_property, objects = get_bytes_per_property(create, inputs, count)
+                del objects
+                print('{0:18} {1:8.1f} bytes/property for {2:d} properties'.format(name, bytes_per_property, count))
+        finally:
+            property_cache.max_size = max_size
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for vcard_tokenizer.tokenize_property_line.
+
+Compares the single pass tokenizer with the split_unescaped cascade which
+get_vcard_property used before: split on ':', re-join, split on ';' for the
+parameters, then on '=' and ',' for each parameter, and on ';' and ',' for
+the values. Both run over the property lines of the test vCards.
+
+Usage: python benchmarks/bench_vcard_tokenizer.py [repetitions]
+"""
+import codecs
+import glob
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from vcard import vcard_utils  # noqa: E402
+from vcard.vcard_tokenizer import tokenize_property_line  # noqa: E402
+
+TEST_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, 'tests')
+
+
+def split_cascade(property_line):
+    property_parts = vcard_utils.split_unescaped(property_line, ':')
+    if len(property_parts) > 2:
+        property_parts[1] = ':'.join(property_parts[1:])
+        property_parts = property_parts[:2]
+    property_string, values_string = property_parts
+    property_name_and_params = vcard_utils.split_unescaped(property_string, ';')
+    name = property_name_and_params.pop(0)
+    params = None
+    if property_name_and_params:
+        params = []
+        for param_string in vcard_utils.split_unescaped(';'.join(property_name_and_params), ';'):
+            param_name, param_values = vcard_utils.split_unescaped(param_string, '=')
+            params.append((param_string, param_name, vcard_utils.split_unescaped(param_values, ',')))
+    values = [
+        vcard_utils.split_unescaped(value, ',')
+        for value in vcard_utils.split_unescaped(values_string[:-2], ';')]
+    return name, params, values
+
+
+def get_property_lines():
+    lines = []
+    for path in sorted(glob.glob(os.path.join(TEST_DIRECTORY, '*.vcf'))):
+        with codecs.open(path, 'r', 'utf-8') as file_pointer:
+            for line in file_pointer.read().splitlines(True):
+                if line.endswith('\r\n') and ':' in line and not line.startswith(' '):
+                    try:
+                        split_cascade(line)
+                    except ValueError:
+                        continue
+                    lines.append(line)
+    return lines
+
+
+def main(arguments):
+    repetitions = int(arguments[0]) if arguments else 200
+    lines = get_property_lines()
+
+    for name, tokenize in (('cascade', split_cascade), ('tokenizer', tokenize_property_line)):
+        seconds = min(timeit.repeat(lambda: [tokenize(line) for line in lines], number=repetitions, repeat=3))
+        print('{0:10} {1:10.0f} lines/s'.format(name, repetitions * len(lines) / seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for vcard_utils.split_unescaped on the test vCards.
+
+Compares the per-line cost of splitting each property line on ':', ';' and
+',' with the current implementation and with the original one, which
+compiled its regular expression on every call and re-sliced the text for
+every separator.
+
+Usage: python benchmarks/bench_vcard_utils.py [repetitions]
+"""
+import codecs
+import glob
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from vcard import vcard_utils  # noqa: E402
+
+TEST_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, 'tests')
+
+
+def legacy_find_unescaped(text, char, escape_char='\\'):
+    unescaped_regex = '(?<!{0}{0})(?:{0}{0}{0}{0})*({1})'.format(escape_char, re.escape(char))
+    regex = re.compile(unescaped_regex)
+
+    char_match = regex.search(text)
+
+    if char_match is None:
+        return None
+    return char_match.start(1)
+
+
+def legacy_split_unescaped(text, separator, escape_char='\\'):
+    result = []
+    while True:
+        index = legacy_find_unescaped(text, separator, escape_char)
+        if index is not None:
+            result.append(text[:index])
+            text = text[index + 1:]
+        else:
+            result.append(text)
+            return result
+
+
+def get_property_lines():
+    lines = []
+    for path in sorted(glob.glob(os.path.join(TEST_DIRECTORY, '*.vcf'))):
+        with codecs.open(path, 'r', 'utf-8') as file_pointer:
+            lines.extend(line for line in file_pointer.read().splitlines() if line and not line.startswith(' '))
+    return lines
+
+
+def split_lines(lines, split):
+    for line in lines:
+        for part in split(line, ':'):
+            for value in split(part, ';'):
+                split(value, ',')
+
+
+def main(arguments):
+    repetitions = int(arguments[0]) if arguments else 200
+    lines = get_property_lines()
+
+    for name, split in (('before', legacy_split_unescaped), ('after', vcard_utils.split_unescaped)):
+        seconds = min(timeit.repeat(lambda: split_lines(lines, split), number=repetitions, repeat=3))
+        print('{0:6} {1:8.2f} us/line'.format(name, seconds / repetitions / len(lines) * 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Benchmark for parsing and validating tests/maximal.vcf with VCard, with the
+property line cache disabled and with every line in it.
+
+Usage: python benchmarks/bench_vcard_validator.py [repetitions]
+"""
+import codecs
+import os
+import sys
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from vcard.vcard_validator import VCard, property_cache  # noqa: E402
+
+MAXIMAL_VCARD_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'tests', 'maximal.vcf')
+
+
+def main(arguments):
+    repetitions = int(arguments[0]) if arguments else 1000
+    with codecs.open(MAXIMAL_VCARD_PATH, 'r', 'utf-8') as file_pointer:
+        text = file_pointer.read()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        max_size = property_cache.max_size
+        property_cache.clear()
+        property_cache.max_size = 0
+        try:
+            uncached_seconds = min(timeit.repeat(lambda: VCard(text), number=repetitions, repeat=3))
+        finally:
+            property_cache.max_size = max_size
+        cached_seconds = min(timeit.repeat(lambda: VCard(text), number=repetitions, repeat=3))
+    print('{0:10.0f} cards/s uncached'.format(repetitions / uncached_seconds))
+    print('{0:10.0f} cards/s cached'.format(repetitions / cached_seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
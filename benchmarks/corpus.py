@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Deterministic generator of realistic vCard 3.0 corpora for benchmarks.
+
+Usage: python benchmarks/corpus.py [options] > corpus.vcf
+"""
+import argparse
+import base64
+import random
+import sys
+
+CRLF = '\r\n'
+MAX_LINE_LENGTH = 75
+
+GIVEN_NAMES = (u'Anna', u'Bjørn', u'Carlos', u'Dana', u'Émile', u'Fatima', u'Grace', u'Hiro', u'Ines', u'Jonas')
+FAMILY_NAMES = (u'Andersen', u'Berg', u'Chen', u'Dubois', u'Engmark', u'García', u'Haugen', u'Ivanova', u'Jensen')
+ORGANIZATIONS = (u'Example Corp', u'ACME', u'Initech', u'Globex', u'Umbrella')
+CATEGORIES = (u'Friends', u'Family', u'Work', u'Customers', u'Suppliers')
+TELEPHONE_TYPES = ('CELL', 'HOME', 'WORK', 'FAX', 'WORK,VOICE', 'PREF,CELL')
+EMAIL_TYPES = ('INTERNET', 'INTERNET,WORK', 'INTERNET,HOME', 'INTERNET,PREF')
+
+DEFAULT_PROPERTY_MIX = {
+    'TEL': 2.0,
+    'EMAIL': 1.5,
+    'ADR': 0.5,
+    'ORG': 0.7,
+    'TITLE': 0.4,
+    'NOTE': 0.3,
+    'URL': 0.3,
+    'BDAY': 0.3,
+    'CATEGORIES': 0.5,
+    'PHOTO': 0.1,
+}
+"""Average number of each optional property per card"""
+
+
+def generate_corpus(
+        card_count, seed=0, property_mix=None, fold=True, group_ratio=0.0, photo_size=2048):
+    """
+    Generate a corpus of valid vCards.
+
+    @param card_count: Number of vCards
+    @param seed: Random seed; the same parameters always give the same text
+    @param property_mix: Average number of each optional property per card
+    @param fold: Fold lines longer than 75 characters
+    @param group_ratio: Fraction of vCards with a group prefix on every line
+    @param photo_size: Size in bytes of each PHOTO payload before base64
+    @return: Text of all the vCards, each followed by an empty line
+    """
+    return ''.join(iter_corpus(card_count, seed, property_mix, fold, group_ratio, photo_size))
+
+
+def iter_corpus(card_count, seed=0, property_mix=None, fold=True, group_ratio=0.0, photo_size=2048):
+    """
+    Like generate_corpus, but yield one vCard at a time.
+    """
+    generator = random.Random(seed)
+    if property_mix is None:
+        property_mix = DEFAULT_PROPERTY_MIX
+
+    for index in range(card_count):
+        lines = _get_card_lines(generator, index, property_mix, photo_size)
+        if generator.random() < group_ratio:
+            lines = ['item{0:d}.{1}'.format(index, line) for line in lines]
+        if fold:
+            lines = [folded for line in lines for folded in _fold(line)]
+        yield CRLF.join(lines) + CRLF + CRLF
+
+
+def _get_card_lines(generator, index, property_mix, photo_size):
+    given_name = generator.choice(GIVEN_NAMES)
+    family_name = generator.choice(FAMILY_NAMES)
+    lines = [
+        'BEGIN:VCARD',
+        'VERSION:3.0',
+        u'N:{0};{1};;;'.format(family_name, given_name),
+        u'FN:{0} {1}'.format(given_name, family_name),
+    ]
+
+    for property_name in sorted(property_mix):
+        for _ in range(_get_count(generator, property_mix[property_name])):
+            lines.append(_get_property_line(generator, property_name, index, given_name, photo_size))
+
+    lines.append('END:VCARD')
+    return lines
+
+
+def _get_count(generator, average):
+    count = int(average)
+    if generator.random() < average - count:
+        count += 1
+    return count
+
+
+def _get_property_line(generator, property_name, index, given_name, photo_size):
+    if property_name == 'TEL':
+        return 'TEL;TYPE={0}:+47 {1:08d}'.format(generator.choice(TELEPHONE_TYPES), generator.randrange(10 ** 8))
+    if property_name == 'EMAIL':
+        return u'EMAIL;TYPE={0}:{1}{2:d}@example.org'.format(
+            generator.choice(EMAIL_TYPES), given_name.lower(), index)
+    if property_name == 'ADR':
+        return u'ADR;TYPE=home:;;{0:d} Some Street;Tinytown;;{1:05d};Fantasia'.format(
+            generator.randrange(1, 200), generator.randrange(100000))
+    if property_name == 'ORG':
+        return u'ORG:{0};Department {1:d}'.format(generator.choice(ORGANIZATIONS), generator.randrange(10))
+    if property_name == 'TITLE':
+        return 'TITLE:Assistant assessor'
+    if property_name == 'NOTE':
+        return u'NOTE:Met at the conference in {0:d}\\, talked about vCards for {1:d} minutes and agreed to ' \
+            u'follow up by email.'.format(generator.randrange(1990, 2020), generator.randrange(5, 120))
+    if property_name == 'URL':
+        return 'URL:http://example.org/people/{0:d}/profile'.format(index)
+    if property_name == 'BDAY':
+        return 'BDAY:{0:04d}-{1:02d}-{2:02d}'.format(
+            generator.randrange(1940, 2010), generator.randrange(1, 13), generator.randrange(1, 29))
+    if property_name == 'CATEGORIES':
+        return u'CATEGORIES:{0}'.format(','.join(generator.sample(CATEGORIES, 2)))
+    if property_name == 'PHOTO':
+        payload = bytes(bytearray(generator.randrange(256) for _ in range(photo_size)))
+        return 'PHOTO;ENCODING=b;TYPE=JPEG:' + base64.b64encode(payload).decode('ascii')
+    raise ValueError('Unknown property {0}'.format(property_name))
+
+
+def _fold(line):
+    if len(line) <= MAX_LINE_LENGTH:
+        return [line]
+    folded = [line[:MAX_LINE_LENGTH]]
+    for start in range(MAX_LINE_LENGTH, len(line), MAX_LINE_LENGTH - 1):
+        folded.append(' ' + line[start:start + MAX_LINE_LENGTH - 1])
+    return folded
+
+
+def parse_arguments(arguments):
+    argument_parser = argparse.ArgumentParser(description='Generate a vCard corpus')
+    add_corpus_arguments(argument_parser)
+    return argument_parser.parse_args(args=arguments)
+
+
+def add_corpus_arguments(argument_parser):
+    argument_parser.add_argument('--cards', type=int, default=1000, help='Number of vCards')
+    argument_parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    argument_parser.add_argument(
+        '--no-fold', dest='fold', default=True, action='store_false', help='Do not fold long lines')
+    argument_parser.add_argument(
+        '--group-ratio', type=float, default=0.0, help='Fraction of vCards with a group prefix')
+    argument_parser.add_argument(
+        '--photo-size', type=int, default=2048, help='Bytes in each PHOTO payload before base64 encoding')
+    argument_parser.add_argument(
+        '--photo-ratio', type=float, default=DEFAULT_PROPERTY_MIX['PHOTO'], help='Average PHOTOs per vCard')
+
+
+def get_property_mix(arguments):
+    property_mix = dict(DEFAULT_PROPERTY_MIX)
+    property_mix['PHOTO'] = arguments.photo_ratio
+    return property_mix
+
+
+def main(arguments):
+    arguments = parse_arguments(arguments)
+    for card in iter_corpus(
+            arguments.cards, arguments.seed, get_property_mix(arguments), arguments.fold, arguments.group_ratio,
+            arguments.photo_size):
+        sys.stdout.write(card)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+"""
+Throughput and peak memory benchmarks for the parser and validators.
+
+Runs each benchmark over a corpus from corpus.py and writes the results as
+JSON, which can be compared with an earlier run. Also measures the time to
+import the command line module in a fresh interpreter, and exits with
+status 1 if it is over budget.
+
+Usage:
+    python benchmarks/run.py [corpus options] [--output results.json]
+    python benchmarks/run.py [corpus options] --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+PACKAGE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, PACKAGE_DIRECTORY)
+
+import vcard  # noqa: E402
+from vcard import vcard_utils, vcard_validator, vcard_validators  # noqa: E402
+
+from corpus import add_corpus_arguments, generate_corpus, get_property_mix  # noqa: E402
+
+RESULTS_FORMAT_VERSION = 1
+
+IMPORT_MODULE = 'vcard.vcard'
+"""Module imported by the vcard command"""
+
+IMPORT_TIME_BUDGET_MS = 40
+"""Maximum cumulative time to import IMPORT_MODULE, as reported by python -X importtime"""
+
+
+def benchmark_vcard(corpus):
+    run, count, unit = benchmark_vcard_cached(corpus)
+    return _without_property_cache(run), count, unit
+
+
+def benchmark_vcard_cached(corpus):
+    """Parses the same cards every run, so after the first run every property line is in the cache"""
+    cards = corpus['cards']
+
+    def run():
+        for card in cards:
+            vcard_validator.VCard(card)
+    return run, len(cards), 'cards'
+
+
+def benchmark_validate_file(corpus):
+    """Starts each run with an empty property cache, like the vcard command"""
+    def run():
+        vcard_validator.property_cache.clear()
+        result = vcard_validator.validate_file(corpus['path'], False)
+        assert result is None, result
+    return run, len(corpus['cards']), 'cards'
+
+
+def benchmark_split_unescaped(corpus):
+    lines = corpus['property_lines']
+    split_unescaped = vcard_utils.split_unescaped
+
+    def run():
+        for line in lines:
+            for part in split_unescaped(line, ':'):
+                for value in split_unescaped(part, ';'):
+                    split_unescaped(value, ',')
+    return run, len(lines), 'lines'
+
+
+def benchmark_validate_vcard_property(corpus):
+    properties = corpus['properties']
+    validate_vcard_property = vcard_validators.validate_vcard_property
+
+    def run():
+        for property_ in properties:
+            validate_vcard_property(property_)
+    return run, len(properties), 'properties'
+
+
+def _without_property_cache(run):
+    """
+    @return: Function calling run with the property line cache disabled, to
+    time parsing rather than cache lookups
+    """
+    def run_uncached():
+        max_size = vcard_validator.property_cache.max_size
+        vcard_validator.property_cache.clear()
+        vcard_validator.property_cache.max_size = 0
+        try:
+            run()
+        finally:
+            vcard_validator.property_cache.max_size = max_size
+    return run_uncached
+
+
+BENCHMARKS = (
+    ('VCard', benchmark_vcard),
+    ('VCard_cached', benchmark_vcard_cached),
+    ('validate_file', benchmark_validate_file),
+    ('split_unescaped', benchmark_split_unescaped),
+    ('validate_vcard_property', benchmark_validate_vcard_property),
+)
+
+
+def prepare_corpus(arguments, directory):
+    text = generate_corpus(
+        arguments.cards, arguments.seed, get_property_mix(arguments), arguments.fold, arguments.group_ratio,
+        arguments.photo_size)
+    path = os.path.join(directory, 'corpus.vcf')
+    with open(path, 'wb') as file_pointer:
+        file_pointer.write(text.encode('utf-8'))
+
+    cards = [card + '\r\n\r\n' for card in text.split('\r\n\r\n') if card]
+    property_lines = [
+        line
+        for card in cards
+        for line in vcard_validator.remove_vcard_groups(
+            vcard_validator.unfold_vcard_lines(card.splitlines(True)),
+            vcard_validator.get_vcard_group(vcard_validator.unfold_vcard_lines(card.splitlines(True))))
+        if line != '\r\n']
+    properties = [vcard_validator.get_vcard_property(line) for line in property_lines]
+    return {'path': path, 'cards': cards, 'property_lines': property_lines, 'properties': properties}
+
+
+def measure(benchmark, corpus, repeat):
+    run, count, unit = benchmark(corpus)
+
+    seconds = None
+    for _ in range(repeat):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    peak_memory = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'unit': unit,
+        'count': count,
+        'seconds': seconds,
+        'per_second': count / seconds if seconds else None,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def measure_import_time(repeat, directory):
+    """
+    @return: Best cumulative import time of IMPORT_MODULE in microseconds, or
+    None if this Python has no -X importtime option
+    """
+    environment = dict(os.environ, PYTHONPYCACHEPREFIX=os.path.join(directory, 'pycache'))
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    command = [sys.executable, '-X', 'importtime', '-c', 'import {0}'.format(IMPORT_MODULE)]
+    line = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| {0}$'.format(re.escape(IMPORT_MODULE)), re.MULTILINE)
+
+    best = None
+    # The first run writes bytecode, like an installed package has
+    for _ in range(repeat + 1):
+        process = subprocess.Popen(
+            command, cwd=PACKAGE_DIRECTORY, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        _, errors = process.communicate()
+        match = line.search(errors)
+        if match is None:
+            return None
+        microseconds = int(match.group(1))
+        if best is None or microseconds < best:
+            best = microseconds
+    return best
+
+
+def compare(results, baseline):
+    lines = []
+    for name, result in sorted(results['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or not base['per_second']:
+            lines.append('{0:25} {1:14.0f} {2}/s (no baseline)'.format(name, result['per_second'], result['unit']))
+            continue
+        lines.append('{0:25} {1:14.0f} {2}/s {3:7.2f}x baseline'.format(
+            name, result['per_second'], result['unit'], result['per_second'] / base['per_second']))
+
+    import_time = results.get('import_time', {}).get('microseconds')
+    base_import_time = baseline.get('import_time', {}).get('microseconds')
+    if import_time is not None:
+        if base_import_time:
+            lines.append('{0:25} {1:14.1f} ms {2:9.2f}x baseline'.format(
+                'import', import_time / 1000.0, float(import_time) / base_import_time))
+        else:
+            lines.append('{0:25} {1:14.1f} ms (no baseline)'.format('import', import_time / 1000.0))
+    return '\n'.join(lines)
+
+
+def parse_arguments(arguments):
+    argument_parser = argparse.ArgumentParser(description='Run the vCard benchmarks')
+    add_corpus_arguments(argument_parser)
+    argument_parser.add_argument('--repeat', type=int, default=3, help='Timing runs per benchmark; the best is kept')
+    argument_parser.add_argument(
+        '--benchmark', action='append', choices=[name for name, _ in BENCHMARKS], help='Benchmark to run (default all)')
+    argument_parser.add_argument('--output', help='Write JSON results to this file instead of standard output')
+    argument_parser.add_argument('--compare', metavar='BASELINE', help='Compare with earlier JSON results')
+    argument_parser.add_argument(
+        '--import-budget', type=float, default=IMPORT_TIME_BUDGET_MS, metavar='MS',
+        help='Maximum time to import {0} (default %(default)s)'.format(IMPORT_MODULE))
+    return argument_parser.parse_args(args=arguments)
+
+
+def main(arguments):
+    arguments = parse_arguments(arguments)
+
+    directory = tempfile.mkdtemp()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            corpus = prepare_corpus(arguments, directory)
+            results = {}
+            for name, benchmark in BENCHMARKS:
+                if arguments.benchmark is None or name in arguments.benchmark:
+                    results[name] = measure(benchmark, corpus, arguments.repeat)
+        import_time = measure_import_time(arguments.repeat, directory)
+    finally:
+        shutil.rmtree(directory)
+
+    output = {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'vcard_version': vcard.__version__,
+        'python': platform.python_version(),
+        'corpus': {
+            'cards': arguments.cards,
+            'seed': arguments.seed,
+            'fold': arguments.fold,
+            'group_ratio': arguments.group_ratio,
+            'photo_size': arguments.photo_size,
+            'photo_ratio': arguments.photo_ratio,
+        },
+        'results': results,
+        'import_time': {
+            'module': IMPORT_MODULE,
+            'microseconds': import_time,
+            'budget_microseconds': int(arguments.import_budget * 1000),
+        },
+    }
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as file_pointer:
+            json.dump(output, file_pointer, indent=2, sort_keys=True)
+    if arguments.compare is not None:
+        with open(arguments.compare) as file_pointer:
+            print(compare(output, json.load(file_pointer)))
+    elif arguments.output is None:
+        print(json.dumps(output, indent=2, sort_keys=True))
+
+    if import_time is not None and import_time > arguments.import_budget * 1000:
+        sys.stderr.write('Importing {0} took {1:.1f} ms, over the {2:.1f} ms budget\n'.format(
+            IMPORT_MODULE, import_time / 1000.0, arguments.import_budget))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
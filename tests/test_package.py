@@ -13,6 +13,9 @@ from vcard import (
     vcard,
     vcard_definitions,
     vcard_errors,
+    vcard_payload,
+    vcard_report,
+    vcard_tokenizer,
     vcard_utils,
     vcard_validator,
     vcard_validators
@@ -169,6 +172,7 @@ VCARDS_REFERENCE_ERRORS = (
 
 # Valid vCards
 VCARDS_VALID = (
+    'grouped.vcf',
     'minimal.vcf',
     'maximal.vcf',
     'scrambled_case.vcf'
@@ -239,5 +243,9 @@ class TestVCards(unittest.TestCase):
         self.assertEqual(doctest.testmod(vcard)[0], 0)
         self.assertEqual(doctest.testmod(vcard_definitions)[0], 0)
         self.assertEqual(doctest.testmod(vcard_errors)[0], 0)
+        self.assertEqual(doctest.testmod(vcard_payload)[0], 0)
+        self.assertEqual(doctest.testmod(vcard_report)[0], 0)
+        self.assertEqual(doctest.testmod(vcard_tokenizer)[0], 0)
         self.assertEqual(doctest.testmod(vcard_utils)[0], 0)
+        self.assertEqual(doctest.testmod(vcard_validator)[0], 0)
         self.assertEqual(doctest.testmod(vcard_validators)[0], 0)
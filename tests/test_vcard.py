@@ -1,11 +1,20 @@
 import argparse
+import io
+import json
+import os
 from unittest import TestCase
 import mock
+import six
 
 from vcard import vcard
+from vcard.vcard_payload import DEFAULT_MAX_SIZE, payload_limits
 
-ARGUMENTS_WITH_PATH = argparse.Namespace(paths=['any'], verbose=False)
-ARGUMENTS_WITH_PATHS = argparse.Namespace(paths=['any', 'another'], verbose=False)
+PAYLOAD_ARGUMENTS = {'max_payload_size': DEFAULT_MAX_SIZE, 'structure_only': False}
+ARGUMENTS_WITH_PATH = argparse.Namespace(
+    paths=['any'], verbose=False, all_errors=False, jobs=1, cache=None, format='text', **PAYLOAD_ARGUMENTS)
+ARGUMENTS_WITH_PATHS = argparse.Namespace(
+    paths=['any', 'another'], verbose=False, all_errors=False, jobs=1, cache=None, format='text', **PAYLOAD_ARGUMENTS)
+WARNING_PATH = os.path.join(os.path.dirname(__file__), 'rfc_2426_a.vcf')
 
 
 class TestVcard(TestCase):
@@ -32,6 +41,49 @@ class TestVcard(TestCase):
             mock.Mock(spec=vcard.VcardValidator, result=None)]
         self.assertEqual(1, vcard.main())
 
+    @mock.patch('vcard.vcard.parse_arguments')
+    def test_main_writes_warning_summary(self, parse_arguments_mock):
+        for jobs in (1, 2):
+            parse_arguments_mock.return_value = argparse.Namespace(
+                paths=[WARNING_PATH], verbose=False, all_errors=False, jobs=jobs, cache=None, format='text',
+                **PAYLOAD_ARGUMENTS)
+            string_type = io.StringIO if six.PY3 else io.BytesIO
+            with mock.patch('sys.stdout', new_callable=string_type):
+                with mock.patch('sys.stderr', new_callable=string_type) as stderr:
+                    vcard.main()
+
+            self.assertEqual(
+                'Warnings:\nSHORT_FOLDED_LINE: 1\n    {0} line 12: Short folded line\n'.format(WARNING_PATH),
+                stderr.getvalue())
+
+    @mock.patch('vcard.vcard.parse_arguments')
+    def test_main_writes_json_lines(self, parse_arguments_mock):
+        for jobs in (1, 2):
+            parse_arguments_mock.return_value = argparse.Namespace(
+                paths=[WARNING_PATH], verbose=False, all_errors=False, jobs=jobs, cache=None, format='jsonl',
+                **PAYLOAD_ARGUMENTS)
+            with mock.patch('sys.stdout', new_callable=io.StringIO if six.PY3 else io.BytesIO) as stdout:
+                return_code = vcard.main()
+
+            self.assertEqual(1, return_code)
+            records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+            self.assertEqual(['SHORT_FOLDED_LINE', 'INVALID_PARAMETER_VALUE'], [record['code'] for record in records])
+            self.assertEqual([WARNING_PATH] * 2, [record['file'] for record in records])
+            self.assertEqual([12, 12], [record['line'] for record in records])
+
+    @mock.patch('vcard.vcard.parse_arguments')
+    @mock.patch('vcard.vcard.VcardValidator', spec=vcard.VcardValidator)
+    @mock.patch.multiple(payload_limits, max_size=DEFAULT_MAX_SIZE, structure_only=False)
+    def test_main_sets_payload_limits(self, vcard_validator_mock, parse_arguments_mock):
+        parse_arguments_mock.return_value = argparse.Namespace(
+            paths=['any'], verbose=False, all_errors=False, jobs=1, cache=None, format='text', max_payload_size=1024,
+            structure_only=True)
+        vcard_validator_mock.return_value.result = None
+
+        vcard.main()
+
+        self.assertEqual((1024, True), (payload_limits.max_size, payload_limits.structure_only))
+
     @mock.patch('vcard.vcard.parse_arguments')
     def test_main_fails_when_argument_parsing_fails(self, parse_arguments_mock):
         parse_arguments_mock.side_effect = vcard.UsageError('error')
@@ -74,3 +126,83 @@ class TestVcard(TestCase):
         actual_verbosity = vcard.parse_arguments(['--verbose', path]).verbose
 
         self.assertTrue(actual_verbosity)
+
+    def test_parse_arguments_sets_verbose_when_short_option_passed(self):
+        self.assertTrue(vcard.parse_arguments(['-v', '/some/path']).verbose)
+
+    def test_parse_arguments_all_errors_off_by_default(self):
+        path = '/some/path'
+
+        actual_all_errors = vcard.parse_arguments([path]).all_errors
+
+        self.assertFalse(actual_all_errors)
+
+    def test_parse_arguments_sets_all_errors_when_passed(self):
+        path = '/some/path'
+
+        actual_all_errors = vcard.parse_arguments(['--all-errors', path]).all_errors
+
+        self.assertTrue(actual_all_errors)
+
+    def test_parse_arguments_jobs_one_by_default(self):
+        path = '/some/path'
+
+        actual_jobs = vcard.parse_arguments([path]).jobs
+
+        self.assertEqual(1, actual_jobs)
+
+    def test_parse_arguments_sets_jobs_when_passed(self):
+        path = '/some/path'
+
+        actual_jobs = vcard.parse_arguments(['--jobs', '4', path]).jobs
+
+        self.assertEqual(4, actual_jobs)
+
+    def test_parse_arguments_fails_with_invalid_jobs(self):
+        self.assertRaises(SystemExit, vcard.parse_arguments, ['--jobs', '0', '/some/path'])
+
+    def test_parse_arguments_no_cache_by_default(self):
+        path = '/some/path'
+
+        actual_cache = vcard.parse_arguments([path]).cache
+
+        self.assertIsNone(actual_cache)
+
+    def test_parse_arguments_sets_cache_when_passed(self):
+        path = '/some/path'
+
+        actual_cache = vcard.parse_arguments(['--cache', '/some/cache', path]).cache
+
+        self.assertEqual('/some/cache', actual_cache)
+
+    def test_parse_arguments_text_format_by_default(self):
+        self.assertEqual('text', vcard.parse_arguments(['/some/path']).format)
+
+    def test_parse_arguments_sets_format_when_passed(self):
+        self.assertEqual('jsonl', vcard.parse_arguments(['--format', 'jsonl', '/some/path']).format)
+
+    def test_parse_arguments_fails_with_verbose_json_lines(self):
+        self.assertRaises(vcard.UsageError, vcard.parse_arguments, ['--verbose', '--format', 'jsonl', '/some/path'])
+
+    def test_parse_arguments_payload_limits_by_default(self):
+        arguments = vcard.parse_arguments(['/some/path'])
+
+        self.assertEqual((DEFAULT_MAX_SIZE, False), (arguments.max_payload_size, arguments.structure_only))
+
+    def test_parse_arguments_sets_payload_limits_when_passed(self):
+        arguments = vcard.parse_arguments(['--max-payload-size', '1024', '--structure-only', '/some/path'])
+
+        self.assertEqual((1024, True), (arguments.max_payload_size, arguments.structure_only))
+
+    def test_parse_serve_arguments_defaults(self):
+        arguments = vcard.parse_serve_arguments([])
+
+        self.assertEqual(
+            ('127.0.0.1', 8426, None, None, None),
+            (arguments.host, arguments.port, arguments.socket, arguments.jobs, arguments.path_root))
+
+    def test_parse_serve_arguments_sets_socket_when_passed(self):
+        self.assertEqual('/tmp/vcard.sock', vcard.parse_serve_arguments(['--socket', '/tmp/vcard.sock']).socket)
+
+    def test_parse_serve_arguments_sets_path_root_when_passed(self):
+        self.assertEqual('/srv/vcards', vcard.parse_serve_arguments(['--path-root', '/srv/vcards']).path_root)
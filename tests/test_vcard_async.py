@@ -0,0 +1,75 @@
+import os
+from unittest import TestCase, skipIf
+
+import mock
+
+from vcard import vcard_validator
+
+# Without async syntax, so this module can be loaded by Python 2 and the tests skipped
+try:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from vcard import vcard_async
+except (ImportError, SyntaxError):
+    vcard_async = None
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+ALL_ERRORS_PATH = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+
+def _validate(path, chunk_size=7, on_start=None, **keywords):
+    """
+    @param on_start: Function to call with the event loop before validating
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        reader = asyncio.StreamReader()
+        with open(path, 'rb') as file_pointer:
+            reader.feed_data(file_pointer.read())
+        reader.feed_eof()
+        if on_start is not None:
+            on_start(loop)
+        return loop.run_until_complete(vcard_async.validate_stream(reader, path, chunk_size=chunk_size, **keywords))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _describe(diagnostics):
+    return [(diagnostic.code, diagnostic.context) for diagnostic in diagnostics]
+
+
+@skipIf(vcard_async is None, 'asyncio API requires Python 3.5 or newer')
+class TestValidateStream(TestCase):
+    def test_same_diagnostics_as_file_validation(self):
+        for name in ('all_errors.vcf', 'maximal.vcf', 'missing_end.vcf', 'rfc_2426_a.vcf'):
+            path = os.path.join(TEST_DIRECTORY, name)
+            expected = _describe(vcard_validator.get_file_diagnostics(path))
+
+            self.assertEqual(expected, _describe(_validate(path, all_errors=True)))
+            with ThreadPoolExecutor(2) as executor:
+                self.assertEqual(expected, _describe(_validate(path, all_errors=True, executor=executor)))
+
+    def test_stops_at_first_error_by_default(self):
+        diagnostics = _validate(ALL_ERRORS_PATH)
+
+        self.assertEqual([4], [diagnostic.file_line for diagnostic in diagnostics])
+
+    def test_other_tasks_run_between_vcards(self):
+        steps = []
+
+        def count(loop):
+            steps.append('other')
+            loop.call_soon(count, loop)
+
+        def get_vcard_diagnostics(text, first_only):
+            steps.append('vcard')
+            return vcard_validator.get_vcard_diagnostics(text, first_only)
+
+        with mock.patch('vcard.vcard_async.get_vcard_diagnostics', get_vcard_diagnostics):
+            _validate(ALL_ERRORS_PATH, 1024 * 1024, lambda loop: loop.call_soon(count, loop), all_errors=True)
+
+        first = steps.index('vcard')
+        last = len(steps) - 1 - steps[::-1].index('vcard')
+        self.assertIn('other', steps[first:last])
@@ -0,0 +1,126 @@
+import io
+import os
+import shutil
+import tempfile
+import warnings
+
+import mock
+from unittest import TestCase
+from vcard import vcard_cache, vcard_parallel, vcard_report, vcard_validator
+from vcard.vcard_payload import payload_limits
+from vcard.vcard_errors import ERROR, NOTE_MISSING_PROPERTY, Diagnostic, DiagnosticCollector, VCardItemCountError
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+MINIMAL_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\nEND:VCARD\r\n\r\n'
+INVALID_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nEND:VCARD\r\n\r\n'
+
+
+class TestValidationCache(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        warnings.resetwarnings()
+
+    def test_missing_vcard_raises_key_error(self):
+        with vcard_cache.ValidationCache(self.path) as cache:
+            self.assertRaises(KeyError, cache.get, MINIMAL_VCARD)
+            self.assertEqual(1, cache.misses)
+
+    def test_results_persist_across_instances(self):
+        with vcard_cache.ValidationCache(self.path) as cache:
+            cache.set(MINIMAL_VCARD)
+            diagnostic = Diagnostic(
+                NOTE_MISSING_PROPERTY + ': FN', {'File': 'a.vcf', 'File line': 4, 'Property': 'FN'},
+                error_type=VCardItemCountError)
+            cache.set(INVALID_VCARD, [diagnostic])
+
+        with vcard_cache.ValidationCache(self.path) as cache:
+            self.assertEqual([], cache.get(MINIMAL_VCARD))
+            diagnostics = cache.get(INVALID_VCARD)
+            self.assertEqual(2, cache.hits)
+
+        self.assertEqual(1, len(diagnostics))
+        self.assertIs(VCardItemCountError, diagnostics[0].error_type)
+        self.assertEqual('MISSING_PROPERTY', diagnostics[0].code)
+        self.assertEqual(ERROR, diagnostics[0].severity)
+        self.assertEqual(diagnostic.message, diagnostics[0].message)
+        self.assertEqual({'Property': 'FN'}, diagnostics[0].context)
+
+    def test_other_version_discards_results(self):
+        with vcard_cache.ValidationCache(self.path) as cache:
+            cache.set(MINIMAL_VCARD)
+
+        with mock.patch('vcard.vcard_cache.CACHE_VERSION', 'other'):
+            with vcard_cache.ValidationCache(self.path) as cache:
+                self.assertRaises(KeyError, cache.get, MINIMAL_VCARD)
+
+    def test_results_kept_per_payload_limits(self):
+        with vcard_cache.ValidationCache(self.path) as cache:
+            cache.set(MINIMAL_VCARD)
+            with mock.patch.multiple(payload_limits, structure_only=True):
+                self.assertRaises(KeyError, cache.get, MINIMAL_VCARD)
+            self.assertEqual([], cache.get(MINIMAL_VCARD))
+
+    def test_least_recently_used_results_evicted(self):
+        texts = [MINIMAL_VCARD.replace(u'John', name) for name in (u'A', u'B', u'C', u'D')]
+        with vcard_cache.ValidationCache(self.path) as cache:
+            cache.set(texts[0])
+            cache.set(texts[1])
+        with vcard_cache.ValidationCache(self.path) as cache:
+            cache.set(texts[2])
+        with vcard_cache.ValidationCache(self.path, max_entries=2) as cache:
+            cache.get(texts[0])
+            cache.set(texts[3])
+
+        with vcard_cache.ValidationCache(self.path) as cache:
+            self.assertEqual([], cache.get(texts[0]))
+            self.assertEqual([], cache.get(texts[3]))
+            self.assertRaises(KeyError, cache.get, texts[1])
+            self.assertRaises(KeyError, cache.get, texts[2])
+
+    def test_validate_file_results_same_with_cache(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+        expected = vcard_validator.validate_file(path, False, True)
+
+        for _ in range(2):
+            with vcard_cache.ValidationCache(self.path) as cache:
+                self.assertEqual(expected, vcard_validator.validate_file(path, False, True, cache))
+
+        self.assertEqual(0, cache.misses)
+        self.assertEqual(4, cache.hits)
+
+    def test_first_error_results_same_with_cache(self):
+        path = os.path.join(self.directory, 'warning_after_error.vcf')
+        with io.open(path, 'w', newline='') as file_pointer:
+            file_pointer.write(MINIMAL_VCARD.replace(u'END:', u'BDAY:x\r\nTEL;TYPE=voice:+1\r\nEND:') + INVALID_VCARD)
+
+        def get_output(cache):
+            records = []
+            collector = DiagnosticCollector()
+            vcard_report.report_file(
+                path, lambda diagnostic: records.append(vcard_report.format_record(diagnostic)), cache=cache)
+            vcard_validator.validate_file(path, False, True, cache, collector)
+            return ''.join(records), collector.get_summary()
+
+        expected = get_output(None)
+        for _ in range(2):
+            with vcard_cache.ValidationCache(self.path) as cache:
+                self.assertEqual(expected, get_output(cache))
+        self.assertEqual(0, cache.misses)
+
+    def test_parallel_results_same_with_cache(self):
+        paths = [os.path.join(TEST_DIRECTORY, name) for name in ('all_errors.vcf', 'maximal.vcf', 'missing_fn.vcf')]
+        expected = [vcard_validator.validate_file(path, False, True) for path in paths]
+
+        for _ in range(2):
+            actual = [result for _, result in vcard_parallel.validate_files(paths, False, True, 2, self.path)]
+            self.assertEqual(expected, actual)
+
+        with vcard_cache.ValidationCache(self.path) as cache:
+            with mock.patch('vcard.vcard_validator.VCard') as vcard_mock:
+                vcard_validator.validate_file(paths[0], False, True, cache)
+        self.assertFalse(vcard_mock.called)
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from unittest import TestCase
 
-from vcard.vcard_errors import VCardError
+from vcard.vcard_errors import (
+    ERROR, NOTE_INVALID_DATE, WARN_LONG_LINE, WARNING, Diagnostic, DiagnosticCollector, VCardError,
+    VCardValueError)
 
 
 class TestVCardError(TestCase):
@@ -36,3 +38,62 @@ class TestVCardError(TestCase):
             'String: too;few;values;êéè',
         ])
         self.assertEqual(expected, actual)
+
+    def test_output_can_be_repeated(self):
+        error = VCardError('message', {'File': 'a.vcf', 'File line': 1})
+
+        self.assertEqual(str(error), str(error))
+        self.assertEqual({'File': 'a.vcf', 'File line': 1}, error.context)
+
+
+class TestDiagnostic(TestCase):
+    def test_code_from_message(self):
+        diagnostic = Diagnostic(NOTE_INVALID_DATE + ': 2000-13-01', {'File line': 3, 'Property': 'BDAY'})
+
+        self.assertEqual('INVALID_DATE', diagnostic.code)
+        self.assertEqual(ERROR, diagnostic.severity)
+        self.assertEqual(3, diagnostic.file_line)
+        self.assertEqual('BDAY', diagnostic.property_name)
+
+    def test_from_error_and_back(self):
+        error = VCardValueError(NOTE_INVALID_DATE + ': 2000-13-01', {'Property': 'BDAY'})
+
+        diagnostic = Diagnostic.from_error(error)
+        new_error = diagnostic.to_error()
+
+        self.assertIsInstance(new_error, VCardValueError)
+        self.assertIsNot(error, new_error)
+        self.assertEqual(error.message, new_error.message)
+        self.assertEqual(error.context, new_error.context)
+        self.assertIsNot(diagnostic.context, new_error.context)
+
+    def test_output_can_be_repeated(self):
+        diagnostic = Diagnostic('message', {'File': 'a.vcf', 'File line': 1})
+
+        self.assertEqual('message\nFile: a.vcf\nFile line: 1', str(diagnostic))
+        self.assertEqual(str(diagnostic), str(diagnostic))
+
+
+class TestDiagnosticCollector(TestCase):
+    def test_counts_all_and_keeps_first_examples(self):
+        collector = DiagnosticCollector(max_examples=2)
+        for line in range(5):
+            collector.add(Diagnostic(WARN_LONG_LINE, {'File': 'a.vcf', 'File line': line}, WARNING))
+
+        self.assertEqual({'LONG_LINE': 5}, dict(collector.counts))
+        self.assertEqual([0, 1], [diagnostic.file_line for diagnostic in collector.examples['LONG_LINE']])
+
+    def test_update_merges_other_collector(self):
+        collector = DiagnosticCollector(max_examples=2)
+        collector.add(Diagnostic(WARN_LONG_LINE, {'File line': 1}, WARNING))
+        other = DiagnosticCollector(max_examples=2)
+        for line in (2, 3):
+            other.add(Diagnostic(WARN_LONG_LINE, {'File line': line}, WARNING))
+
+        collector.update(other)
+
+        self.assertEqual({'LONG_LINE': 3}, dict(collector.counts))
+        self.assertEqual([1, 2], [diagnostic.file_line for diagnostic in collector.examples['LONG_LINE']])
+
+    def test_empty_summary(self):
+        self.assertEqual('', DiagnosticCollector().get_summary())
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import warnings
+
+import mock
+from unittest import TestCase
+from vcard import vcard_index, vcard_validator
+from vcard.vcard_errors import VCardError
+
+MINIMAL_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\nEND:VCARD\r\n\r\n'
+INVALID_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nEND:VCARD\r\n\r\n'
+KEYED_VCARD = (
+    u'BEGIN:VCARD\r\nVERSION:3.0\r\nUID:1234\r\nN:Dø;Jane;;;\r\nFN:Jane\r\n  Dø\r\n'
+    u'EMAIL;TYPE=INTERNET:jane@example.org\r\nEMAIL:other@example.org\r\nEND:VCARD\r\n\r\n')
+
+
+class TestVcardIndex(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.vcf')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        warnings.resetwarnings()
+
+    def _write(self, text, mode='wb'):
+        with open(self.path, mode) as file_pointer:
+            file_pointer.write(text.encode('utf-8'))
+
+    def test_entries_have_offsets_and_key_fields(self):
+        self._write(MINIMAL_VCARD + KEYED_VCARD)
+
+        index = vcard_index.VcardIndex(self.path)
+
+        self.assertEqual(2, len(index))
+        self.assertEqual(0, index[0].offset)
+        self.assertEqual(len(MINIMAL_VCARD), index[1].offset)
+        self.assertEqual(len(KEYED_VCARD.encode('utf-8')), index[1].length)
+        self.assertEqual((None, u'John Doe', None), (index[0].uid, index[0].fn, index[0].email))
+        self.assertEqual((u'1234', u'Jane Dø', u'jane@example.org'), (index[1].uid, index[1].fn, index[1].email))
+        self.assertEqual(KEYED_VCARD, index.get_text(1))
+        self.assertEqual(1, index.find_uid(u'1234'))
+        self.assertIsNone(index.find_uid(u'5678'))
+
+    def test_index_file_written_next_to_vcard_file(self):
+        self._write(MINIMAL_VCARD)
+
+        vcard_index.VcardIndex(self.path)
+
+        with open(self.path + vcard_index.INDEX_SUFFIX) as file_pointer:
+            header = json.loads(file_pointer.readline())
+            self.assertEqual(1, len(file_pointer.readlines()))
+        self.assertEqual(vcard_index.INDEX_FORMAT_VERSION, header['version'])
+        self.assertEqual(os.path.getsize(self.path), header['size'])
+
+    def test_unchanged_file_not_scanned(self):
+        self._write(MINIMAL_VCARD * 2)
+        vcard_index.VcardIndex(self.path)
+
+        with mock.patch('vcard.vcard_index.iter_vcard_spans') as iter_vcard_spans_mock:
+            index = vcard_index.VcardIndex(self.path)
+
+        self.assertFalse(iter_vcard_spans_mock.called)
+        self.assertEqual(2, len(index))
+        self.assertFalse(index.update())
+
+    def test_appended_file_scanned_from_last_vcard(self):
+        self._write(MINIMAL_VCARD * 2)
+        index = vcard_index.VcardIndex(self.path)
+        self._write(INVALID_VCARD, 'ab')
+
+        with mock.patch('vcard.vcard_index.iter_vcard_spans', wraps=vcard_index.iter_vcard_spans) as spans_mock:
+            self.assertTrue(index.update())
+
+        spans_mock.assert_called_once_with(mock.ANY, 2 * len(MINIMAL_VCARD))
+        self.assertEqual(3, len(index))
+        self.assertEqual(3, len(vcard_index.VcardIndex(self.path)))
+
+    def test_rewritten_file_reindexed(self):
+        self._write(MINIMAL_VCARD * 2)
+        vcard_index.VcardIndex(self.path)
+        self._write(KEYED_VCARD + MINIMAL_VCARD * 2)
+
+        index = vcard_index.VcardIndex(self.path)
+
+        self.assertEqual(3, len(index))
+        self.assertEqual(u'1234', index[0].uid)
+
+    def test_same_size_edit_reindexed(self):
+        # Larger than a few kilobytes, so the edit is far from the end of the file
+        self._write(MINIMAL_VCARD * 100)
+        vcard_index.VcardIndex(self.path)
+        mtime = os.path.getmtime(self.path)
+        self._write(MINIMAL_VCARD.replace(u'FN:John', u'FN:Jane') + MINIMAL_VCARD * 99)
+        os.utime(self.path, (mtime + 10, mtime + 10))
+
+        index = vcard_index.VcardIndex(self.path)
+
+        self.assertEqual(u'Jane Doe', index[0].fn)
+        self.assertEqual(index[0].hash, hashlib.sha1(index.get_text(0).encode('utf-8')).hexdigest())
+
+    def test_index_file_replaced_without_removing_it(self):
+        self._write(MINIMAL_VCARD)
+        vcard_index.VcardIndex(self.path)
+        self._write(MINIMAL_VCARD, 'ab')
+
+        with mock.patch('os.remove', side_effect=AssertionError('index file removed')):
+            index = vcard_index.VcardIndex(self.path)
+
+        self.assertEqual(2, len(index))
+
+    def test_other_index_format_version_rebuilt(self):
+        self._write(MINIMAL_VCARD)
+        vcard_index.VcardIndex(self.path)
+
+        with mock.patch('vcard.vcard_index.INDEX_FORMAT_VERSION', 0):
+            index = vcard_index.VcardIndex(self.path)
+
+            self.assertFalse(index.update())
+
+        self.assertEqual(1, len(index))
+
+    def test_validate_after_append_has_same_result_as_validate_vcards(self):
+        text = MINIMAL_VCARD + INVALID_VCARD + KEYED_VCARD
+        self._write(MINIMAL_VCARD)
+        index = vcard_index.VcardIndex(self.path)
+        self._write(INVALID_VCARD + KEYED_VCARD, 'ab')
+        index.update()
+        expected = vcard_validator.validate_vcards(io.StringIO(text), self.path, False, all_errors=True)
+
+        self.assertEqual(expected, [result for result in map(index.validate, range(len(index))) if result])
+        self.assertIsInstance(index.get_vcard(2), vcard_validator.VCard)
+
+    def test_lazy_vcard_of_invalid_vcard_gets_valid_properties(self):
+        self._write(INVALID_VCARD)
+        index = vcard_index.VcardIndex(self.path)
+
+        vcard = index.get_vcard(0, lazy=True)
+
+        self.assertEqual([[u'Doe'], [u'John'], [u''], [u'Mr'], [u'']], vcard.get('N')[0].values)
+        self.assertRaises(VCardError, vcard.validate)
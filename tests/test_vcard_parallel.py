@@ -0,0 +1,100 @@
+import glob
+import io
+import os
+import shutil
+import tempfile
+import warnings
+
+import mock
+import six
+from unittest import TestCase
+
+from vcard import vcard_parallel, vcard_validator
+from vcard.vcard_payload import payload_limits
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+VCARD_FILES = sorted(glob.glob(os.path.join(TEST_DIRECTORY, '*.vcf')))
+MINIMAL_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\nEND:VCARD\r\n\r\n'
+
+
+class TestValidateFiles(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        warnings.resetwarnings()
+
+    def _assert_same_as_serial(self, paths, all_errors):
+        expected = [vcard_validator.validate_file(path, False, all_errors) for path in paths]
+
+        actual = [result for _, result in vcard_parallel.validate_files(paths, False, all_errors, jobs=2)]
+
+        self.assertEqual(expected, actual)
+
+    def test_results_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(VCARD_FILES, False)
+
+    def test_all_errors_results_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(VCARD_FILES, True)
+
+    @mock.patch('vcard.vcard_parallel.PIECE_SIZE', 1)
+    @mock.patch('vcard.vcard_parallel.SPLIT_FILE_SIZE', 0)
+    def test_split_files_results_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(VCARD_FILES, False)
+
+    @mock.patch('vcard.vcard_parallel.PIECE_SIZE', 1)
+    @mock.patch('vcard.vcard_parallel.SPLIT_FILE_SIZE', 0)
+    def test_split_files_all_errors_results_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(VCARD_FILES, True)
+
+    @mock.patch('vcard.vcard_validator.property_cache.max_size', 0)
+    def _assert_verbose_output_same_as_serial(self):
+        vcard_validator.property_cache.clear()
+        paths = [os.path.join(TEST_DIRECTORY, name) for name in ('rfc_2426_a.vcf', 'maximal.vcf')]
+        string_type = io.StringIO if six.PY3 else io.BytesIO
+        expected = []
+        with mock.patch('sys.stderr', new_callable=string_type) as expected_stderr:
+            for path in paths:
+                with mock.patch('sys.stdout', new_callable=string_type) as stdout:
+                    vcard_validator.validate_file(path, True)
+                expected.append(stdout.getvalue())
+
+        with mock.patch('sys.stderr', new_callable=string_type) as actual_stderr:
+            actual = [output for output, _ in vcard_parallel.validate_files(paths, True, jobs=2)]
+
+        self.assertEqual(expected, actual)
+        self.assertEqual(expected_stderr.getvalue(), actual_stderr.getvalue())
+        self.assertEqual(2, actual_stderr.getvalue().count('Property line cache hit rate: 0.0%'))
+        self.assertNotIn('Property line cache', ''.join(actual))
+
+    def test_verbose_output_same_as_serial_run(self):
+        self._assert_verbose_output_same_as_serial()
+
+    @mock.patch('vcard.vcard_parallel.PIECE_SIZE', 1)
+    @mock.patch('vcard.vcard_parallel.SPLIT_FILE_SIZE', 0)
+    def test_split_files_verbose_output_same_as_serial_run(self):
+        self._assert_verbose_output_same_as_serial()
+
+    @mock.patch.multiple(payload_limits, max_size=2)
+    def test_workers_use_payload_limits(self):
+        path = os.path.join(self.directory, 'photo.vcf')
+        with io.open(path, 'w', newline='') as file_pointer:
+            file_pointer.write(MINIMAL_VCARD.replace(u'FN:', u'PHOTO;ENCODING=b;TYPE=JPEG:AAAA\r\nFN:'))
+
+        [(_, result)] = vcard_parallel.validate_files([path], False, jobs=2)
+
+        self.assertIn('Inline binary value too large', result)
+
+
+class TestSplitFile(TestCase):
+    def test_pieces_end_on_vcard_boundaries(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+        pieces = list(vcard_parallel.split_file(path, 1))
+
+        self.assertEqual([0, 5, 11, 16], [first_line for first_line, _ in pieces])
+        for _, text in pieces:
+            self.assertTrue(text.startswith('BEGIN:VCARD\r\n'))
+            self.assertTrue(text.endswith('END:VCARD\r\n\r\n'))
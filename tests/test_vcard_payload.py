@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from vcard.vcard_errors import NOTE_INVALID_BASE64, VCardValueError
+from vcard.vcard_payload import PayloadChecker, PayloadLimits
+
+
+class TestPayloadChecker(TestCase):
+    def _check(self, lines, limits=None):
+        checker = PayloadChecker(limits or PayloadLimits())
+        property_line = None
+        for index, line in enumerate(lines):
+            if line.startswith(u' '):
+                checker.add(line[1:-2])
+                property_line = property_line[:-2] + line[1:]
+            else:
+                if property_line is not None:
+                    checker.finish(property_line)
+                checker.start(line, index)
+                property_line = line
+        checker.finish(property_line)
+        return checker
+
+    def _assert_invalid(self, lines, limits=None):
+        try:
+            self._check(lines, limits)
+            self.fail('Invalid value accepted: {0!r}'.format(lines))
+        except VCardValueError as error:
+            return error
+
+    def test_counts_decoded_size(self):
+        checker = self._check([u'PHOTO;ENCODING=b;TYPE=JPEG:AAAA\r\n', u' AA==\r\n'])
+
+        self.assertEqual(4, checker.size)
+
+    def test_counts_size_of_every_value(self):
+        checker = self._check([u'PHOTO;ENCODING=b:AAAA\r\n', u'item1.LOGO;encoding=b:AAA=\r\n'])
+
+        self.assertEqual(5, checker.size)
+
+    def test_ignores_other_values(self):
+        checker = self._check([u'PHOTO;VALUE=uri:http://example.org/\r\n', u'NOTE;ENCODING=b:!\r\n'])
+
+        self.assertEqual(0, checker.size)
+
+    def test_accepts_padding_split_across_lines(self):
+        self.assertEqual(1, self._check([u'KEY;ENCODING=b:AA=\r\n', u' =\r\n']).size)
+
+    def test_rejects_invalid_character(self):
+        error = self._assert_invalid([u'SOUND;ENCODING=b:AAAA\r\n', u' AA!A\r\n'])
+
+        self.assertEqual(NOTE_INVALID_BASE64, error.message)
+        self.assertEqual({'vCard line': 0, 'Property': 'SOUND'}, error.context)
+
+    def test_rejects_data_after_padding(self):
+        self._assert_invalid([u'PHOTO;ENCODING=b:AA==\r\n', u' AAAA\r\n'])
+
+    def test_rejects_incomplete_value(self):
+        self._assert_invalid([u'PHOTO;ENCODING=b:AAAAA\r\n'])
+
+    def test_rejects_values_over_limit_per_vcard(self):
+        lines = [u'PHOTO;ENCODING=b:AAAA\r\n', u'LOGO;ENCODING=b:AAAA\r\n', u' AAAA\r\n']
+
+        error = self._assert_invalid(lines, PayloadLimits(max_size=8))
+
+        self.assertIn('more than 8 bytes per vCard', error.message)
+        self.assertEqual('LOGO', error.context['Property'])
+
+    def test_no_limit(self):
+        self.assertEqual(3, self._check([u'PHOTO;ENCODING=b:AAAA\r\n'], PayloadLimits(max_size=None)).size)
+
+    def test_structure_only_skips_characters(self):
+        checker = self._check([u'PHOTO;ENCODING=b:AA!A\r\n', u' AA==\r\n'], PayloadLimits(structure_only=True))
+
+        self.assertEqual(4, checker.size)
+
+    def test_structure_only_checks_length(self):
+        self._assert_invalid([u'PHOTO;ENCODING=b:AA!\r\n'], PayloadLimits(structure_only=True))
@@ -0,0 +1,130 @@
+from unittest import TestCase, skipIf
+
+import mock
+from vcard.vcard_property import FrozenVcardProperty, PropertyCache, VcardProperty
+from vcard.vcard_validator import get_vcard_property
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MEMORY_TEST_PROPERTIES = 10000
+
+MEMORY_TEST_MAX_BYTES_PER_PROPERTY = 650
+
+MEMORY_TEST_MAX_BYTES_PER_FROZEN_PROPERTY = 500
+
+
+class TestVcardProperty(TestCase):
+    def test_has_no_instance_dictionary(self):
+        self.assertFalse(hasattr(VcardProperty('TEL'), '__dict__'))
+
+    def test_names_are_interned(self):
+        first = get_vcard_property(''.join(['T', 'EL;TYPE=WORK:+1\r\n']))
+        second = get_vcard_property(''.join(['TE', 'L;TYPE=WORK:+2\r\n']))
+
+        self.assertIs(first.name, second.name)
+        self.assertIs(list(first.parameters)[0], list(second.parameters)[0])
+        self.assertIs(first.parameters['TYPE'], second.parameters['TYPE'])
+
+    def test_parameter_values_are_frozensets(self):
+        property_ = get_vcard_property('TEL;TYPE=WORK;TYPE=VOICE,PREF:+1\r\n')
+
+        self.assertEqual({'TYPE': frozenset(['WORK', 'VOICE', 'PREF'])}, property_.parameters)
+        self.assertIsInstance(property_.parameters['TYPE'], frozenset)
+
+    def test_freeze_returns_immutable_copy(self):
+        property_ = get_vcard_property('N:Doe;John;;;\r\n')
+
+        frozen = property_.freeze()
+
+        self.assertIsInstance(frozen, FrozenVcardProperty)
+        self.assertEqual('N', frozen.name)
+        self.assertEqual((('Doe',), ('John',), ('',), ('',), ('',)), frozen.values)
+        self.assertRaises(AttributeError, setattr, frozen, 'name', 'FN')
+        self.assertIs(frozen, frozen.freeze())
+
+    def test_copy_returns_mutable_copy(self):
+        frozen = get_vcard_property('TEL;TYPE=WORK:+1\r\n').freeze()
+
+        copy = frozen.copy()
+        copy.values[0].append('+2')
+        copy.parameters['TYPE'] = frozenset(['HOME'])
+
+        self.assertNotIsInstance(copy, FrozenVcardProperty)
+        self.assertEqual((('+1',),), frozen.values)
+        self.assertEqual(frozenset(['WORK']), frozen.parameters['TYPE'])
+
+    @skipIf(tracemalloc is None, 'tracemalloc not available')
+    def test_memory_per_property(self):
+        self.assertLess(_get_bytes_per_property(get_vcard_property), MEMORY_TEST_MAX_BYTES_PER_PROPERTY)
+
+    @skipIf(tracemalloc is None, 'tracemalloc not available')
+    def test_memory_per_frozen_property(self):
+        self.assertLess(
+            _get_bytes_per_property(lambda line: get_vcard_property(line).freeze()),
+            MEMORY_TEST_MAX_BYTES_PER_FROZEN_PROPERTY)
+
+
+@mock.patch('vcard.vcard_validator.property_cache.max_size', 0)
+def _get_bytes_per_property(get_property):
+    lines = [_get_property_line(index) for index in range(MEMORY_TEST_PROPERTIES)]
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        properties = [get_property(line) for line in lines]
+        return float(tracemalloc.get_traced_memory()[0] - before) / len(properties)
+    finally:
+        tracemalloc.stop()
+
+
+def _get_property_line(index):
+    if index % 2:
+        return 'TEL;TYPE=CELL:+47 {0:08d}\r\n'.format(index)
+    return 'EMAIL;TYPE=PREF:user{0:d}@example.org\r\n'.format(index)
+
+
+class TestPropertyCache(TestCase):
+    def test_missing_line_raises_key_error(self):
+        cache = PropertyCache()
+
+        self.assertRaises(KeyError, cache.get, 'FN:A\r\n')
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_evicts_least_recently_used(self):
+        cache = PropertyCache(2)
+        cache.set('A', 1)
+        cache.set('B', 2)
+        cache.get('A')
+        cache.set('C', 3)
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('A'))
+        self.assertEqual(3, cache.get('C'))
+        self.assertRaises(KeyError, cache.get, 'B')
+        self.assertEqual((3, 1), (cache.hits, cache.misses))
+
+    def test_size_zero_disables_cache(self):
+        cache = PropertyCache(0)
+        cache.set('A', 1)
+
+        self.assertEqual(0, len(cache))
+
+    def test_long_line_not_kept(self):
+        cache = PropertyCache(max_line_length=10)
+        cache.set('A' * 10, 1)
+        cache.set('B' * 11, 2)
+
+        self.assertEqual(1, len(cache))
+        self.assertRaises(KeyError, cache.get, 'B' * 11)
+
+    def test_clear(self):
+        cache = PropertyCache()
+        cache.set('A', 1)
+        cache.get('A')
+
+        cache.clear()
+
+        self.assertEqual((0, 0, 0), (len(cache), cache.hits, cache.misses))
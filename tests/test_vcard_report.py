@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import warnings
+
+import mock
+from unittest import TestCase
+
+from vcard import vcard_parallel, vcard_report
+from vcard.vcard_errors import Diagnostic
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+ALL_ERRORS_PATH = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+
+def _report(path, all_errors):
+    diagnostics = []
+    failed = vcard_report.report_file(path, diagnostics.append, all_errors)
+    return diagnostics, failed
+
+
+class TestJsonLinesWriter(TestCase):
+    def test_buffers_until_size(self):
+        file_pointer = io.StringIO()
+        writer = vcard_report.JsonLinesWriter(file_pointer, buffer_size=200)
+
+        writer.write(Diagnostic(u'first', {}))
+        self.assertEqual(u'', file_pointer.getvalue())
+
+        writer.write_text(u'x' * 200 + u'\n')
+        self.assertEqual(2, len(file_pointer.getvalue().splitlines()))
+
+    def test_flushes_on_exit(self):
+        file_pointer = io.StringIO()
+        with vcard_report.JsonLinesWriter(file_pointer) as writer:
+            writer.write(Diagnostic(u'first', {'File': 'a.vcf'}))
+
+        self.assertEqual(u'a.vcf', json.loads(file_pointer.getvalue())['file'])
+
+
+class TestReportFile(TestCase):
+    def test_byte_offsets_point_at_vcard(self):
+        diagnostics, failed = _report(ALL_ERRORS_PATH, True)
+
+        self.assertTrue(failed)
+        with open(ALL_ERRORS_PATH, 'rb') as file_pointer:
+            data = file_pointer.read()
+        for diagnostic in diagnostics:
+            self.assertTrue(data[diagnostic.file_offset:].startswith(b'BEGIN:VCARD\r\n'))
+
+    def test_stops_at_first_error_by_default(self):
+        diagnostics, failed = _report(ALL_ERRORS_PATH, False)
+
+        self.assertTrue(failed)
+        self.assertEqual([4], [diagnostic.file_line for diagnostic in diagnostics])
+
+    def test_valid_file_has_no_records(self):
+        self.assertEqual(([], False), _report(os.path.join(TEST_DIRECTORY, 'minimal.vcf'), False))
+
+    def test_remaining_lines_record_has_file(self):
+        path = os.path.join(TEST_DIRECTORY, 'missing_end.vcf')
+
+        diagnostics, _ = _report(path, False)
+
+        self.assertEqual(path, vcard_report.get_record(diagnostics[-1])['file'])
+
+
+class TestReportFiles(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def tearDown(self):
+        warnings.resetwarnings()
+
+    def _assert_same_as_serial(self, all_errors):
+        paths = [ALL_ERRORS_PATH, os.path.join(TEST_DIRECTORY, 'rfc_2426_a.vcf')]
+        expected = []
+        for path in paths:
+            expected.extend(vcard_report.format_record(diagnostic) for diagnostic in _report(path, all_errors)[0])
+
+        actual = [records for records, _ in vcard_parallel.report_files(paths, all_errors, jobs=2)]
+
+        self.assertEqual(''.join(expected), ''.join(actual))
+
+    def test_records_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(False)
+
+    def test_all_errors_records_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(True)
+
+    @mock.patch('vcard.vcard_parallel.PIECE_SIZE', 1)
+    @mock.patch('vcard.vcard_parallel.SPLIT_FILE_SIZE', 0)
+    def test_split_files_records_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(False)
+
+    @mock.patch('vcard.vcard_parallel.PIECE_SIZE', 1)
+    @mock.patch('vcard.vcard_parallel.SPLIT_FILE_SIZE', 0)
+    def test_split_files_all_errors_records_in_same_order_as_serial_run(self):
+        self._assert_same_as_serial(True)
@@ -0,0 +1,107 @@
+import array
+import io
+import os
+import shutil
+import tempfile
+import warnings
+
+import mock
+from unittest import TestCase, skipIf
+from vcard import vcard_scanner, vcard_validator
+from vcard.vcard_errors import VCardError
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+MINIMAL_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\nEND:VCARD\r\n\r\n'
+INVALID_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nEND:VCARD\r\n\r\n'
+
+
+class TestVcardScanner(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        warnings.resetwarnings()
+
+    def _scan(self, text):
+        path = os.path.join(self.directory, 'test.vcf')
+        with open(path, 'wb') as file_pointer:
+            file_pointer.write(text.encode('utf-8'))
+        scanner = vcard_scanner.VcardScanner(path)
+        self.addCleanup(scanner.close)
+        return scanner
+
+    def test_len_is_number_of_vcards(self):
+        self.assertEqual(3, len(self._scan(MINIMAL_VCARD * 3)))
+
+    def test_empty_file(self):
+        scanner = self._scan(u'')
+
+        self.assertEqual(0, len(scanner))
+        self.assertEqual([], scanner[:])
+
+    def test_index_returns_vcard(self):
+        scanner = self._scan(MINIMAL_VCARD.replace(u'John', u'Jane') + MINIMAL_VCARD)
+
+        self.assertEqual(MINIMAL_VCARD, scanner[1].text)
+        self.assertEqual(MINIMAL_VCARD, scanner[-1].text)
+        self.assertIn(u'Jane', scanner[0].text)
+
+    def test_index_out_of_range(self):
+        scanner = self._scan(MINIMAL_VCARD)
+
+        self.assertRaises(IndexError, lambda: scanner[1])
+        self.assertRaises(IndexError, lambda: scanner[-2])
+
+    def test_slice_returns_list_of_vcards(self):
+        scanner = self._scan(MINIMAL_VCARD * 5)
+
+        vcards = scanner[1:5:2]
+
+        self.assertEqual(2, len(vcards))
+        self.assertEqual([MINIMAL_VCARD] * 2, [vcard.text for vcard in vcards])
+
+    def test_span_is_byte_offsets(self):
+        text = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Dø;John;;Mr;\r\nFN:Dø\r\nEND:VCARD\r\n\r\n'
+        scanner = self._scan(text * 2)
+
+        length = len(text.encode('utf-8'))
+        self.assertEqual((length, 2 * length), scanner.span(1))
+        self.assertEqual(text, scanner.get_text(1))
+
+    @skipIf(array.array(vcard_scanner.OFFSET_TYPECODE).itemsize < 8, 'No 64-bit array type')
+    def test_offsets_over_4_gib(self):
+        start = 5 * 1024 ** 3
+        with mock.patch('vcard.vcard_scanner.iter_vcard_spans', return_value=iter([(start, start + 67)])):
+            scanner = self._scan(u'')
+
+        self.assertEqual((start, start + 67), scanner.span(0))
+
+    def test_text_outside_vcards_ignored(self):
+        scanner = self._scan(u'junk\r\nEND:VCARD\r\n' + MINIMAL_VCARD.lower() + u'BEGIN:VCARD\r\n')
+
+        self.assertEqual(1, len(scanner))
+        self.assertEqual(MINIMAL_VCARD.lower(), scanner.get_text(0))
+
+    def test_error_has_same_file_line_as_iter_vcards(self):
+        scanner = self._scan(MINIMAL_VCARD + INVALID_VCARD)
+        with open(scanner.filename, 'rb') as file_pointer:
+            expected = list(vcard_validator.iter_vcards(
+                io.StringIO(file_pointer.read().decode('utf-8')), scanner.filename))[1]
+
+        with self.assertRaises(VCardError) as context:
+            scanner[1]
+
+        self.assertEqual(scanner.filename, context.exception.context['File'])
+        self.assertEqual(10, expected.context['File line'])
+        self.assertEqual(10, context.exception.context['File line'])
+
+    def test_same_vcards_as_iter_vcards(self):
+        path = os.path.join(TEST_DIRECTORY, 'grouped.vcf')
+        file_pointer = vcard_validator.open_vcard_file(path)
+        self.addCleanup(file_pointer.close)
+        expected = [vcard.text for vcard in vcard_validator.iter_vcards(file_pointer, path)]
+
+        with vcard_scanner.VcardScanner(path) as scanner:
+            self.assertEqual(expected, [vcard.text for vcard in scanner])
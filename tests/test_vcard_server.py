@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+from unittest import TestCase, skipIf
+
+import mock
+from six.moves import http_client
+
+from vcard import vcard_server
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+
+
+class _ServerTestCase(TestCase):
+    def _start(self, server):
+        self.server = server
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+
+class TestValidationServer(_ServerTestCase):
+    def setUp(self):
+        self._start(vcard_server.ValidationServer(('127.0.0.1', 0), jobs=1, path_root=TEST_DIRECTORY))
+
+    def _post(self, url, body=b'', server=None):
+        server = server or self.server
+        connection = http_client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=30)
+        try:
+            connection.request('POST', url, body)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode('ascii'))
+        finally:
+            connection.close()
+
+    def test_valid_payload(self):
+        with open(os.path.join(TEST_DIRECTORY, 'minimal.vcf'), 'rb') as file_pointer:
+            status, result = self._post('/validate', file_pointer.read())
+
+        self.assertEqual(200, status)
+        self.assertEqual({'failed': False, 'diagnostics': []}, result)
+
+    def test_path_with_all_errors(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+        status, result = self._post('/validate?all_errors=1&path=' + path)
+
+        self.assertEqual(200, status)
+        self.assertTrue(result['failed'])
+        self.assertEqual([4, 15], [record['line'] for record in result['diagnostics']])
+        self.assertEqual([path, path], [record['file'] for record in result['diagnostics']])
+
+    def test_missing_path(self):
+        status, result = self._post('/validate?path=' + os.path.join(TEST_DIRECTORY, 'nonexistent.vcf'))
+
+        self.assertEqual(400, status)
+        self.assertIn('nonexistent.vcf', result['error'])
+
+    def test_path_relative_to_path_root(self):
+        status, result = self._post('/validate?path=minimal.vcf')
+
+        self.assertEqual(200, status)
+        self.assertFalse(result['failed'])
+
+    def test_path_outside_path_root(self):
+        for path in (os.path.join(TEST_DIRECTORY, os.pardir, 'setup.py'), '../setup.py', '/etc/passwd'):
+            status, result = self._post('/validate?path=' + path)
+
+            self.assertEqual(403, status)
+            self.assertNotIn('diagnostics', result)
+
+    def test_paths_disabled_by_default(self):
+        server = vcard_server.ValidationServer(('127.0.0.1', 0), jobs=1)
+        self._start(server)
+
+        status, result = self._post('/validate?path=' + os.path.join(TEST_DIRECTORY, 'minimal.vcf'), server=server)
+
+        self.assertEqual(403, status)
+        self.assertIn('disabled', result['error'])
+
+    def test_invalid_encoding(self):
+        self.assertEqual(400, self._post('/validate', b'\xff\r\n')[0])
+
+    def test_unknown_path(self):
+        self.assertEqual(404, self._post('/other')[0])
+
+    def _send_raw(self, request):
+        client = socket.create_connection(('127.0.0.1', self.server.server_address[1]), timeout=30)
+        try:
+            client.sendall(request)
+            response = b''
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    break
+                response += data
+        finally:
+            client.close()
+        head, body = response.split(b'\r\n\r\n', 1)
+        return int(head.split(b' ')[1]), json.loads(body.decode('ascii'))
+
+    def test_invalid_content_length(self):
+        for header in (b'', b'Content-Length: many\r\n', b'Content-Length: -1\r\n'):
+            status, result = self._send_raw(b'POST /validate HTTP/1.0\r\n' + header + b'\r\n')
+
+            self.assertEqual(400, status)
+            self.assertIn('Content-Length', result['error'])
+
+    def test_unexpected_error(self):
+        with mock.patch.object(self.server.pool, 'apply', side_effect=RuntimeError('worker lost')):
+            status, result = self._post('/validate', b'BEGIN:VCARD\r\n')
+
+        self.assertEqual(500, status)
+        self.assertIn('worker lost', result['error'])
+
+
+@skipIf(not hasattr(vcard_server, 'UnixValidationServer'), 'UNIX sockets not supported')
+class TestUnixValidationServer(_ServerTestCase):
+    def test_payload(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'vcard.sock')
+        self._start(vcard_server.UnixValidationServer(path, jobs=1))
+
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        client.sendall(b'POST /validate HTTP/1.0\r\nContent-Length: 13\r\n\r\nBEGIN:VCARD\r\n')
+        response = b''
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            response += data
+        client.close()
+
+        result = json.loads(response.split(b'\r\n\r\n', 1)[1].decode('ascii'))
+        self.assertTrue(result['failed'])
+
+    def test_socket_only_for_owner(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'vcard.sock')
+        self._start(vcard_server.UnixValidationServer(path, jobs=1))
+
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(path).st_mode))
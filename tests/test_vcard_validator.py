@@ -1,6 +1,18 @@
+import io
+import mmap
+import os
+import warnings
+
 import mock
+import six
 from unittest import TestCase
 from vcard import vcard_validator
+from vcard.vcard_errors import WARNING, Diagnostic, DiagnosticCollector, VCardError, VCardLineError, VCardValueError
+from vcard.vcard_payload import payload_limits
+
+TEST_DIRECTORY = os.path.dirname(__file__)
+MINIMAL_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nFN:John Doe\r\nEND:VCARD\r\n\r\n'
+INVALID_VCARD = u'BEGIN:VCARD\r\nVERSION:3.0\r\nN:Doe;John;;Mr;\r\nEND:VCARD\r\n\r\n'
 
 
 class TestVcardValidator(TestCase):
@@ -11,3 +23,455 @@ class TestVcardValidator(TestCase):
         validator = vcard_validator.VcardValidator('/some/path', False)
 
         self.assertEqual(validator.result, 'foo')
+
+    @mock.patch('vcard.vcard_validator.validate_file')
+    def test_all_errors_passed_to_validate_file(self, validate_file_mock):
+        vcard_validator.VcardValidator('/some/path', False, all_errors=True)
+
+        validate_file_mock.assert_called_once_with('/some/path', False, True, None, None)
+
+
+class TestIterVcards(TestCase):
+    def test_yields_one_vcard_per_card(self):
+        vcards = list(vcard_validator.iter_vcards(io.StringIO(MINIMAL_VCARD * 3)))
+
+        self.assertEqual(3, len(vcards))
+        for vcard in vcards:
+            self.assertIsInstance(vcard, vcard_validator.VCard)
+            self.assertEqual(MINIMAL_VCARD, vcard.text)
+
+    def test_yields_error_and_continues(self):
+        vcards = list(vcard_validator.iter_vcards(io.StringIO(INVALID_VCARD + MINIMAL_VCARD), 'test.vcf'))
+
+        self.assertIsInstance(vcards[0], VCardError)
+        self.assertEqual('test.vcf', vcards[0].context['File'])
+        self.assertEqual(4, vcards[0].context['File line'])
+        self.assertIsInstance(vcards[1], vcard_validator.VCard)
+
+    def test_yields_error_for_remaining_lines(self):
+        vcards = list(vcard_validator.iter_vcards(io.StringIO(MINIMAL_VCARD + u'BEGIN:VCARD\r\n'), 'test.vcf'))
+
+        self.assertIsInstance(vcards[-1], VCardError)
+        self.assertIn('1 lines remain', str(vcards[-1]))
+
+    def test_cached_results_used_instead_of_parsing(self):
+        cache = mock.Mock(spec=['get', 'set'])
+        cache.get.side_effect = [[], [Diagnostic('cached', {'vCard line': 2})], KeyError()]
+
+        with mock.patch('vcard.vcard_validator.VCard', wraps=vcard_validator.VCard) as vcard_mock:
+            vcards = list(vcard_validator.iter_vcards(io.StringIO(MINIMAL_VCARD * 3), 'test.vcf', cache=cache))
+
+        vcard_mock.assert_called_once_with(MINIMAL_VCARD, 'test.vcf', [])
+        cache.set.assert_called_once_with(MINIMAL_VCARD, [])
+        self.assertEqual(2, len(vcards))
+        self.assertEqual({'vCard line': 2, 'File': 'test.vcf', 'File line': 11, 'File offset': 69}, vcards[0].context)
+        self.assertIsInstance(vcards[1], vcard_validator.VCard)
+
+    def test_diagnostics_stored_in_cache(self):
+        cache = mock.Mock(spec=['get', 'set'])
+        cache.get.side_effect = KeyError()
+
+        diagnostics = list(vcard_validator.iter_vcard_diagnostics(io.StringIO(INVALID_VCARD), 'test.vcf', cache=cache))
+
+        cache.set.assert_called_once_with(INVALID_VCARD, diagnostics[0][1])
+
+    def testread_lines_keeps_line_endings_across_chunks(self):
+        text = MINIMAL_VCARD * 2
+        for chunk_size in range(1, len(text) + 1):
+            lines = list(vcard_validator.read_lines(io.StringIO(text), chunk_size))
+            self.assertEqual(text.splitlines(True), lines)
+
+    def testread_lines_keeps_mixed_line_endings(self):
+        text = u'a\rb\nc\r\nd'
+        for chunk_size in range(1, len(text) + 1):
+            lines = list(vcard_validator.read_lines(io.StringIO(text), chunk_size))
+            self.assertEqual(text.splitlines(True), lines)
+
+
+class TestParseVcard(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def tearDown(self):
+        warnings.resetwarnings()
+
+    def test_valid_vcard_has_no_diagnostics(self):
+        diagnostics = []
+
+        group, properties = vcard_validator.parse_vcard(MINIMAL_VCARD, diagnostics)
+
+        self.assertEqual([], diagnostics)
+        self.assertIsNone(group)
+        self.assertEqual(['BEGIN', 'VERSION', 'N', 'FN', 'END'], [property_.name for property_ in properties])
+
+    def test_reports_every_invalid_property(self):
+        text = MINIMAL_VCARD.replace(u'N:Doe', u'BDAY:foo\r\nN;X=1,2,3;:Doe').replace(u'FN:', u'FN;X:')
+        diagnostics = []
+
+        _, properties = vcard_validator.parse_vcard(text, diagnostics)
+
+        self.assertEqual([2, 3, 4], [diagnostic.context['vCard line'] for diagnostic in diagnostics])
+        self.assertEqual(['BEGIN', 'VERSION', 'END'], [property_.name for property_ in properties])
+
+    def test_first_only_stops_at_first_problem(self):
+        text = INVALID_VCARD.replace(u'N:Doe', u'BDAY:foo\r\nN:Doe')
+        diagnostics = []
+
+        vcard_validator.parse_vcard(text, diagnostics, first_only=True)
+
+        self.assertEqual(['INVALID_DATE'], [diagnostic.code for diagnostic in diagnostics])
+
+    def test_reports_missing_property(self):
+        diagnostics = []
+
+        vcard_validator.parse_vcard(INVALID_VCARD, diagnostics)
+
+        self.assertEqual(['MISSING_PROPERTY'], [diagnostic.code for diagnostic in diagnostics])
+        self.assertEqual('FN', diagnostics[0].property_name)
+
+    def test_line_problem_stops_parsing(self):
+        diagnostics = []
+
+        result = vcard_validator.parse_vcard(MINIMAL_VCARD.replace(u'\r\n', u'\n'), diagnostics)
+
+        self.assertEqual((None, []), result)
+        self.assertEqual(['INVALID_LINE_SEPARATOR'], [diagnostic.code for diagnostic in diagnostics])
+
+    def test_warnings_are_diagnostics(self):
+        text = MINIMAL_VCARD.replace(u'FN:', u'TEL;TYPE=voice:+1 234\r\nNOTE:a\r\n b\r\nFN:')
+        diagnostics = []
+
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            vcard_validator.parse_vcard(text, diagnostics)
+
+        self.assertEqual([], caught_warnings)
+        self.assertEqual([WARNING, WARNING], [diagnostic.severity for diagnostic in diagnostics])
+        self.assertEqual(
+            [(4, None), (3, u'TEL;TYPE=voice:+1 234\r\n')],
+            [(diagnostic.context['vCard line'], diagnostic.context.get('Property line')) for diagnostic in diagnostics])
+
+    def test_vcard_collects_diagnostics_instead_of_raising(self):
+        diagnostics = []
+
+        vcard = vcard_validator.VCard(INVALID_VCARD, 'test.vcf', diagnostics)
+
+        self.assertEqual(1, len(diagnostics))
+        self.assertEqual(4, len(vcard.properties))
+        self.assertRaises(VCardError, vcard_validator.VCard, INVALID_VCARD)
+
+
+class TestGetVcardProperty(TestCase):
+    def setUp(self):
+        vcard_validator.property_cache.clear()
+
+    def tearDown(self):
+        vcard_validator.property_cache.clear()
+
+    def test_repeated_line_not_tokenized_again(self):
+        line = u'TEL;TYPE=WORK:+1 234\r\n'
+        first = vcard_validator.get_vcard_property(line)
+
+        with mock.patch('vcard.vcard_validator.tokenize_property_line') as tokenize_mock:
+            second = vcard_validator.get_vcard_property(line)
+
+        self.assertFalse(tokenize_mock.called)
+        self.assertIsNot(first, second)
+        self.assertEqual(
+            (first.name, first.parameters, first.values), (second.name, second.parameters, second.values))
+        self.assertEqual(1, vcard_validator.property_cache.hits)
+
+    def test_colon_in_quoted_parameter_value(self):
+        property_ = vcard_validator.get_vcard_property(u'X-FOO;TYPE="a:b";X-BAR="c;d",e:value\r\n')
+
+        self.assertEqual({'TYPE': frozenset([u'"a:b"']), 'X-BAR': frozenset([u'"c;d"', u'e'])}, property_.parameters)
+        self.assertEqual([[u'value']], property_.values)
+
+    def test_repeated_invalid_line_raises_new_error(self):
+        line = u'BDAY:foo\r\n'
+        errors = []
+        for _ in range(2):
+            try:
+                vcard_validator.get_vcard_property(line)
+            except VCardError as error:
+                errors.append(error)
+                error.context['vCard line'] = len(errors)
+
+        self.assertEqual(2, len(errors))
+        self.assertIs(type(errors[0]), type(errors[1]))
+        self.assertEqual(errors[0].message, errors[1].message)
+        self.assertEqual(line, errors[1].context['Property line'])
+        self.assertEqual(2, errors[1].context['vCard line'])
+        self.assertEqual(1, vcard_validator.property_cache.hits)
+
+    def test_repeated_invalid_line_reported_without_exception(self):
+        text = MINIMAL_VCARD.replace(u'FN:', u'BDAY:foo\r\nFN:')
+        vcard_validator.parse_vcard(text, [])
+        diagnostics = []
+
+        with mock.patch.object(VCardError, '__init__', side_effect=AssertionError('exception created')):
+            vcard_validator.parse_vcard(text, diagnostics)
+
+        self.assertEqual(
+            [('INVALID_DATE', 3)], [(diagnostic.code, diagnostic.context['vCard line']) for diagnostic in diagnostics])
+        self.assertIs(VCardValueError, diagnostics[0].error_type)
+
+    def test_first_invalid_line_reported_without_exception(self):
+        text = MINIMAL_VCARD.replace(u'FN:', u'X-A:\x01\r\nTEL;TYPE=:1\r\nTEL;T_E=a:1\r\nGEO:1;2;3\r\nFN:')
+        diagnostics = []
+
+        with mock.patch.object(VCardError, '__init__', side_effect=AssertionError('exception created')):
+            vcard_validator.parse_vcard(text, diagnostics)
+
+        self.assertEqual(
+            [('INVALID_SUB_VALUE', 3), ('INVALID_VALUE', 4), ('INVALID_PARAMETER_NAME', 5), ('INVALID_VALUE_COUNT', 6)],
+            [(diagnostic.code, diagnostic.context['vCard line']) for diagnostic in diagnostics])
+        self.assertEqual(u'GEO:1;2;3\r\n', diagnostics[3].context['Property line'])
+
+    def test_vcard_line_context_from_each_vcard(self):
+        text = INVALID_VCARD.replace(u'N:Doe', u'BDAY:foo\r\nN:Doe')
+
+        for _ in range(2):
+            errors = list(vcard_validator.iter_vcards(io.StringIO(text)))
+
+            self.assertEqual(2, errors[0].context['vCard line'])
+
+    def test_repeated_line_replays_warnings(self):
+        line = u'TEL;TYPE=voice:+1 234\r\n'
+        diagnostics = []
+        for _ in range(2):
+            vcard_validator.get_vcard_property(line, diagnostics)
+
+        self.assertEqual(2, len(diagnostics))
+        self.assertIsNot(diagnostics[0], diagnostics[1])
+        self.assertEqual(diagnostics[0].message, diagnostics[1].message)
+        self.assertEqual(1, vcard_validator.property_cache.hits)
+
+    def test_large_inline_value_not_kept(self):
+        line = u'PHOTO;ENCODING=b;TYPE=JPEG:' + u'AAAA' * 75000 + u'\r\n'
+
+        vcard_validator.get_vcard_property(line)
+
+        self.assertEqual(0, len(vcard_validator.property_cache))
+
+    @mock.patch('vcard.vcard_validator.property_cache.max_size', 0)
+    def test_cache_can_be_disabled(self):
+        line = u'FN:John Doe\r\n'
+        vcard_validator.get_vcard_property(line)
+        vcard_validator.get_vcard_property(line)
+
+        self.assertEqual(0, vcard_validator.property_cache.hits)
+
+
+class TestValidateFile(TestCase):
+    def test_valid_file(self):
+        self.assertIsNone(vcard_validator.validate_file(os.path.join(TEST_DIRECTORY, 'maximal.vcf'), False))
+
+    def test_invalid_file(self):
+        result = vcard_validator.validate_file(os.path.join(TEST_DIRECTORY, 'missing_fn.vcf'), False)
+
+        self.assertIn('Mandatory property missing', result)
+        self.assertIn('missing_fn.vcf', result)
+
+    def test_verbose_shows_property_cache_hit_rate(self):
+        vcard_validator.property_cache.clear()
+        string_type = io.StringIO if six.PY3 else io.BytesIO
+        with mock.patch('sys.stdout', new_callable=string_type) as stdout:
+            with mock.patch('sys.stderr', new_callable=string_type) as stderr:
+                vcard_validator.validate_file(os.path.join(TEST_DIRECTORY, 'minimal.vcf'), True)
+
+        self.assertIn('Property line cache hit rate: 0.0% (0 of 5 lines)', stderr.getvalue())
+        self.assertNotIn('Property line cache', stdout.getvalue())
+
+    def test_file_diagnostics(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+        diagnostics = vcard_validator.get_file_diagnostics(path)
+
+        self.assertEqual([4, 15], [diagnostic.file_line for diagnostic in diagnostics])
+        expected = vcard_validator.validate_file(path, False, True)
+        self.assertEqual(expected, '\n\n'.join(str(diagnostic) for diagnostic in diagnostics))
+
+    def test_collector_gets_warnings(self):
+        path = os.path.join(TEST_DIRECTORY, 'rfc_2426_a.vcf')
+        collector = DiagnosticCollector()
+
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            vcard_validator.validate_file(path, False, collector=collector)
+
+        self.assertEqual([], caught_warnings)
+        self.assertTrue(collector.counts)
+        for examples in collector.examples.values():
+            self.assertEqual(path, examples[0].context['File'])
+
+    def test_stops_at_first_error_by_default(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+        result = vcard_validator.validate_file(path, False)
+
+        self.assertEqual(1, result.count('File line'))
+
+    def test_all_errors_reports_every_invalid_vcard(self):
+        path = os.path.join(TEST_DIRECTORY, 'all_errors.vcf')
+
+        result = vcard_validator.validate_file(path, False, all_errors=True)
+
+        self.assertIn('File line: 4\n', result)
+        self.assertIn('File line: 15\n', result)
+        self.assertEqual(2, result.count('File line'))
+
+
+class TestLazyVcard(TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def tearDown(self):
+        warnings.resetwarnings()
+
+    def test_get_same_as_validated_vcard(self):
+        text = (
+            u'item1.BEGIN:VCARD\r\nitem1.VERSION:3.0\r\nitem1.N:Doe;John;;Mr;\r\nitem1.FN:John Doe\r\n'
+            u'item1.EMAIL;TYPE=work:a@\r\n example.org\r\nitem1.email:b@example.org\r\nitem1.END:VCARD\r\n\r\n')
+        vcard = vcard_validator.VCard(text, lazy=True)
+
+        lazy_emails = [(property_.name, property_.parameters, property_.values) for property_ in vcard.get('Email')]
+
+        validated_emails = [
+            (property_.name, property_.parameters, property_.values)
+            for property_ in vcard_validator.VCard(text).get('EMAIL')]
+        self.assertEqual(validated_emails, lazy_emails)
+        self.assertEqual(2, len(lazy_emails))
+
+    @mock.patch('vcard.vcard_validator.get_vcard_property', wraps=vcard_validator.get_vcard_property)
+    def test_get_parses_only_named_properties_once(self, get_vcard_property_mock):
+        vcard = vcard_validator.VCard(MINIMAL_VCARD, lazy=True)
+
+        vcard.get('FN')
+        vcard.get('fn')
+
+        get_vcard_property_mock.assert_called_once_with(u'FN:John Doe\r\n')
+        self.assertEqual([], vcard.get('EMAIL'))
+
+    def test_get_raises_for_invalid_property(self):
+        vcard = vcard_validator.VCard(MINIMAL_VCARD.replace(u'FN:', u'BDAY:foo\r\nFN:'), lazy=True)
+
+        self.assertEqual(u'FN', vcard.get('FN')[0].name)
+        try:
+            vcard.get('BDAY')
+            self.fail('Invalid BDAY accepted')
+        except VCardValueError as error:
+            self.assertEqual(3, error.context['vCard line'])
+
+    def test_validate_checks_whole_vcard(self):
+        vcard = vcard_validator.VCard(INVALID_VCARD, lazy=True)
+
+        self.assertEqual(u'Doe', vcard.get('N')[0].values[0][0])
+        self.assertRaises(VCardError, vcard.validate)
+
+    def test_properties_validated_on_first_access(self):
+        vcard = vcard_validator.VCard(MINIMAL_VCARD, lazy=True)
+
+        self.assertEqual(['BEGIN', 'VERSION', 'N', 'FN', 'END'], [property_.name for property_ in vcard.properties])
+        self.assertIsNone(vcard.group)
+
+
+class TestPropertyViews(TestCase):
+    def test_views_over_encoded_buffer(self):
+        data = MINIMAL_VCARD.replace(u'FN:John Doe', u'FN:J\r\n  D\xf8').encode('utf-8')
+        memory_map = mmap.mmap(-1, len(data))
+        memory_map.write(data)
+
+        views = list(vcard_validator.iter_property_views(memory_map, data.index(b'\r\nN:') + 2, data.index(b'END')))
+
+        self.assertEqual(['N', 'FN'], [view.name for view in views])
+        self.assertEqual(u'J D\xf8', views[1].get_value())
+        self.assertEqual(u'FN:J\r\n  D\xf8\r\n', views[1].get_text())
+
+    def test_view_with_colon_in_quoted_parameter_value(self):
+        text = u'X-FOO;TYPE="a:b":value\r\n'
+        for buffer in (text, text.encode('utf-8')):
+            [view] = vcard_validator.iter_property_views(buffer)
+
+            self.assertEqual(u'value', view.get_value())
+
+    def test_view_without_value(self):
+        [view] = vcard_validator.iter_property_views(u'NOTE;X=1\r\n')
+
+        self.assertIsNone(view.get_value())
+
+    def test_views_with_names_have_no_index(self):
+        views = list(vcard_validator.iter_property_views(MINIMAL_VCARD, names=('FN', 'VERSION')))
+
+        self.assertEqual([('VERSION', None), ('FN', None)], [(view.name, view.index) for view in views])
+
+    @mock.patch('vcard.vcard_validator.get_vcard_property')
+    def test_get_views_does_not_parse(self, get_vcard_property_mock):
+        vcard = vcard_validator.VCard(MINIMAL_VCARD, lazy=True)
+
+        self.assertEqual([u'Doe;John;;Mr;'], [view.get_value() for view in vcard.get_views('n')])
+        self.assertFalse(get_vcard_property_mock.called)
+
+    def test_parse_rejects_line_folded_with_tab(self):
+        [view] = vcard_validator.iter_property_views(u'NOTE:a\r\n\tb\r\n')
+
+        self.assertEqual(u'ab', view.get_value())
+        self.assertRaises(VCardError, view.parse)
+
+
+class TestUnfoldVcardLines(TestCase):
+    def test_joins_continuation_lines(self):
+        lines = [u'NOTE:a\r\n', u' b\r\n', u' c\r\n', u'FN:d\r\n']
+
+        with warnings.catch_warnings(record=True):
+            self.assertEqual([u'NOTE:abc\r\n', u'FN:d\r\n'], vcard_validator.unfold_vcard_lines(lines))
+
+    def test_warns_once_per_problem(self):
+        lines = [u'NOTE:a\r\n', u' b\r\n', u' c\r\n']
+
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            vcard_validator.unfold_vcard_lines(lines)
+
+        self.assertEqual(['Short folded line at lines 0, 1'], [str(warning.message) for warning in caught_warnings])
+
+    def test_rejects_invalid_inline_binary_value(self):
+        lines = [u'PHOTO;ENCODING=b;TYPE=JPEG:AAAA\r\n', u' AA!A\r\n', u'FN:d\r\n']
+
+        self.assertRaises(VCardValueError, vcard_validator.unfold_vcard_lines, lines, [])
+
+    @mock.patch.multiple(payload_limits, max_size=5)
+    def test_stops_at_inline_binary_values_over_limit(self):
+        text = MINIMAL_VCARD.replace(u'FN:', u'PHOTO;ENCODING=b;TYPE=JPEG:AAAA\r\n AAAA\r\nFN:')
+        diagnostics = []
+
+        result = vcard_validator.parse_vcard(text, diagnostics)
+
+        self.assertEqual((None, []), result)
+        self.assertEqual(['PAYLOAD_TOO_LARGE'], [diagnostic.code for diagnostic in diagnostics])
+        self.assertEqual(3, diagnostics[0].context['vCard line'])
+
+
+class TestVcardGroups(TestCase):
+    GROUPED_LINES = [u'A.BEGIN:VCARD\r\n', u'A.VERSION:3.0\r\n', u'A.END:VCARD\r\n', u'\r\n']
+
+    def test_blank_line_after_vcard_has_no_group(self):
+        self.assertEqual(u'A', vcard_validator.get_vcard_group(list(self.GROUPED_LINES)))
+
+    def test_ungrouped_property_in_grouped_vcard(self):
+        lines = [u'A.BEGIN:VCARD\r\n', u'VERSION:3.0\r\n', u'A.END:VCARD\r\n', u'\r\n']
+
+        self.assertRaises(VCardLineError, vcard_validator.get_vcard_group, lines)
+
+    def test_removes_group_and_dot(self):
+        self.assertEqual(
+            [u'BEGIN:VCARD\r\n', u'VERSION:3.0\r\n', u'END:VCARD\r\n', u'\r\n'],
+            vcard_validator.remove_vcard_groups(list(self.GROUPED_LINES), u'A'))
+
+    def test_grouped_vcard_property_names(self):
+        vcard = vcard_validator.VCard(u''.join(
+            u'TEST.' + line if line != u'\r\n' else line for line in MINIMAL_VCARD.splitlines(True)))
+
+        self.assertEqual(u'TEST', vcard.group)
+        self.assertEqual(
+            [u'BEGIN', u'VERSION', u'N', u'FN', u'END'], [property_.name for property_ in vcard.properties])
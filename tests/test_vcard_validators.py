@@ -1,6 +1,16 @@
+import ast
+import inspect
 from unittest import TestCase
-from vcard.vcard_errors import VCardValueError
-from vcard.vcard_validators import validate_date
+
+import mock
+import six
+
+from vcard import vcard_errors, vcard_validator, vcard_validators
+from vcard.vcard_errors import VCardError, VCardItemCountError, VCardValueError, get_note_code
+from vcard.vcard_property import VcardProperty
+from vcard.vcard_validators import (
+    PropertyRule, register_property_rule, validate_date, validate_time, validate_time_zone, validate_uri,
+    validate_vcard_property)
 
 
 class TestVcardValidators(TestCase):
@@ -53,3 +63,135 @@ class TestVcardValidators(TestCase):
             validate_date(date_string)
         except VCardValueError as error:
             self.assertIn(date_string, str(error))
+
+    def test_validate_date_fails_with_month_zero(self):
+        self.assertRaises(VCardValueError, validate_date, '2000-00-10')
+
+    def test_validate_date_fails_with_day_after_end_of_month(self):
+        self.assertRaises(VCardValueError, validate_date, '2001-04-31')
+
+    def test_validate_date_fails_with_year_zero(self):
+        self.assertRaises(VCardValueError, validate_date, '0000-01-01')
+
+    def test_validate_date_fails_with_non_ascii_digits(self):
+        self.assertRaises(VCardValueError, validate_date, u'\u0662\u0660\u0660\u0660-01-01')
+
+    @mock.patch('isodate.parse_date')
+    def test_validate_date_does_not_use_isodate_for_common_forms(self, parse_date_mock):
+        validate_date('2000-02-29')
+        validate_date('20000229')
+
+        self.assertFalse(parse_date_mock.called)
+
+    def test_validate_time_succeeds_with_fraction(self):
+        validate_time('23:59:59,999')
+
+    def test_validate_time_fails_with_mixed_separators(self):
+        self.assertRaises(VCardValueError, validate_time, '00:0000')
+
+    def test_validate_time_zone_fails_with_minutes_out_of_range(self):
+        self.assertRaises(VCardValueError, validate_time_zone, '+01:60')
+
+    def test_validate_uri_succeeds_with_leading_space(self):
+        validate_uri(' http://example.org/')
+
+    def test_validate_uri_succeeds_with_parameters_after_opaque_path(self):
+        validate_uri('mailto:;x')
+
+    def test_validate_uri_fails_with_only_parameters(self):
+        self.assertRaises(VCardValueError, validate_uri, 'http:;x')
+
+    def test_validate_uri_fails_with_only_newline_after_scheme(self):
+        self.assertRaises(VCardValueError, validate_uri, 'http:\n')
+
+    @mock.patch('six.moves.urllib.parse.urlparse')
+    def test_validate_uri_does_not_use_urlparse_for_common_forms(self, urlparse_mock):
+        if six.PY2:
+            self.skipTest('Python 2 always uses urlparse')
+        validate_uri('http://example.org/photo.jpg')
+        validate_uri('data:image/jpeg;base64,AAAA')
+
+        self.assertFalse(urlparse_mock.called)
+
+
+class TestValidateVcardProperty(TestCase):
+    def _get_property(self, name, values):
+        property_ = VcardProperty(name)
+        property_.values = values
+        return property_
+
+    def test_unknown_property_passes(self):
+        validate_vcard_property(self._get_property('X-UNKNOWN', [['any'], ['values']]))
+
+    def test_rule_checks_value_count(self):
+        try:
+            validate_vcard_property(self._get_property('TEL', [['+1'], ['+2']]))
+            self.fail('Invalid TEL value count accepted')
+        except VCardItemCountError as error:
+            self.assertIn('Invalid value count', error.message)
+            self.assertEqual('TEL', error.context['Property'])
+
+    def test_invalid_parameter_values_listed_in_message(self):
+        property_ = self._get_property('SOURCE', [['http://example.org/']])
+        property_.parameters = {'VALUE': frozenset(['urtp', 'text'])}
+
+        try:
+            validate_vcard_property(property_)
+            self.fail('Invalid SOURCE parameter value accepted')
+        except VCardValueError as error:
+            self.assertIn(': text,urtp', error.message)
+
+    def test_unexpected_parameters_listed_in_message(self):
+        property_ = self._get_property('BEGIN', [['VCARD']])
+        property_.parameters = {'TYPE': frozenset(['work', 'home'])}
+
+        try:
+            validate_vcard_property(property_)
+            self.fail('BEGIN parameters accepted')
+        except VCardItemCountError as error:
+            self.assertIn(': TYPE=home,work', error.message)
+
+    @mock.patch.dict('vcard.vcard_validators.PROPERTY_RULES')
+    def test_registered_rule_is_used_case_insensitively(self):
+        register_property_rule('x-rating', PropertyRule(value_count=1, sub_value_count=1))
+
+        validate_vcard_property(self._get_property('X-Rating', [['5']]))
+        self.assertRaises(VCardItemCountError, validate_vcard_property, self._get_property('X-RATING', [['5', '6']]))
+
+    @mock.patch.dict('vcard.vcard_validators.PROPERTY_RULES')
+    def test_registered_rule_replaces_cached_results(self):
+        property_line = u'X-RATING:5;6\r\n'
+        vcard_validator.property_cache.clear()
+        vcard_validator.get_vcard_property(property_line)
+
+        register_property_rule('x-rating', PropertyRule(value_count=1, sub_value_count=1))
+
+        self.assertRaises(VCardItemCountError, vcard_validator.get_vcard_property, property_line)
+
+
+class TestValidatorMessages(TestCase):
+    def test_every_error_message_has_a_code(self):
+        # Messages are an error literal, optionally followed by ': ' and details, so diagnostics get a code
+        tree = ast.parse(inspect.getsource(vcard_validators))
+
+        error_names = set(
+            name for name in dir(vcard_errors)
+            if name == 'Diagnostic' or
+            isinstance(getattr(vcard_errors, name), type) and issubclass(getattr(vcard_errors, name), VCardError))
+        calls = [
+            node for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in error_names and
+            not any(isinstance(arg, ast.Name) and arg.id == 'WARNING' for arg in node.args)]
+        self.assertGreater(len(calls), 0)
+        for node in calls:
+            message = node.args[0]
+            if isinstance(message, ast.Call):
+                # '{0}: ...'.format(NOTE_..., ...)
+                self.assertTrue(_get_string(message.func.value).startswith('{0}: '), ast.dump(node))
+                message = message.args[0]
+            self.assertIsNotNone(
+                get_note_code(getattr(vcard_errors, message.id) + ': detail'), 'line {0}'.format(node.lineno))
+
+
+def _get_string(node):
+    return node.value if hasattr(ast, 'Constant') and isinstance(node, ast.Constant) else node.s
@@ -3,40 +3,195 @@ import argparse
 
 import sys
 
+from . vcard_report import REPORT_FORMATS, JsonLinesWriter, report_file
 from . vcard_validator import VcardValidator
-from .vcard_errors import UsageError
+from .vcard_errors import DiagnosticCollector, UsageError
+from .vcard_payload import DEFAULT_MAX_SIZE, payload_limits
 
 PATH_ARGUMENT_HELP = "The files to validate. Use '-' for standard input"
 VERBOSE_OPTION_HELP = 'Enable verbose output'
+ALL_ERRORS_OPTION_HELP = 'Report every invalid vCard instead of stopping at the first one in each file'
+JOBS_OPTION_HELP = 'Number of files, or pieces of large files, to validate in parallel'
+CACHE_OPTION_HELP = 'Cache validation results in this file, and skip vCards which are unchanged since an earlier run'
+FORMAT_OPTION_HELP = 'Output format: text, or jsonl for one JSON record per error or warning'
+MAX_PAYLOAD_SIZE_OPTION_HELP = \
+    'Maximum number of decoded bytes of inline binary values, like PHOTO;ENCODING=b, per vCard (default: %(default)d)'
+STRUCTURE_ONLY_OPTION_HELP = 'Only check the length and padding of inline binary values, not their characters'
+
+SERVE_COMMAND = 'serve'
+DEFAULT_SERVE_HOST = '127.0.0.1'
+"""Only local clients can connect by default, since the service has no authentication"""
+DEFAULT_SERVE_PORT = 8426
+HOST_OPTION_HELP = 'Address to listen on'
+PORT_OPTION_HELP = 'TCP port to listen on'
+SOCKET_OPTION_HELP = 'Listen on this UNIX socket instead of a TCP port'
+SERVE_JOBS_OPTION_HELP = 'Number of worker processes (default: number of CPUs)'
+PATH_ROOT_OPTION_HELP = 'Let clients validate files in this directory with POST /validate?path=PATH'
 
 
 def main():
+    if sys.argv[1:2] == [SERVE_COMMAND]:
+        return _serve(sys.argv[2:])
+
     try:
         arguments = parse_arguments(sys.argv[1:])
     except UsageError as error:
         sys.stderr.write('{0}\n'.format(str(error)))
         return 2
 
+    payload_limits.max_size = arguments.max_payload_size
+    payload_limits.structure_only = arguments.structure_only
+
+    if arguments.format == 'jsonl':
+        return _report(arguments)
+
+    collector = DiagnosticCollector()
+    if arguments.jobs > 1:
+        results = _validate_parallel(arguments, collector)
+    else:
+        results = _validate_serial(arguments, collector)
+
     return_code = 0
-    for filename in arguments.paths:
-        result = VcardValidator(filename, arguments.verbose).result
+    for result in results:
         if result is not None:
             print(result)
             return_code = 1
 
+    summary = collector.get_summary()
+    if summary:
+        sys.stderr.write('Warnings:\n{0}\n'.format(summary))
+
+    return return_code
+
+
+def _validate_serial(arguments, collector):
+    cache = _open_cache(arguments)
+    try:
+        for filename in arguments.paths:
+            yield VcardValidator(filename, arguments.verbose, arguments.all_errors, cache, collector).result
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _validate_parallel(arguments, collector):
+    from .vcard_parallel import validate_files
+
+    for output, result in validate_files(
+            arguments.paths, arguments.verbose, arguments.all_errors, arguments.jobs, arguments.cache, collector):
+        sys.stdout.write(output)
+        yield result
+
+
+def _report(arguments):
+    with JsonLinesWriter() as writer:
+        if arguments.jobs > 1:
+            results = _report_parallel(arguments, writer)
+        else:
+            results = _report_serial(arguments, writer)
+
+        return_code = 0
+        for failed in results:
+            if failed:
+                return_code = 1
+
     return return_code
 
 
+def _report_serial(arguments, writer):
+    cache = _open_cache(arguments)
+    try:
+        for filename in arguments.paths:
+            yield report_file(filename, writer.write, arguments.all_errors, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _report_parallel(arguments, writer):
+    from .vcard_parallel import report_files
+
+    for records, failed in report_files(arguments.paths, arguments.all_errors, arguments.jobs, arguments.cache):
+        writer.write_text(records)
+        yield failed
+
+
+def _open_cache(arguments):
+    """
+    @return: ValidationCache for the --cache option, or None
+    """
+    if arguments.cache is None:
+        return None
+    # Imported here, like the parallel and server modules, to keep startup fast for small serial runs
+    from .vcard_cache import ValidationCache
+    return ValidationCache(arguments.cache)
+
+
+def _serve(arguments):
+    try:
+        arguments = parse_serve_arguments(arguments)
+    except UsageError as error:
+        sys.stderr.write('{0}\n'.format(str(error)))
+        return 2
+
+    from . import vcard_server
+
+    if arguments.socket is not None:
+        server = vcard_server.UnixValidationServer(arguments.socket, arguments.jobs, arguments.path_root)
+        address = arguments.socket
+    else:
+        server = vcard_server.ValidationServer((arguments.host, arguments.port), arguments.jobs, arguments.path_root)
+        address = 'http://{0}:{1:d}{2}'.format(arguments.host, server.server_address[1], vcard_server.VALIDATE_PATH)
+    sys.stderr.write('Listening on {0}\n'.format(address))
+    vcard_server.serve(server)
+    return 0
+
+
+def parse_serve_arguments(arguments):
+    argument_parser = argparse.ArgumentParser(prog='vcard serve')
+    argument_parser.add_argument('--host', default=DEFAULT_SERVE_HOST, help=HOST_OPTION_HELP)
+    argument_parser.add_argument('--port', default=DEFAULT_SERVE_PORT, type=int, help=PORT_OPTION_HELP)
+    argument_parser.add_argument('--socket', metavar='PATH', help=SOCKET_OPTION_HELP)
+    argument_parser.add_argument('--jobs', type=_positive_integer, metavar='N', help=SERVE_JOBS_OPTION_HELP)
+    argument_parser.add_argument('--path-root', metavar='DIRECTORY', help=PATH_ROOT_OPTION_HELP)
+    try:
+        parsed_arguments = argument_parser.parse_args(args=arguments)
+    except argparse.ArgumentError as error:
+        raise UsageError(str(error))
+    return parsed_arguments
+
+
 def parse_arguments(arguments):
     argument_parser = argparse.ArgumentParser()
-    argument_parser.add_argument('--verbose', default=False, action='store_true', help=VERBOSE_OPTION_HELP)
+    argument_parser.add_argument('-v', '--verbose', default=False, action='store_true', help=VERBOSE_OPTION_HELP)
+    argument_parser.add_argument('--all-errors', default=False, action='store_true', help=ALL_ERRORS_OPTION_HELP)
+    argument_parser.add_argument('--jobs', default=1, type=_positive_integer, metavar='N', help=JOBS_OPTION_HELP)
+    argument_parser.add_argument('--cache', metavar='PATH', help=CACHE_OPTION_HELP)
+    argument_parser.add_argument('--format', default='text', choices=REPORT_FORMATS, help=FORMAT_OPTION_HELP)
+    argument_parser.add_argument(
+        '--max-payload-size', default=DEFAULT_MAX_SIZE, type=_positive_integer, metavar='BYTES',
+        help=MAX_PAYLOAD_SIZE_OPTION_HELP)
+    argument_parser.add_argument(
+        '--structure-only', default=False, action='store_true', help=STRUCTURE_ONLY_OPTION_HELP)
     argument_parser.add_argument('paths', metavar='path', nargs='+', help=PATH_ARGUMENT_HELP)
     try:
         parsed_arguments = argument_parser.parse_args(args=arguments)
     except argparse.ArgumentError as error:
         raise UsageError(str(error))
+    if parsed_arguments.verbose and parsed_arguments.format != 'text':
+        raise UsageError('--verbose is only supported with the text format')
     return parsed_arguments
 
 
+def _positive_integer(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError('invalid positive integer: {0!r}'.format(text))
+    return value
+
+
 if __name__ == '__main__':
     sys.exit(main())
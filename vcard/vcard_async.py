@@ -0,0 +1,126 @@
+"""
+Validate vCards from an asyncio stream without blocking the event loop.
+Requires Python 3.5 or newer.
+"""
+
+import asyncio
+import codecs
+
+from .vcard_definitions import NEWLINE_CHARACTERS
+from .vcard_errors import ERROR
+from .vcard_validator import ENCODING, READ_CHUNK_SIZE, get_remaining_lines_diagnostic, get_vcard_diagnostics
+
+EXECUTOR_BATCH_SIZE = 65536
+"""Approximate number of characters of vCards sent to the executor at a time"""
+
+
+async def validate_stream(reader, filename=None, all_errors=False, executor=None, chunk_size=READ_CHUNK_SIZE):
+    """
+    Validate each vCard in a stream as it arrives, giving other tasks a
+    chance to run between vCards.
+
+    @param reader: asyncio.StreamReader or other object with a coroutine
+    read(size) method returning encoded bytes
+    @param filename: Name to report in diagnostic context
+    @param all_errors: Report every diagnostic of every vCard instead of
+    stopping at the first error
+    @param executor: concurrent.futures executor to validate batches of
+    vCards in, or None to validate them in the event loop thread. Its
+    max_workers bounds the CPU work of all streams sharing it.
+    @param chunk_size: Maximum number of bytes to read at a time
+    @return: List of Diagnostic objects, like get_file_diagnostics
+    """
+    validator = _StreamValidator(filename, all_errors, executor)
+    decoder = codecs.getincrementaldecoder(ENCODING)()
+    pending = ''
+    while True:
+        data = await reader.read(chunk_size)
+        lines = (pending + decoder.decode(data, final=not data)).splitlines(True)
+        pending = ''
+        if data and lines:
+            # The last line may be incomplete, or a CR whose LF is in the next chunk
+            pending = lines.pop()
+        await validator.add_lines(lines)
+        if validator.failed:
+            return validator.diagnostics
+        if not data:
+            break
+
+    await validator.flush()
+    if validator.lines and not validator.failed:
+        validator.diagnostics.append(get_remaining_lines_diagnostic(filename, ''.join(validator.lines)))
+    return validator.diagnostics
+
+
+class _StreamValidator(object):
+    """
+    Splits lines into vCards and validates them, directly or in batches in
+    an executor.
+    """
+
+    def __init__(self, filename, all_errors, executor):
+        self.filename = filename
+        self.all_errors = all_errors
+        self.executor = executor
+        self.diagnostics = []
+        self.failed = False
+        self.lines = []
+        self._index = 0
+        self._offset = 0
+        self._batch = []
+        self._batch_length = 0
+
+    async def add_lines(self, lines):
+        for line in lines:
+            self.lines.append(line)
+            if line == NEWLINE_CHARACTERS:
+                text = ''.join(self.lines)
+                self._batch.append((text, self._index, self._offset))
+                self._batch_length += len(text)
+                self._offset += len(text.encode(ENCODING))
+                self.lines = []
+                if self.executor is None or self._batch_length >= EXECUTOR_BATCH_SIZE:
+                    await self.flush()
+                    if self.failed:
+                        return
+            self._index += 1
+
+    async def flush(self):
+        """
+        Validate the batched vCards.
+        """
+        batch = self._batch
+        self._batch = []
+        self._batch_length = 0
+        if not batch:
+            return
+
+        texts = [text for text, _, _ in batch]
+        first_only = not self.all_errors
+        if self.executor is None:
+            results = _get_batch_diagnostics(texts, first_only)
+            # Let other tasks run between vCards
+            await asyncio.sleep(0)
+        else:
+            results = await asyncio.get_event_loop().run_in_executor(
+                self.executor, _get_batch_diagnostics, texts, first_only)
+
+        for (_, line, offset), diagnostics in zip(batch, results):
+            for diagnostic in diagnostics:
+                diagnostic.context['File'] = self.filename
+                diagnostic.context['File line'] = line
+                diagnostic.context['File offset'] = offset
+                self.diagnostics.append(diagnostic)
+                if diagnostic.severity == ERROR:
+                    self.failed = not self.all_errors
+            if self.failed:
+                return
+
+
+def _get_batch_diagnostics(texts, first_only):
+    """
+    @param texts: vCard strings
+    @param first_only: Stop validating each vCard at its first error
+    @return: List of lists of Diagnostic objects, one per vCard
+    """
+    return [get_vcard_diagnostics(text, first_only) for text in texts]
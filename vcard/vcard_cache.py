@@ -0,0 +1,155 @@
+"""On-disk cache of vCard validation results, keyed on vCard text hashes"""
+
+import hashlib
+import json
+import sqlite3
+
+from . import __version__, vcard_errors
+from .vcard_payload import payload_limits
+
+CACHE_FORMAT_VERSION = 5
+"""Increment when the cache schema or stored error format changes"""
+
+CACHE_VERSION = '{0}/{1}'.format(__version__, CACHE_FORMAT_VERSION)
+"""Results cached with any other package or cache format version are discarded"""
+
+DEFAULT_MAX_ENTRIES = 1000000
+"""Maximum number of cached results kept by default"""
+
+UNCACHED_CONTEXT_KEYS = ('File', 'File line', 'File offset')
+"""Diagnostic context which depends on where the vCard is, rather than its text"""
+
+FLUSH_SIZE = 10000
+"""Number of new results and usage updates kept in memory before writing them"""
+
+ENCODING = 'utf-8'
+
+
+class ValidationCache(object):
+    """
+    SQLite cache mapping a hash of each vCard text to its diagnostics.
+    When more than max_entries results are stored, the ones least recently
+    used are evicted on close.
+
+    Lookups read the database directly, while new results and usage updates
+    are written in batches of FLUSH_SIZE, each in a short transaction, so
+    several processes can share a cache file.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        @param path: Path to SQLite database, created if missing
+        @param max_entries: Maximum number of results to keep
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._used = set()
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(hash TEXT PRIMARY KEY, error TEXT NOT NULL, used INTEGER NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+            if self._get_meta('version') != CACHE_VERSION:
+                self._connection.execute('DELETE FROM results')
+                self._set_meta('version', CACHE_VERSION)
+            self._generation = int(self._get_meta('generation') or 0) + 1
+            self._set_meta('generation', str(self._generation))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def get(self, text):
+        """
+        @param text: vCard text
+        @return: New list of Diagnostic objects like the ones the vCard was
+        stored with, without File, File line and File offset context
+        @raise KeyError: If the vCard isn't cached
+        """
+        key = _get_key(text)
+        try:
+            result = self._results[key]
+        except KeyError:
+            row = self._connection.execute('SELECT error FROM results WHERE hash = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                raise KeyError(key)
+            result = row[0]
+            self._used.add(key)
+            if len(self._used) >= FLUSH_SIZE:
+                self._flush()
+        self.hits += 1
+
+        return [
+            vcard_errors.Diagnostic(message, context, severity, getattr(vcard_errors, error_type), code)
+            for error_type, code, severity, message, context in json.loads(result)]
+
+    def set(self, text, diagnostics=()):
+        """
+        @param text: vCard text
+        @param diagnostics: Diagnostic objects for the vCard, if any
+        """
+        result = json.dumps(
+            [
+                [
+                    diagnostic.error_type.__name__,
+                    diagnostic.code,
+                    diagnostic.severity,
+                    diagnostic.message,
+                    dict(
+                        (key, value) for key, value in diagnostic.context.items()
+                        if key not in UNCACHED_CONTEXT_KEYS),
+                ]
+                for diagnostic in diagnostics],
+            default=str,
+            sort_keys=True)
+        self._results[_get_key(text)] = result
+        if len(self._results) >= FLUSH_SIZE:
+            self._flush()
+
+    def close(self):
+        """
+        Store new results, evict the least recently used ones and close the
+        database.
+        """
+        self._flush()
+        with self._connection:
+            count = self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if count > self.max_entries:
+                self._connection.execute(
+                    'DELETE FROM results WHERE hash IN (SELECT hash FROM results ORDER BY used LIMIT ?)',
+                    (count - self.max_entries,))
+        self._connection.close()
+
+    def _flush(self):
+        with self._connection:
+            self._connection.executemany(
+                'UPDATE results SET used = ? WHERE hash = ?', ((self._generation, key) for key in self._used))
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO results (hash, error, used) VALUES (?, ?, ?)',
+                ((key, error, self._generation) for key, error in self._results.items()))
+        self._results = {}
+        self._used = set()
+
+    def _get_meta(self, key):
+        row = self._connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            return row[0]
+
+    def _set_meta(self, key, value):
+        self._connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+
+def _get_key(text):
+    # Payload settings change the results, so runs with different settings can share a cache file
+    key = hashlib.sha1(payload_limits.get_key().encode(ENCODING))
+    key.update(text.encode(ENCODING))
+    return key.hexdigest()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """vCard v3.0 (RFC 2426) definitions and message strings"""
+import re
+
 import six
 
+from .vcard_utils import LazyRegex
+
 
 def character_range(start, end):
     return "".join(six.unichr(index) for index in range(start, end + 1))
@@ -46,3 +50,20 @@ VCARD_LINE_MAX_LENGTH = 75
 
 VCARD_LINE_MAX_LENGTH_RAW = VCARD_LINE_MAX_LENGTH + len(NEWLINE_CHARACTERS)
 """Including line ending"""
+
+# Matchers for the character classes above, compiled on first use
+VALID_GROUP = LazyRegex(r'^([{0}]*)\.'.format(re.escape(ID_CHARACTERS)))
+"""Group prefix, including the dot separator (RFC 2426 page 29)"""
+
+VALID_ID = LazyRegex('^[{0}]+$'.format(re.escape(ID_CHARACTERS)))
+"""Group, name, iana-token, x-name and param-name (RFC 2426 page 29)"""
+
+VALID_X_PROPERTY_NAME = LazyRegex('^X-[{0}]+$'.format(re.escape(ID_CHARACTERS)), re.IGNORECASE)
+"""Case insensitive x-name, for property names (RFC 2426 page 29)"""
+
+VALID_VALUE = LazyRegex(u'^[{0}]*$'.format(re.escape(VALUE_CHARACTERS)))
+"""Single value or sub-value (RFC 2426 page 29)"""
+
+VALID_PARAM_VALUE = LazyRegex(
+    u'^[{0}]+$|^"[{1}]+"$'.format(re.escape(SAFE_CHARACTERS), re.escape(QUOTE_SAFE_CHARACTERS)))
+"""Non-empty param-value (RFC 2426 page 28)"""
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import collections
 import sys
 
 # Error literals
@@ -39,12 +40,33 @@ NOTE_INVALID_TIME = 'Invalid time (See RFC 2425 section 5.8.4 for time syntax)'
 NOTE_INVALID_TIME_ZONE = 'Invalid time zone (See RFC 2426 section 3.4.1 for time-zone syntax)'
 NOTE_INVALID_URI = 'Invalid URI (See RFC 1738 section 5 for genericurl syntax)'
 NOTE_INVALID_VALUE = 'Invalid value (See RFC 2426 section 3 for details)'
+NOTE_INVALID_BASE64 = 'Invalid base64 value (See RFC 2047 section 4.1 for the "b" encoding)'
+NOTE_PAYLOAD_TOO_LARGE = 'Inline binary value too large'
 
 # Warning literals
 WARN_DEFAULT_TYPE_VALUE = 'Using default TYPE value; can be removed'
 WARN_INVALID_DATE = 'Possible invalid date'
 WARN_INVALID_EMAIL_TYPE = 'Possible invalid email TYPE'
 WARN_MULTIPLE_NAMES = 'Possible split name (replace space with comma)'
+WARN_LONG_LINE = 'Long line in vCard'
+WARN_SHORT_FOLDED_LINE = 'Short folded line'
+WARN_EMPTY_FOLDED_LINE = 'Empty folded line'
+
+NOTE_CODES = dict(
+    (value, name[len('NOTE_'):])
+    for name, value in list(globals().items())
+    if name.startswith('NOTE_') or name.startswith('WARN_'))
+"""
+Diagnostic code for each error and warning literal, like INVALID_DATE for
+NOTE_INVALID_DATE and MULTIPLE_NAMES for WARN_MULTIPLE_NAMES
+"""
+
+MAX_DIAGNOSTIC_EXAMPLES = 3
+"""Default number of diagnostics kept per code by a DiagnosticCollector"""
+
+# Diagnostic severities
+ERROR = 'error'
+WARNING = 'warning'
 
 
 def _stringify(text):
@@ -98,7 +120,7 @@ class VCardError(Exception):
         keys = ['File', 'File line', 'vCard line', 'Property', 'Property line', 'String']
         for key in keys:
             if key in self.context:
-                message += '\n{0}: {1}'.format(_stringify(key), _stringify(self.context.pop(key)))
+                message += '\n{0}: {1}'.format(_stringify(key), _stringify(self.context[key]))
 
         return message
 
@@ -131,3 +153,147 @@ class UsageError(Exception):
 
     def __str__(self):
         return self._message
+
+
+def get_note_code(message):
+    """
+    Get the diagnostic code of an error message.
+
+    @param message: Error literal, optionally followed by a colon and details
+    @return: Code from NOTE_CODES, or None if the message doesn't start with
+    an error literal
+
+    Examples:
+    >>> get_note_code(NOTE_INVALID_DATE + ': 2000-13-01')
+    'INVALID_DATE'
+    >>> get_note_code(NOTE_EMPTY_VCARD)
+    'EMPTY_VCARD'
+    >>> get_note_code('Something else') is None
+    True
+    """
+    return NOTE_CODES.get(message.split(': ', 1)[0])
+
+
+class Diagnostic(object):
+    """
+    Validation problem, reported without raising an exception. The context
+    dictionary has the same keys as VCardError context.
+    """
+    __slots__ = ('code', 'severity', 'message', 'context', 'error_type')
+
+    def __init__(self, message, context, severity=ERROR, error_type=VCardError, code=None):
+        """
+        @param message: Error message
+        @param context: Dictionary with context information
+        @param severity: ERROR or WARNING
+        @param error_type: VCardError subclass to raise for this diagnostic
+        @param code: Short identifier, by default from the message
+        """
+        self.code = code or get_note_code(message)
+        self.severity = severity
+        self.message = message
+        self.context = context
+        self.error_type = error_type
+
+    def __getstate__(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_error(cls, error):
+        """
+        @param error: VCardError
+        @return: Diagnostic with the error message, context and type
+        """
+        return cls(error.message, error.context, ERROR, type(error))
+
+    @property
+    def file_line(self):
+        return self.context.get('File line')
+
+    @property
+    def file_offset(self):
+        return self.context.get('File offset')
+
+    @property
+    def property_name(self):
+        return self.context.get('Property')
+
+    def to_error(self):
+        """
+        @return: VCardError for raising this diagnostic
+        """
+        return self.error_type(self.message, dict(self.context))
+
+    def __str__(self):
+        return str(self.to_error())
+
+
+def get_first_error(diagnostics):
+    """
+    @param diagnostics: Diagnostic objects
+    @return: First diagnostic with ERROR severity, or None
+    """
+    for diagnostic in diagnostics:
+        if diagnostic.severity == ERROR:
+            return diagnostic
+
+
+class DiagnosticCollector(object):
+    """
+    Counts diagnostics by code, keeping the first few of each as examples.
+    """
+
+    def __init__(self, max_examples=MAX_DIAGNOSTIC_EXAMPLES):
+        """
+        @param max_examples: Number of diagnostics to keep per code
+        """
+        self.max_examples = max_examples
+        self.counts = collections.defaultdict(int)
+        self.examples = collections.defaultdict(list)
+
+    def add(self, diagnostic):
+        """
+        @param diagnostic: Diagnostic
+        """
+        self.counts[diagnostic.code] += 1
+        examples = self.examples[diagnostic.code]
+        if len(examples) < self.max_examples:
+            examples.append(diagnostic)
+
+    def update(self, collector):
+        """
+        Add the counts and examples from another collector, for example one
+        from a worker process.
+
+        @param collector: DiagnosticCollector
+        """
+        for code, count in collector.counts.items():
+            self.counts[code] += count
+            examples = self.examples[code]
+            examples.extend(collector.examples[code][:self.max_examples - len(examples)])
+
+    def get_summary(self):
+        """
+        @return: Printable count and examples for each code, most frequent
+        first, or an empty string if nothing has been collected
+
+        Examples:
+        >>> collector = DiagnosticCollector()
+        >>> for line in (4, 9):
+        ...     collector.add(Diagnostic(WARN_LONG_LINE, {'File': 'a.vcf', 'File line': line}, WARNING))
+        >>> print(collector.get_summary())
+        LONG_LINE: 2
+            a.vcf line 4: Long line in vCard
+            a.vcf line 9: Long line in vCard
+        """
+        lines = []
+        for code, count in sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0]))):
+            lines.append('{0}: {1:d}'.format(code, count))
+            for example in self.examples[code]:
+                lines.append('    {0} line {1}: {2}'.format(
+                    _stringify(example.context.get('File')), example.file_line, _stringify(example.message)))
+        return '\n'.join(lines)
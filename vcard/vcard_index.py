@@ -0,0 +1,246 @@
+"""Sidecar index of the vCards in a file, for repeated access to large files"""
+
+import collections
+import hashlib
+import json
+import mmap
+import os
+
+from .vcard_errors import VCardError
+from .vcard_scanner import ENCODING, iter_vcard_spans
+from .vcard_validator import VCard, iter_property_views
+
+INDEX_SUFFIX = '.vcfidx'
+
+INDEX_FORMAT_VERSION = 2
+"""Increment when the index file format changes, to rebuild old indexes"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+"""Number of bytes of the vCard file hashed at a time"""
+
+INDEXED_PROPERTIES = ('UID', 'FN', 'EMAIL')
+"""Properties whose first value is stored in the index"""
+
+VcardIndexEntry = collections.namedtuple(
+    'VcardIndexEntry', ('offset', 'length', 'hash', 'line', 'uid', 'fn', 'email'))
+"""
+Indexed vCard. line is the file line of the end of the vCard, like the File
+line error context, and uid, fn and email are the raw first values of those
+properties, or None.
+"""
+
+
+class VcardIndex(object):
+    """
+    Offsets, hashes and key fields of each vCard in a file, stored in a
+    sidecar file. The sidecar is reused while the size and modification time
+    of the vCard file are unchanged, extended if the vCard file has only been
+    appended to, and rebuilt otherwise. Appends are detected with a hash of
+    all the previously indexed bytes.
+    """
+
+    def __init__(self, filename, index_filename=None):
+        """
+        @param filename: Path to vCard file
+        @param index_filename: Path to index file, by default filename with
+        INDEX_SUFFIX appended
+        """
+        self.filename = filename
+        self.index_filename = index_filename or filename + INDEX_SUFFIX
+        self.entries = []
+        self._uids = None
+        self.update()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def update(self):
+        """
+        Bring the index up to date with the vCard file, and save it if it
+        changed.
+
+        @return: True if the index changed
+        """
+        stat = os.stat(self.filename)
+        header = self._load()
+        if header is not None and header['size'] == stat.st_size and header['mtime'] == stat.st_mtime:
+            return False
+
+        with open(self.filename, 'rb') as file_pointer:
+            if stat.st_size == 0:
+                mapping = b''
+            else:
+                mapping = mmap.mmap(file_pointer.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                digest = _get_prefix_digest(mapping, header)
+                if digest is None:
+                    self.entries = []
+                    digest = hashlib.sha1()
+                    indexed_size = 0
+                else:
+                    indexed_size = header['size']
+                _update_digest(digest, mapping, indexed_size, stat.st_size)
+                offset = 0
+                line = 0
+                if self.entries:
+                    offset = self.entries[-1].offset + self.entries[-1].length
+                    line = self.entries[-1].line + 1
+                self.entries.extend(_index_vcards(mapping, offset, line))
+            finally:
+                if not isinstance(mapping, bytes):
+                    mapping.close()
+
+        self._uids = None
+        self._save({
+            'version': INDEX_FORMAT_VERSION,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'prefix_hash': digest.hexdigest(),
+        })
+        return True
+
+    def find_uid(self, uid):
+        """
+        @param uid: UID property value
+        @return: Index of the first vCard with the UID, or None
+        """
+        if self._uids is None:
+            self._uids = {}
+            for index, entry in enumerate(self.entries):
+                if entry.uid is not None:
+                    self._uids.setdefault(entry.uid, index)
+        return self._uids.get(uid)
+
+    def get_text(self, index):
+        """
+        @param index: vCard index
+        @return: Decoded vCard text
+        """
+        entry = self.entries[index]
+        with open(self.filename, 'rb') as file_pointer:
+            file_pointer.seek(entry.offset)
+            return file_pointer.read(entry.length).decode(ENCODING)
+
+    def get_vcard(self, index, lazy=False):
+        """
+        @param index: vCard index
+        @param lazy: Validate each property on first access, see VCard
+        @return: VCard object
+        @raise VCardError: If the vCard fails to validate, with the same
+        context as iter_vcards
+        """
+        try:
+            return VCard(self.get_text(index), self.filename, lazy=lazy)
+        except VCardError as error:
+            error.context['File'] = self.filename
+            error.context['File line'] = self.entries[index].line
+            raise
+
+    def validate(self, index):
+        """
+        Validate a single vCard.
+
+        @param index: vCard index
+        @return: None or error message, like validate_file
+        """
+        try:
+            self.get_vcard(index)
+        except VCardError as error:
+            return str(error)
+
+    def _load(self):
+        """
+        Read the index file into self.entries.
+
+        @return: Index header, or None if the index file is missing or in
+        another format
+        """
+        try:
+            with open(self.index_filename, 'r') as file_pointer:
+                header = json.loads(file_pointer.readline())
+                if header.get('version') != INDEX_FORMAT_VERSION:
+                    return None
+                self.entries = [VcardIndexEntry(*json.loads(line)) for line in file_pointer]
+        except (IOError, OSError, ValueError, TypeError):
+            self.entries = []
+            return None
+        return header
+
+    def _save(self, header):
+        temporary_filename = self.index_filename + '.tmp'
+        with open(temporary_filename, 'w') as file_pointer:
+            file_pointer.write(json.dumps(header, sort_keys=True) + '\n')
+            for entry in self.entries:
+                file_pointer.write(json.dumps(list(entry)) + '\n')
+        _replace(temporary_filename, self.index_filename)
+
+
+if hasattr(os, 'replace'):
+    _replace = os.replace
+else:
+    def _replace(source, destination):
+        # Python 2: rename replaces atomically on POSIX, but not on Windows
+        if os.name == 'nt' and os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+
+def _get_prefix_digest(mapping, header):
+    """
+    Check that the indexed part of the file is unchanged, so only data after
+    it needs indexing.
+
+    @param mapping: Bytes or memory map of the encoded vCard file
+    @param header: Index header, or None
+    @return: SHA-1 object of the first header['size'] bytes, or None if
+    they changed
+    """
+    if header is None or len(mapping) < header['size']:
+        return None
+    digest = hashlib.sha1()
+    _update_digest(digest, mapping, 0, header['size'])
+    if digest.hexdigest() != header['prefix_hash']:
+        return None
+    return digest
+
+
+def _update_digest(digest, mapping, start, end):
+    for offset in range(start, end, HASH_CHUNK_SIZE):
+        digest.update(mapping[offset:min(offset + HASH_CHUNK_SIZE, end)])
+
+
+def _index_vcards(mapping, offset, line):
+    """
+    @param mapping: Bytes or memory map of an encoded vCard file
+    @param offset: Byte offset to start indexing at
+    @param line: File line number at offset
+    @return: Generator of VcardIndexEntry objects
+    """
+    for start, end in iter_vcard_spans(mapping, offset):
+        data = mapping[start:end]
+        line += mapping[offset:start].count(b'\n') + data.count(b'\n')
+        offset = end
+        fields = _get_key_fields(data)
+        yield VcardIndexEntry(
+            start, end - start, hashlib.sha1(data).hexdigest(), line - 1,
+            fields.get('UID'), fields.get('FN'), fields.get('EMAIL'))
+
+
+def _get_key_fields(data):
+    """
+    Get key property values without validating or decoding the whole vCard.
+
+    @param data: Encoded vCard
+    @return: Dictionary of upper case INDEXED_PROPERTIES names to the raw
+    value string of their first occurrence
+    """
+    fields = {}
+    for view in iter_property_views(data, names=INDEXED_PROPERTIES):
+        if view.name not in fields:
+            value = view.get_value('replace')
+            if value is not None:
+                fields[view.name] = value
+    return fields
@@ -0,0 +1,252 @@
+"""Validate vCard files in a process pool"""
+
+import collections
+import contextlib
+import multiprocessing
+import os
+import sys
+
+import six
+
+from .vcard_cache import ValidationCache
+from .vcard_definitions import NEWLINE_CHARACTERS
+from .vcard_errors import DiagnosticCollector
+from .vcard_payload import payload_limits, set_payload_limits
+from .vcard_report import format_record, report_file, report_vcards
+from .vcard_validator import ENCODING, get_property_cache_summary, open_vcard_file, property_cache, read_lines, \
+    validate_file, validate_vcards
+
+SPLIT_FILE_SIZE = 4 * 1024 * 1024
+"""Files at least this many bytes are split into pieces across workers"""
+
+PIECE_SIZE = 1024 * 1024
+"""Approximate number of characters in each piece of a split file"""
+
+PENDING_TASKS_PER_JOB = 4
+"""Number of tasks queued per worker, to bound memory use"""
+
+
+def validate_files(paths, verbose, all_errors=False, jobs=1, cache_path=None, collector=None):
+    """
+    Validate files in a process pool, splitting large files into pieces.
+
+    @param paths: Paths to files, or '-' for standard input
+    @param verbose: Verbose mode
+    @param all_errors: Report every invalid vCard instead of stopping at the
+    first one
+    @param jobs: Number of worker processes
+    @param cache_path: Path to ValidationCache database shared by the workers
+    @param collector: DiagnosticCollector to add the warnings from all
+    workers to, or None to emit them with warnings.warn in the workers
+    @return: Generator of (verbose output, result) pairs, one per path in the
+    same order as paths, where result is the same as validate_file returns
+    """
+    pool = _create_pool(jobs)
+    try:
+        output = []
+        errors = []
+        cache_counts = None  # Property line cache (hits, misses) of the pieces of a split file
+        tasks = _iter_tasks(
+            paths, _validate_file, _validate_piece, (verbose, all_errors, cache_path, collector is not None))
+        for is_last_piece, task_output, task_messages, task_result in _imap_bounded(pool, _run_task, tasks, jobs):
+            task_errors, task_collector, task_cache_counts = task_result
+            if all_errors or not errors:
+                output.append(task_output)
+                sys.stderr.write(task_messages)
+                errors.extend(task_errors)
+                if task_collector is not None:
+                    collector.update(task_collector)
+                if task_cache_counts is not None:
+                    cache_counts = [
+                        count + task_count for count, task_count in zip(cache_counts or (0, 0), task_cache_counts)]
+            if is_last_piece:
+                # Whole files print their own summary in validate_file
+                if verbose and cache_counts is not None:
+                    sys.stderr.write(get_property_cache_summary(*cache_counts) + '\n')
+                if not all_errors:
+                    errors = errors[:1]
+                yield ''.join(output), '\n\n'.join(errors) or None
+                output = []
+                errors = []
+                cache_counts = None
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def report_files(paths, all_errors=False, jobs=1, cache_path=None):
+    """
+    Validate files in a process pool, formatting each diagnostic as a JSON
+    Lines record.
+
+    @param paths: Paths to files, or '-' for standard input
+    @param all_errors: Report every diagnostic of every vCard instead of
+    stopping at the first error in each file
+    @param jobs: Number of worker processes
+    @param cache_path: Path to ValidationCache database shared by the workers
+    @return: Generator of (records, failed) pairs, one per file or piece of a
+    large file in the same order as the serial run, so they can be written
+    as they arrive
+    """
+    pool = _create_pool(jobs)
+    try:
+        failed = False
+        tasks = _iter_tasks(paths, _report_file, _report_piece, (all_errors, cache_path), offsets=True)
+        for is_last_piece, _, task_messages, (records, task_failed) in _imap_bounded(pool, _run_task, tasks, jobs):
+            if all_errors or not failed:
+                sys.stderr.write(task_messages)
+                yield records, task_failed
+                failed = failed or task_failed
+            if is_last_piece:
+                failed = False
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def split_file(filename, piece_size=PIECE_SIZE):
+    """
+    Split a file into pieces on vCard boundaries.
+
+    @param filename: Path to file, or '-' for standard input
+    @param piece_size: Approximate number of characters in each piece
+    @return: Generator of (first file line, text) pairs
+    """
+    file_pointer = open_vcard_file(filename)
+    try:
+        lines = []
+        length = 0
+        first_line = 0
+        for index, line in enumerate(read_lines(file_pointer)):
+            lines.append(line)
+            length += len(line)
+            if length >= piece_size and line == NEWLINE_CHARACTERS:
+                yield first_line, ''.join(lines)
+                lines = []
+                length = 0
+                first_line = index + 1
+
+        if lines or first_line == 0:
+            yield first_line, ''.join(lines)
+    finally:
+        if file_pointer is not sys.stdin:
+            file_pointer.close()
+
+
+def _create_pool(jobs):
+    # Workers may be spawned rather than forked, so they get the settings of this process explicitly
+    return multiprocessing.Pool(jobs, set_payload_limits, (payload_limits,))
+
+
+def _iter_tasks(paths, file_function, piece_function, arguments, offsets=False):
+    """
+    Get the work for each path: whole files, or pieces of large files.
+
+    @param file_function: Function to call with the filename and arguments
+    @param piece_function: Function to call with the filename, arguments,
+    first file line and text of a piece
+    @param arguments: Tuple of arguments common to all tasks
+    @param offsets: Also pass the first byte offset of each piece to
+    piece_function, before the text. Encoding the pieces to count their bytes
+    takes time, so only do this when the offsets are reported.
+    @return: Generator of (is last piece of file, function, arguments)
+    """
+    for filename in paths:
+        if filename != '-' and os.path.getsize(filename) < SPLIT_FILE_SIZE:
+            yield True, file_function, (filename,) + arguments
+            continue
+
+        # Look one piece ahead to know which is the last one
+        previous = None
+        offset = 0
+        for first_line, text in split_file(filename, PIECE_SIZE):
+            if previous is not None:
+                yield False, piece_function, previous
+            if offsets:
+                previous = (filename,) + arguments + (first_line, offset, text)
+                offset += len(text.encode(ENCODING))
+            else:
+                previous = (filename,) + arguments + (first_line, text)
+        yield True, piece_function, previous
+
+
+def _imap_bounded(pool, function, iterable, jobs):
+    """
+    Like Pool.imap, but without reading ahead more than a few tasks.
+
+    @return: Generator of results in the same order as iterable
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(function, (item,)))
+        if len(pending) >= jobs * PENDING_TASKS_PER_JOB:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _run_task(task):
+    """
+    Run a task in a worker, capturing its output, so that the parent can show
+    it in the same order as a serial run.
+
+    @return: (is last piece of file, standard output, standard error output,
+    result)
+    """
+    is_last_piece, function, arguments = task
+    stdout = sys.stdout
+    stderr = sys.stderr
+    sys.stdout = six.StringIO()
+    sys.stderr = six.StringIO()
+    try:
+        result = function(*arguments)
+        return is_last_piece, sys.stdout.getvalue(), sys.stderr.getvalue(), result
+    finally:
+        sys.stdout = stdout
+        sys.stderr = stderr
+
+
+def _validate_file(filename, verbose, all_errors, cache_path, collect):
+    collector = DiagnosticCollector() if collect else None
+    with _open_cache(cache_path) as cache:
+        result = validate_file(filename, verbose, all_errors, cache, collector)
+    if result is None:
+        return [], collector, None
+    return [result], collector, None
+
+
+def _validate_piece(filename, verbose, all_errors, cache_path, collect, first_line, text):
+    collector = DiagnosticCollector() if collect else None
+    hits = property_cache.hits
+    misses = property_cache.misses
+    with _open_cache(cache_path) as cache:
+        errors = validate_vcards(six.StringIO(text), filename, verbose, all_errors, first_line, cache, collector)
+    return errors, collector, (property_cache.hits - hits, property_cache.misses - misses)
+
+
+def _report_file(filename, all_errors, cache_path):
+    records = []
+    with _open_cache(cache_path) as cache:
+        failed = report_file(filename, lambda diagnostic: records.append(format_record(diagnostic)), all_errors, cache)
+    return ''.join(records), failed
+
+
+def _report_piece(filename, all_errors, cache_path, first_line, first_offset, text):
+    records = []
+    with _open_cache(cache_path) as cache:
+        failed = report_vcards(
+            six.StringIO(text), filename, lambda diagnostic: records.append(format_record(diagnostic)), all_errors,
+            first_line, first_offset, cache)
+    return ''.join(records), failed
+
+
+@contextlib.contextmanager
+def _open_cache(cache_path):
+    """
+    @return: Context manager for a ValidationCache, or None without a path
+    """
+    if cache_path is None:
+        yield None
+        return
+    with ValidationCache(cache_path) as cache:
+        yield cache
@@ -0,0 +1,151 @@
+"""
+Incremental checks of inline binary values, like PHOTO;ENCODING=b:..., as
+their folded lines are unfolded
+"""
+
+import re
+import sys
+
+from .vcard_definitions import NEWLINE_CHARACTERS
+from .vcard_errors import NOTE_INVALID_BASE64, NOTE_PAYLOAD_TOO_LARGE, VCardValueError
+from .vcard_utils import LazyRegex
+
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+"""Default maximum number of decoded bytes of inline binary values per vCard"""
+
+# Start of a property line with an inline binary value, up to the colon before the value
+_INLINE_BINARY_START = LazyRegex(
+    r'^(?:[A-Za-z0-9-]+\.)?(PHOTO|LOGO|KEY|SOUND)((?:;(?:[^";:\r\n]|"[^"\r\n]*")*)*):', re.IGNORECASE)
+_BASE64_ENCODING_PARAMETER = LazyRegex(r';ENCODING=(?:B|"B")(?=;|$)', re.IGNORECASE)
+_BASE64_VALUE = LazyRegex(r'[A-Za-z0-9+/]*(={0,2})$')
+
+
+class PayloadLimits(object):
+    """
+    Settings for checking inline binary values.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, structure_only=False):
+        """
+        @param max_size: Maximum number of decoded bytes of inline binary
+        values per vCard, or None for no limit
+        @param structure_only: Only check the length and padding of the
+        base64 text, not each character
+        """
+        self.max_size = max_size
+        self.structure_only = structure_only
+
+    def get_key(self):
+        """
+        @return: String which is different for settings which can give
+        different results
+
+        Examples:
+        >>> PayloadLimits(1024, True).get_key()
+        '1024/structure'
+        """
+        return '{0}/{1}'.format(self.max_size, 'structure' if self.structure_only else 'full')
+
+
+payload_limits = PayloadLimits()
+"""
+Settings used when unfolding vCards. Set payload_limits.max_size and
+payload_limits.structure_only to change them.
+"""
+
+
+def set_payload_limits(limits):
+    """
+    Copy settings to payload_limits, for example in worker processes.
+
+    @param limits: PayloadLimits
+    """
+    payload_limits.max_size = limits.max_size
+    payload_limits.structure_only = limits.structure_only
+
+
+class PayloadChecker(object):
+    """
+    Checks each inline binary value in a vCard while it is unfolded. The
+    decoded size is counted one physical line at a time, so a value over the
+    limit is rejected before it is joined, while the base64 characters are
+    checked in one pass over the joined property line.
+    """
+
+    def __init__(self, limits=None):
+        """
+        @param limits: PayloadLimits, by default payload_limits
+        """
+        self.limits = payload_limits if limits is None else limits
+        self.size = 0
+        self._name = None
+        self._line = None
+        self._start = None
+        self._length = 0
+        self._max_length = None
+
+    def start(self, line, index):
+        """
+        Start checking the value on this line if it's inline binary.
+
+        @param line: First physical line of a property
+        @param index: vCard line index
+        @raise VCardValueError: If the value is too large
+        """
+        match = _INLINE_BINARY_START.match(line)
+        if match is None or _BASE64_ENCODING_PARAMETER.search(match.group(2)) is None:
+            return
+        self._name = match.group(1).upper()
+        self._line = index
+        self._start = match.end()
+        self._length = 0
+        max_size = self.limits.max_size
+        # Base64 characters needed to decode to more than the remaining bytes, with up to two padding characters
+        self._max_length = sys.maxsize if max_size is None else (max_size - self.size) * 4 // 3 + 4
+        self.add(line[self._start:-len(NEWLINE_CHARACTERS)])
+
+    def add(self, fragment):
+        """
+        Called for every folded line, so it only counts characters.
+
+        @param fragment: Continuation of the current value, without the
+        folding space and line ending
+        @raise VCardValueError: If the value is too large
+        """
+        if self._name is not None:
+            self._length += len(fragment)
+            if self._length > self._max_length:
+                self._raise_too_large()
+
+    def finish(self, property_line):
+        """
+        Finish checking the current value, if any.
+
+        @param property_line: Unfolded property line, starting with the first
+        physical line passed to start
+        @raise VCardValueError: If the value is invalid or too large
+        """
+        if self._name is None:
+            return
+        end = len(property_line) - len(NEWLINE_CHARACTERS)
+        if self.limits.structure_only:
+            padding = 2 if property_line.endswith('==', 0, end) else int(property_line.endswith('=', 0, end))
+        else:
+            match = _BASE64_VALUE.match(property_line, self._start, end)
+            if match is None:
+                self._raise(NOTE_INVALID_BASE64)
+            padding = len(match.group(1))
+        if (end - self._start) % 4 != 0:
+            self._raise(NOTE_INVALID_BASE64)
+
+        self.size += (end - self._start) * 3 // 4 - padding
+        max_size = self.limits.max_size
+        if max_size is not None and self.size > max_size:
+            self._raise_too_large()
+        self._name = None
+
+    def _raise_too_large(self):
+        self._raise('{0}: more than {1:d} bytes per vCard'.format(NOTE_PAYLOAD_TOO_LARGE, self.limits.max_size))
+
+    def _raise(self, message):
+        raise VCardValueError(message, {'vCard line': self._line, 'Property': self._name})
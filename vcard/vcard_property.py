@@ -1,5 +1,165 @@
+import collections
+
+from six.moves import intern
+
+MAX_INTERNED_FROZENSETS = 10000
+"""Stop sharing new parameter value sets after this many"""
+
+PROPERTY_CACHE_SIZE = 10000
+"""Default number of property line results kept by a PropertyCache"""
+
+PROPERTY_CACHE_MAX_LINE_LENGTH = 500
+"""
+Default length of the longest line a PropertyCache keeps. Longer lines, like
+inline PHOTO values, rarely repeat and would make the cache size unbounded.
+"""
+
+_INTERNED_FROZENSETS = {}
+
+
+def intern_text(text):
+    """
+    Intern a string so that repeated names share memory.
+
+    @param text: String
+    @return: Interned string, or the original string if it can't be interned
+    (unicode in Python 2)
+    """
+    try:
+        return intern(text)
+    except TypeError:
+        return text
+
+
+def intern_frozenset(values):
+    """
+    Share equal parameter value sets, which repeat across many properties.
+
+    @param values: Frozenset
+    @return: Previously seen equal frozenset, or values
+    """
+    try:
+        return _INTERNED_FROZENSETS[values]
+    except KeyError:
+        if len(_INTERNED_FROZENSETS) < MAX_INTERNED_FROZENSETS:
+            _INTERNED_FROZENSETS[values] = values
+        return values
+
+
 class VcardProperty(object):
-    def __init__(self, name):
-        self.name = name
-        self.parameters = None
-        self.values = None
+    """
+    Single vCard property. Parameters is None or a dictionary of upper case
+    parameter names to frozensets of values, and values is a list of lists
+    of sub-values.
+    """
+    __slots__ = ('name', 'parameters', 'values')
+
+    def __init__(self, name, parameters=None, values=None):
+        self.name = intern_text(name)
+        self.parameters = parameters
+        self.values = values
+
+    def freeze(self):
+        """
+        @return: Immutable copy of the property
+        """
+        return FrozenVcardProperty(self.name, self.parameters, self.values)
+
+    def copy(self):
+        """
+        @return: Mutable copy of the property
+        """
+        parameters = self.parameters
+        if parameters is not None:
+            parameters = dict(parameters)
+        values = self.values
+        if values is not None:
+            values = [list(sub_values) for sub_values in values]
+        return VcardProperty(self.name, parameters, values)
+
+
+class FrozenVcardProperty(VcardProperty):
+    """
+    Immutable vCard property, with values stored as tuples of tuples of
+    sub-values.
+    """
+    __slots__ = ()
+
+    def __init__(self, name, parameters=None, values=None):
+        if values is not None:
+            values = tuple(tuple(sub_values) for sub_values in values)
+        object.__setattr__(self, 'name', intern_text(name))
+        object.__setattr__(self, 'parameters', parameters)
+        object.__setattr__(self, 'values', values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FrozenVcardProperty attribute {0} is read-only'.format(name))
+
+    def __delattr__(self, name):
+        raise AttributeError('FrozenVcardProperty attribute {0} is read-only'.format(name))
+
+    def freeze(self):
+        return self
+
+
+class PropertyCache(object):
+    """
+    Least recently used cache of results for unfolded property lines, which
+    repeat a lot across vCards. Each result is a (FrozenVcardProperty or
+    None, (error type, message, context) tuple or None, warning messages)
+    tuple.
+    """
+
+    def __init__(self, max_size=PROPERTY_CACHE_SIZE, max_line_length=PROPERTY_CACHE_MAX_LINE_LENGTH):
+        """
+        @param max_size: Maximum number of results to keep, or 0 to disable
+        the cache
+        @param max_line_length: Length of the longest line to keep a result
+        for
+        """
+        self.max_size = max_size
+        self.max_line_length = max_line_length
+        self.hits = 0
+        self.misses = 0
+        self._results = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, property_line):
+        """
+        @param property_line: Single unfolded vCard line
+        @return: Cached result
+        @raise KeyError: If the line isn't cached
+        """
+        if len(property_line) > self.max_line_length:
+            self.misses += 1
+            raise KeyError(property_line)
+        try:
+            result = self._results.pop(property_line)
+        except KeyError:
+            self.misses += 1
+            raise
+        self._results[property_line] = result
+        self.hits += 1
+        return result
+
+    def set(self, property_line, result):
+        """
+        @param property_line: Single unfolded vCard line
+        @param result: (FrozenVcardProperty or None, (error type, message,
+        context) or None, warning messages)
+        """
+        if self.max_size <= 0 or len(property_line) > self.max_line_length:
+            return
+        self._results[property_line] = result
+        if len(self._results) > self.max_size:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all results and reset the hit and miss counts.
+        """
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
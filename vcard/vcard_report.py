@@ -0,0 +1,144 @@
+"""Machine-readable validation reports, one JSON record per diagnostic"""
+
+import json
+import sys
+
+from .vcard_errors import ERROR
+from .vcard_validator import iter_vcard_diagnostics, open_vcard_file
+
+REPORT_FORMATS = ('text', 'jsonl')
+
+WRITE_BUFFER_SIZE = 65536
+"""Number of characters of records kept in memory before writing them"""
+
+
+def get_record(diagnostic):
+    """
+    @param diagnostic: Diagnostic
+    @return: Dictionary of JSON-serializable diagnostic fields
+    """
+    context = diagnostic.context
+    return {
+        'file': context.get('File'),
+        'offset': context.get('File offset'),
+        'line': context.get('File line'),
+        'vcard_line': context.get('vCard line'),
+        'property': context.get('Property'),
+        'severity': diagnostic.severity,
+        'code': diagnostic.code,
+        'message': diagnostic.message,
+    }
+
+
+def format_record(diagnostic):
+    """
+    @param diagnostic: Diagnostic
+    @return: JSON Lines record, ending with a newline
+
+    Examples:
+    >>> from vcard.vcard_errors import Diagnostic, NOTE_INVALID_DATE
+    >>> print(format_record(Diagnostic(
+    ...     NOTE_INVALID_DATE, {'File': 'a.vcf', 'File line': 4, 'File offset': 0, 'Property': 'BDAY'})).strip())
+    ... # doctest: +NORMALIZE_WHITESPACE
+    {"code": "INVALID_DATE", "file": "a.vcf", "line": 4,
+     "message": "Invalid date (See RFC 2425 section 5.8.4 for date syntax)", "offset": 0, "property": "BDAY",
+     "severity": "error", "vcard_line": null}
+    """
+    return json.dumps(get_record(diagnostic), sort_keys=True, default=str) + '\n'
+
+
+class JsonLinesWriter(object):
+    """
+    Writes records to a file in blocks, rather than one write per record.
+    """
+
+    def __init__(self, file_pointer=None, buffer_size=WRITE_BUFFER_SIZE):
+        """
+        @param file_pointer: File-like object opened in text mode, by default
+        standard output
+        @param buffer_size: Number of characters to keep before writing
+        """
+        self.file_pointer = file_pointer
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._length = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.flush()
+
+    def write(self, diagnostic):
+        """
+        @param diagnostic: Diagnostic to write as a record
+        """
+        self.write_text(format_record(diagnostic))
+
+    def write_text(self, text):
+        """
+        @param text: Formatted records, for example from a worker process
+        """
+        self._buffer.append(text)
+        self._length += len(text)
+        if self._length >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write and flush the buffered records, so they can be read while
+        validation continues.
+        """
+        file_pointer = self.file_pointer or sys.stdout
+        file_pointer.write(''.join(self._buffer))
+        file_pointer.flush()
+        self._buffer = []
+        self._length = 0
+
+
+def report_file(filename, write, all_errors=False, cache=None):
+    """
+    Validate a file and pass each diagnostic to a function.
+
+    @param filename: Path to file, or '-' for standard input
+    @param write: Function to call with each Diagnostic, like
+    JsonLinesWriter.write
+    @param all_errors: Report every diagnostic of every vCard instead of
+    stopping at the first error
+    @param cache: ValidationCache to skip vCards validated in earlier runs
+    @return: True if the file has errors
+    """
+    file_pointer = open_vcard_file(filename)
+    try:
+        return report_vcards(file_pointer, filename, write, all_errors, cache=cache)
+    finally:
+        if file_pointer is not sys.stdin:
+            file_pointer.close()
+
+
+def report_vcards(file_pointer, filename, write, all_errors=False, first_line=0, first_offset=0, cache=None):
+    """
+    Validate each vCard in a file and pass each diagnostic to a function.
+
+    @param file_pointer: File-like object opened in text mode
+    @param filename: Name to report in the records
+    @param write: Function to call with each Diagnostic
+    @param all_errors: Report every diagnostic of every vCard instead of
+    stopping at the first error
+    @param first_line: File line number of the first line in file_pointer
+    @param first_offset: Byte offset of the first line in file_pointer
+    @param cache: ValidationCache to skip vCards validated in earlier runs
+    @return: True if there are errors
+    """
+    failed = False
+    for _, diagnostics in iter_vcard_diagnostics(
+            file_pointer, filename, first_line, cache, not all_errors, first_offset):
+        for diagnostic in diagnostics:
+            diagnostic.context.setdefault('File', filename)
+            write(diagnostic)
+            if diagnostic.severity == ERROR:
+                failed = True
+
+        if failed and not all_errors:
+            break
+    return failed
@@ -0,0 +1,147 @@
+"""Random access to the vCards in a file without decoding all of it"""
+
+import array
+import mmap
+import re
+
+from .vcard_definitions import NEWLINE_CHARACTERS
+from .vcard_errors import VCardError
+from .vcard_validator import ENCODING, READ_CHUNK_SIZE, VCard
+
+CARD_BOUNDARY = re.compile(br'(?:[A-Z0-9-]+\.)?(BEGIN|END):VCARD\r\n', re.IGNORECASE)
+"""BEGIN or END line of a vCard, in any case and with an optional group"""
+
+CARD_BOUNDARY_END = re.compile(br':VCARD\r\n', re.IGNORECASE)
+"""End of a possible BEGIN or END line, which is much faster to search for"""
+
+OFFSET_TYPECODE = 'Q' if 'Q' in getattr(array, 'typecodes', '') else 'L'
+"""
+Array type of byte offsets: 64 bits, as unsigned long is 32 bits on Windows.
+Python 2 has no 'Q' type.
+"""
+
+_NEWLINE_BYTES = NEWLINE_CHARACTERS.encode('ascii')
+
+
+def iter_vcard_spans(mapping, offset=0):
+    """
+    Find the vCards in a file without decoding it.
+
+    @param mapping: Bytes or memory map of an encoded vCard file
+    @param offset: Byte offset to start searching at
+    @return: Generator of (start, end) byte offsets of each vCard, from a
+    BEGIN:VCARD line to the next END:VCARD line and the blank line after it,
+    if any
+    """
+    start = None
+    for candidate in CARD_BOUNDARY_END.finditer(mapping, offset):
+        line_start = mapping.rfind(b'\n', offset, candidate.start()) + 1
+        if line_start == 0:
+            line_start = offset
+        match = CARD_BOUNDARY.match(mapping, line_start)
+        if match is None or match.end() != candidate.end():
+            continue
+        if match.group(1).upper() == b'BEGIN':
+            start = line_start
+        elif start is not None:
+            end = match.end()
+            if mapping[end:end + len(_NEWLINE_BYTES)] == _NEWLINE_BYTES:
+                end += len(_NEWLINE_BYTES)
+            yield start, end
+            start = None
+
+
+class VcardScanner(object):
+    """
+    Memory-mapped vCard file. Finds the byte offsets of each vCard when
+    opened, and decodes and parses only the vCards which are accessed.
+
+    Each vCard runs from a BEGIN:VCARD line to the next END:VCARD line and
+    the blank line after it, if any. Text outside of these is ignored, so
+    use validate_file to validate the file structure.
+    """
+
+    def __init__(self, filename):
+        """
+        @param filename: Path to file
+        """
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._starts = array.array(OFFSET_TYPECODE)
+        self._ends = array.array(OFFSET_TYPECODE)
+        try:
+            self._mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._mapping = b''
+        self._scan()
+
+    def _scan(self):
+        for start, end in iter_vcard_spans(self._mapping):
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        """
+        @param index: vCard index or slice
+        @return: VCard object, or list of VCard objects for a slice
+        @raise VCardError: If a vCard fails to validate, with the file line of
+        its end in the context like iter_vcards
+        """
+        if isinstance(index, slice):
+            return [self._get_vcard(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vCard index out of range')
+        return self._get_vcard(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get_vcard(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def span(self, index):
+        """
+        @param index: vCard index
+        @return: (start, end) byte offsets of the vCard in the file
+        """
+        return self._starts[index], self._ends[index]
+
+    def get_text(self, index):
+        """
+        @param index: vCard index
+        @return: Decoded vCard text
+        """
+        start, end = self.span(index)
+        return self._mapping[start:end].decode(ENCODING)
+
+    def close(self):
+        if not isinstance(self._mapping, bytes):
+            self._mapping.close()
+        self._file.close()
+
+    def _get_vcard(self, index):
+        try:
+            return VCard(self.get_text(index), self.filename)
+        except VCardError as error:
+            error.context['File'] = self.filename
+            error.context['File line'] = self._count_lines(self._ends[index]) - 1
+            raise
+
+    def _count_lines(self, end):
+        """
+        Count line endings before an offset, without copying the whole prefix.
+        """
+        count = 0
+        for start in range(0, end, READ_CHUNK_SIZE):
+            count += self._mapping[start:min(start + READ_CHUNK_SIZE, end)].count(b'\n')
+        return count
@@ -0,0 +1,217 @@
+"""HTTP validation service with a pool of warm worker processes"""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import stat
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, urlparse
+
+from .vcard_report import get_record, report_file, report_vcards
+from .vcard_validator import ENCODING
+
+VALIDATE_PATH = '/validate'
+
+MAX_PAYLOAD_SIZE = 64 * 1024 * 1024
+"""Maximum number of bytes in a request body"""
+
+JSON_CONTENT_TYPE = 'application/json'
+
+SOCKET_MODE = 0o600
+"""Permissions of the UNIX socket, so other users can't connect"""
+
+
+class ValidationRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    POST /validate with vCard data as the body, or POST /validate?path=PATH
+    to validate a file in the server's path root. Add all_errors=1 to the
+    query to report every diagnostic of every vCard. The response is a JSON
+    object with "failed" and "diagnostics", a list of records like the jsonl
+    format.
+    """
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != VALIDATE_PATH:
+            self._send_json(404, {'error': 'Not found: {0}'.format(url.path)})
+            return
+
+        query = parse_qs(url.query)
+        all_errors = query.get('all_errors', ['0'])[0].lower() in ('1', 'true', 'yes')
+        if 'path' in query:
+            if self.server.path_root is None:
+                self._send_json(403, {'error': 'Validating paths is disabled'})
+                return
+            path = _get_allowed_path(query['path'][0], self.server.path_root)
+            if path is None:
+                self._send_json(403, {'error': 'Path outside the path root: {0}'.format(query['path'][0])})
+                return
+            function, arguments = _validate_path, (path, all_errors)
+        else:
+            length = _get_content_length(self.headers)
+            if length is None:
+                self._send_json(400, {'error': 'Missing or invalid Content-Length'})
+                return
+            if length > MAX_PAYLOAD_SIZE:
+                self._send_json(413, {'error': 'Payload larger than {0:d} bytes'.format(MAX_PAYLOAD_SIZE)})
+                return
+            function, arguments = _validate_payload, (self.rfile.read(length), all_errors)
+
+        try:
+            failed, records = self.server.pool.apply(function, arguments)
+        except (IOError, OSError, UnicodeDecodeError) as error:
+            self._send_json(400, {'error': str(error)})
+            return
+        except Exception as error:
+            # Reply rather than dropping the connection, and keep serving other requests
+            self._send_json(500, {'error': 'Internal error: {0}'.format(error)})
+            return
+        self._send_json(200, {'failed': failed, 'diagnostics': records})
+
+    def _send_json(self, status, value):
+        body = json.dumps(value, sort_keys=True, default=str).encode('ascii')
+        self.send_response(status)
+        self.send_header('Content-Type', JSON_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *arguments):
+        # Clients get the result in the response, and UNIX socket clients have no address to log
+        pass
+
+
+class ValidationServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded HTTP server on a TCP port, which validates in a process pool.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, jobs=None, path_root=None):
+        """
+        @param address: (host, port) tuple. Use port 0 to pick a free port.
+        @param jobs: Number of worker processes, by default the CPU count
+        @param path_root: Directory whose files clients may validate by path,
+        or None to only accept vCard data
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, address, ValidationRequestHandler)
+        self.path_root = _get_path_root(path_root)
+        self.pool = _create_pool(jobs)
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        _close_pool(self.pool)
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class UnixValidationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """
+        Threaded HTTP server on a UNIX socket, which validates in a process
+        pool.
+        """
+        daemon_threads = True
+
+        def __init__(self, path, jobs=None, path_root=None):
+            """
+            @param path: Path to UNIX socket. A stale socket file is replaced.
+            Only the owner can connect to it.
+            @param jobs: Number of worker processes, by default the CPU count
+            @param path_root: Directory whose files clients may validate by
+            path, or None to only accept vCard data
+            """
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.remove(path)
+            socketserver.UnixStreamServer.__init__(self, path, ValidationRequestHandler)
+            os.chmod(path, SOCKET_MODE)
+            self.path_root = _get_path_root(path_root)
+            self.pool = _create_pool(jobs)
+
+        def server_close(self):
+            socketserver.UnixStreamServer.server_close(self)
+            _close_pool(self.pool)
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def serve(server):
+    """
+    Handle requests until interrupted or terminated, then close the server.
+
+    @param server: ValidationServer or UnixValidationServer
+    """
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _get_content_length(headers):
+    """
+    @param headers: Request headers
+    @return: Non-negative Content-Length, or None if it's missing or invalid
+    """
+    try:
+        length = int(headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+    if length < 0:
+        return None
+    return length
+
+
+def _get_path_root(path_root):
+    if path_root is None:
+        return None
+    return os.path.realpath(path_root)
+
+
+def _get_allowed_path(path, path_root):
+    """
+    @param path: Path from the request, absolute or relative to path_root
+    @param path_root: Real path of the directory clients may validate files in
+    @return: Real path of the file, or None if it's outside path_root
+    """
+    real_path = os.path.realpath(os.path.join(path_root, path))
+    if not real_path.startswith(os.path.join(path_root, '')):
+        return None
+    return real_path
+
+
+def _raise_interrupt(signal_number, frame):
+    raise KeyboardInterrupt()
+
+
+def _create_pool(jobs):
+    # Importing happens once here, so requests only pay for validation
+    return multiprocessing.Pool(jobs, _ignore_interrupts)
+
+
+def _close_pool(pool):
+    pool.terminate()
+    pool.join()
+
+
+def _ignore_interrupts():
+    # The parent process shuts down the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _validate_payload(data, all_errors):
+    records = []
+    failed = report_vcards(
+        six.StringIO(data.decode(ENCODING)), None, lambda diagnostic: records.append(get_record(diagnostic)),
+        all_errors)
+    return failed, records
+
+
+def _validate_path(path, all_errors):
+    records = []
+    failed = report_file(path, lambda diagnostic: records.append(get_record(diagnostic)), all_errors)
+    return failed, records
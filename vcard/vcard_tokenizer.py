@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""vCard v3.0 (RFC 2426) content line tokenizer"""
+
+from .vcard_definitions import NEWLINE_CHARACTERS
+from .vcard_errors import NOTE_MISSING_VALUE_STRING, VCardItemCountError
+from .vcard_utils import LazyRegex
+
+UNESCAPED_DELIMITERS = LazyRegex(r'(?<!\\)(?:\\\\)*[:;,=]')
+
+# Before the value string, quoted parameter values are matched whole, so the delimiters in them are skipped
+UNESCAPED_PARAM_DELIMITERS = LazyRegex(r'(?<!\\)(?:\\\\)*[:;,=]|"[^"\r\n]*"')
+
+
+def tokenize_property_line(property_line):
+    """
+    Split a property line into name, parameters and values in a single pass.
+    Splits like vcard_utils.split_unescaped: the name and parameters end at
+    the first unescaped colon outside a quoted parameter value, parameters
+    and values are separated by unescaped semicolons, parameter names and
+    values by an unescaped equals sign, and parameter values and sub-values
+    by unescaped commas.
+
+    @param property_line: Single unfolded vCard line
+    @return: Tuple of property name, parameters and values. Parameters is None
+    if there are no semicolons before the value string, otherwise a list of
+    (parameter string, parameter name, list of parameter values) tuples, where
+    name and values are None if the parameter doesn't contain exactly one
+    unescaped equals sign. Values is a list of lists of sub-values.
+
+    Examples:
+    >>> tokenize_property_line('N:Doe;John;;Mr,Dr;\\r\\n')
+    ('N', None, [['Doe'], ['John'], [''], ['Mr', 'Dr'], ['']])
+    >>> tokenize_property_line('TEL;TYPE=WORK,VOICE;TYPE=PREF:+1 234\\r\\n')
+    ... # doctest: +NORMALIZE_WHITESPACE
+    ('TEL', [('TYPE=WORK,VOICE', 'TYPE', ['WORK', 'VOICE']), ('TYPE=PREF', 'TYPE', ['PREF'])],
+    [['+1 234']])
+    >>> tokenize_property_line('NOTE;X-A:a\\\\;b\\\\,c:d;e\\r\\n')
+    ('NOTE', [('X-A', None, None)], [['a\\\\;b\\\\,c:d'], ['e']])
+    >>> tokenize_property_line('X-FOO;TYPE="a:b;c",d:value\\r\\n')
+    ('X-FOO', [('TYPE="a:b;c",d', 'TYPE', ['"a:b;c"', 'd'])], [['value']])
+    >>> tokenize_property_line('N\\r\\n') # doctest: +ELLIPSIS +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardItemCountError: Missing value string ...
+    """
+    if '\\' not in property_line and '"' not in property_line:
+        return _tokenize_unescaped_property_line(property_line)
+
+    matches = UNESCAPED_PARAM_DELIMITERS.finditer(property_line)
+
+    # Name and parameters
+    name_end = None
+    params = None
+    param_start = None
+    param_equals = []
+    param_commas = []
+    for match in matches:
+        position = match.end() - 1
+        delimiter = property_line[position]
+        if delimiter == '"':
+            continue
+        if delimiter == ':':
+            break
+        if delimiter == ';':
+            if param_start is None:
+                name_end = position
+                params = []
+            else:
+                params.append(_get_param_token(property_line, param_start, position, param_equals, param_commas))
+                param_equals = []
+                param_commas = []
+            param_start = position + 1
+        elif param_start is not None:
+            if delimiter == '=':
+                param_equals.append(position)
+            elif param_equals:
+                param_commas.append(position)
+    else:
+        raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_VALUE_STRING, property_line), {})
+
+    colon = position
+    if param_start is None:
+        name_end = colon
+    else:
+        params.append(_get_param_token(property_line, param_start, colon, param_equals, param_commas))
+
+    # Values, without line ending. Quotes have no meaning here.
+    matches = UNESCAPED_DELIMITERS.finditer(property_line, colon + 1)
+    values_end = max(colon + 1, len(property_line) - len(NEWLINE_CHARACTERS))
+    values = []
+    sub_values = []
+    start = colon + 1
+    for match in matches:
+        position = match.end() - 1
+        if position >= values_end:
+            break
+        delimiter = property_line[position]
+        if delimiter == ';':
+            sub_values.append(property_line[start:position])
+            values.append(sub_values)
+            sub_values = []
+            start = position + 1
+        elif delimiter == ',':
+            sub_values.append(property_line[start:position])
+            start = position + 1
+    sub_values.append(property_line[start:values_end])
+    values.append(sub_values)
+
+    return property_line[:name_end], params, values
+
+
+def find_value_colon(property_line):
+    """
+    Find the colon before the value string, like tokenize_property_line.
+
+    @param property_line: Single unfolded vCard line
+    @return: Index of the first unescaped colon outside a quoted parameter
+    value, or -1 if there is none
+
+    Examples:
+    >>> find_value_colon('X-FOO;TYPE="a:b":value\\r\\n')
+    16
+    >>> find_value_colon('N\\r\\n')
+    -1
+    """
+    for match in UNESCAPED_PARAM_DELIMITERS.finditer(property_line):
+        if property_line[match.end() - 1] == ':':
+            return match.end() - 1
+    return -1
+
+
+def _tokenize_unescaped_property_line(property_line):
+    """
+    Faster equivalent of tokenize_property_line for lines without escapes or
+    quotes.
+    """
+    colon = property_line.find(':')
+    if colon == -1:
+        raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_VALUE_STRING, property_line), {})
+
+    name_and_params = property_line[:colon].split(';')
+    params = None
+    if len(name_and_params) > 1:
+        params = []
+        for param_string in name_and_params[1:]:
+            param_parts = param_string.split('=')
+            if len(param_parts) != 2:
+                params.append((param_string, None, None))
+            else:
+                params.append((param_string, param_parts[0], param_parts[1].split(',')))
+
+    values_end = max(colon + 1, len(property_line) - len(NEWLINE_CHARACTERS))
+    values = [value.split(',') for value in property_line[colon + 1:values_end].split(';')]
+
+    return name_and_params[0], params, values
+
+
+def _get_param_token(property_line, start, end, equals, commas):
+    """
+    Get a parameter token from the delimiter positions inside it.
+
+    @return: (parameter string, parameter name, list of parameter values)
+    """
+    param_string = property_line[start:end]
+    if len(equals) != 1:
+        return param_string, None, None
+
+    param_values = []
+    value_start = equals[0] + 1
+    for comma in commas:
+        param_values.append(property_line[value_start:comma])
+        value_start = comma + 1
+    param_values.append(property_line[value_start:end])
+    return param_string, property_line[start:equals[0]], param_values
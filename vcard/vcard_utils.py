@@ -5,6 +5,55 @@
 import re
 
 
+class LazyRegex(object):
+    """
+    Regular expression compiled on first use, so importing the package
+    doesn't pay for patterns which a run never needs. Has the same methods
+    and attributes as a compiled pattern.
+
+    Examples:
+    >>> regex = LazyRegex('^[a-z]+$', re.IGNORECASE)
+    >>> regex.match('Foo') is not None
+    True
+    >>> regex.pattern
+    '^[a-z]+$'
+    """
+
+    def __init__(self, pattern, flags=0):
+        """
+        @param pattern: Regular expression string
+        @param flags: re module flags
+        """
+        self._pattern = pattern
+        self._flags = flags
+
+    def __getattr__(self, name):
+        # Only called while the attribute is missing, so each is looked up once
+        value = getattr(re.compile(self._pattern, self._flags), name)
+        setattr(self, name, value)
+        return value
+
+
+_UNESCAPED_REGEXES = {}
+"""Compiled regular expressions per (character, escape character)"""
+
+
+def _get_unescaped_regex(char, escape_char):
+    """
+    Get a regular expression matching an unescaped character.
+
+    @param char: Character to find
+    @param escape_char: Escape character
+    @return: Compiled regular expression with the character as group 1
+    """
+    try:
+        return _UNESCAPED_REGEXES[(char, escape_char)]
+    except KeyError:
+        regex = re.compile('(?<!{0}{0})(?:{0}{0}{0}{0})*({1})'.format(escape_char, re.escape(char)))
+        _UNESCAPED_REGEXES[(char, escape_char)] = regex
+        return regex
+
+
 def find_unescaped(text, char, escape_char='\\'):
     """
     Find occurrence of an unescaped character.
@@ -24,10 +73,13 @@ def find_unescaped(text, char, escape_char='\\'):
     >>> find_unescaped('foo,bar,baz', ':')
     >>> find_unescaped('foo\\\\,bar\\\\,baz', ',')
     """
-    unescaped_regex = '(?<!{0}{0})(?:{0}{0}{0}{0})*({1})'.format(escape_char, re.escape(char))
-    regex = re.compile(unescaped_regex)
+    if escape_char not in text:
+        index = text.find(char)
+        if index == -1:
+            return None
+        return index
 
-    char_match = regex.search(text)
+    char_match = _get_unescaped_regex(char, escape_char).search(text)
 
     if char_match is None:
         return None
@@ -42,13 +94,26 @@ def split_unescaped(text, separator, escape_char='\\'):
     @param separator: Separator
     @param escape_char: Escape character
     @return: List of strings between separators, excluding the separator
+
+    Examples:
+    >>> split_unescaped('foo;bar;baz', ';')
+    ['foo', 'bar', 'baz']
+    >>> split_unescaped('foo\\\\;bar;baz', ';')
+    ['foo\\\\;bar', 'baz']
+    >>> split_unescaped('foo\\\\\\\\;bar;baz', ';')
+    ['foo\\\\\\\\', 'bar', 'baz']
+    >>> split_unescaped(';', ';')
+    ['', '']
+    >>> split_unescaped('', ';')
+    ['']
     """
+    if escape_char not in text:
+        return text.split(separator)
+
     result = []
-    while True:
-        index = find_unescaped(text, separator, escape_char)
-        if index is not None:
-            result.append(text[:index])
-            text = text[index + 1:]
-        else:
-            result.append(text)
-            return result
+    start = 0
+    for char_match in _get_unescaped_regex(separator, escape_char).finditer(text):
+        result.append(text[start:char_match.start(1)])
+        start = char_match.end(1)
+    result.append(text[start:])
+    return result
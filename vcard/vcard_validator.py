@@ -3,133 +3,653 @@ import re
 import sys
 import warnings
 
+import six
+
 from . import vcard_utils, vcard_validators
-from .vcard_property import VcardProperty
-from .vcard_definitions import ALL_PROPERTIES, ID_CHARACTERS, MANDATORY_PROPERTIES, NEWLINE_CHARACTERS, \
-    QUOTE_SAFE_CHARACTERS, SAFE_CHARACTERS, SPACE_CHARACTER, VALUE_CHARACTERS, VCARD_LINE_MAX_LENGTH_RAW
+from .vcard_payload import PayloadChecker
+from .vcard_utils import LazyRegex
+from .vcard_property import PropertyCache, VcardProperty, intern_frozenset, intern_text
+from .vcard_tokenizer import find_value_colon, tokenize_property_line
+from .vcard_definitions import ALL_PROPERTIES, MANDATORY_PROPERTIES, NEWLINE_CHARACTERS, SPACE_CHARACTER, \
+    VALID_GROUP, VALID_ID, VALID_PARAM_VALUE, VALID_VALUE, VALID_X_PROPERTY_NAME, VCARD_LINE_MAX_LENGTH_RAW
 from .vcard_errors import NOTE_CONTINUATION_AT_START, NOTE_DOT_AT_LINE_START, NOTE_EMPTY_VCARD, \
     NOTE_INVALID_LINE_SEPARATOR, NOTE_INVALID_PARAMETER_NAME, NOTE_INVALID_PROPERTY_NAME, NOTE_INVALID_SUB_VALUE, \
     NOTE_INVALID_VALUE, NOTE_MISMATCH_GROUP, NOTE_MISSING_GROUP, NOTE_MISSING_PARAM_VALUE, NOTE_MISSING_PROPERTY, \
-    NOTE_MISSING_VALUE_STRING, VCardItemCountError, VCardLineError, VCardNameError, VCardValueError, VCardError
+    WARN_EMPTY_FOLDED_LINE, WARN_LONG_LINE, WARN_SHORT_FOLDED_LINE, ERROR, WARNING, Diagnostic, VCardItemCountError, \
+    VCardLineError, VCardNameError, VCardValueError, VCardError, get_first_error
 
 
 class VcardValidator(object):
-    def __init__(self, path, verbose):
+    def __init__(self, path, verbose, all_errors=False, cache=None, collector=None):
         self.path = path
         self.verbose = verbose
+        self.all_errors = all_errors
+        self.cache = cache
+        self.collector = collector
         self.result = self.validate()
 
     def validate(self):
-        return validate_file(self.path, self.verbose)
+        return validate_file(self.path, self.verbose, self.all_errors, self.cache, self.collector)
+
+
+READ_CHUNK_SIZE = 65536
+"""Number of characters to read from a file at a time"""
+
+ENCODING = 'utf-8'
+
+# First line of each property with its folded lines (RFC 2425 section 5.8.1), capturing the property name
+_PROPERTY_LINES_PATTERN = r'^(?:[A-Za-z0-9-]+\.)?({0})[;:][^\r\n]*\r\n(?:[ \t][^\r\n]*\r\n)*'
+_PROPERTY_LINES_REGEXES = {}
+"""Compiled _PROPERTY_LINES_PATTERN per (property names, whether the text is encoded)"""
+_FOLDING = LazyRegex(r'\r\n[ \t]')
+
+property_cache = PropertyCache()
+"""
+Results of get_vcard_property by property line. Set property_cache.max_size
+to change its size, or to 0 to disable it.
+"""
 
 
-def validate_file(filename, verbose):
+def validate_file(filename, verbose, all_errors=False, cache=None, collector=None):
     """
     Create object for each vCard in a file, and show the error output.
 
     @param filename: Path to file
     @param verbose: Verbose mode
+    @param all_errors: Report every invalid vCard instead of stopping at the
+    first one
+    @param cache: ValidationCache to skip vCards validated in earlier runs
+    @param collector: DiagnosticCollector for warnings, or None to emit them
+    with warnings.warn
     @return: Debugging output from creating vCards
     """
+    hits = property_cache.hits
+    misses = property_cache.misses
+
+    file_pointer = open_vcard_file(filename)
+    try:
+        errors = validate_vcards(file_pointer, filename, verbose, all_errors, cache=cache, collector=collector)
+    finally:
+        if file_pointer is not sys.stdin:
+            file_pointer.close()
+
+    if verbose:
+        sys.stderr.write(get_property_cache_summary(property_cache.hits - hits, property_cache.misses - misses) + '\n')
+
+    if not errors:
+        return None
+    return '\n\n'.join(errors)
+
+
+def get_property_cache_summary(hits, misses):
+    """
+    @param hits: Number of property lines found in property_cache
+    @param misses: Number of property lines not found in property_cache
+    @return: Printable hit rate
+
+    Examples:
+    >>> get_property_cache_summary(3, 1)
+    'Property line cache hit rate: 75.0% (3 of 4 lines)'
+    >>> get_property_cache_summary(0, 0)
+    'Property line cache hit rate: 0.0% (0 of 0 lines)'
+    """
+    lookups = hits + misses
+    rate = 100.0 * hits / lookups if lookups else 0.0
+    return 'Property line cache hit rate: {0:.1f}% ({1:d} of {2:d} lines)'.format(rate, hits, lookups)
+
+
+def open_vcard_file(filename):
+    """
+    Open a vCard file for reading.
+
+    @param filename: Path to file, or '-' for standard input
+    @return: File-like object
+    """
     if filename == '-':
-        file_pointer = sys.stdin
-    else:
-        file_pointer = codecs.open(filename, 'r', 'utf-8')
+        return sys.stdin
+    return codecs.open(filename, 'r', ENCODING)
 
-    contents = file_pointer.read().splitlines(True)
 
-    vcard_text = ''
-    result = ''
+def validate_vcards(file_pointer, filename, verbose, all_errors=False, first_line=0, cache=None, collector=None):
+    """
+    Validate each vCard in a file.
+
+    @param file_pointer: File-like object opened in text mode
+    @param filename: Name to report in error context
+    @param verbose: Verbose mode
+    @param all_errors: Report every invalid vCard instead of stopping at the
+    first one
+    @param first_line: File line number of the first line in file_pointer
+    @param cache: ValidationCache to skip vCards validated in earlier runs.
+    Not used in verbose mode, which prints every vCard.
+    @param collector: DiagnosticCollector for warnings, or None to emit them
+    with warnings.warn
+    @return: List of error messages
+    """
+    if verbose:
+        cache = None
+
+    errors = []
+    for vcard, diagnostics in iter_vcard_diagnostics(file_pointer, filename, first_line, cache, first_only=True):
+        error = None
+        for diagnostic in diagnostics:
+            if diagnostic.severity == WARNING:
+                if collector is None:
+                    warnings.warn(diagnostic.message)
+                else:
+                    collector.add(diagnostic)
+            elif error is None:
+                error = diagnostic
+
+        if error is not None:
+            errors.append(str(error))
+            if not all_errors:
+                break
+        elif verbose:
+            print(vcard)
+    return errors
+
+
+def get_file_diagnostics(filename, cache=None):
+    """
+    Validate every vCard in a file without raising exceptions.
+
+    @param filename: Path to file, or '-' for standard input
+    @param cache: ValidationCache to skip vCards validated in earlier runs
+    @return: List of Diagnostic objects
+    """
+    file_pointer = open_vcard_file(filename)
     try:
-        for index in range(len(contents)):
-            line = contents[index]
-            vcard_text += line
+        return [
+            diagnostic
+            for _, diagnostics in iter_vcard_diagnostics(file_pointer, filename, cache=cache)
+            for diagnostic in diagnostics]
+    finally:
+        if file_pointer is not sys.stdin:
+            file_pointer.close()
 
-            if line == NEWLINE_CHARACTERS:
-                try:
-                    vcard = VCard(vcard_text, filename)
-                    vcard_text = ''
-                    if verbose:
-                        print(vcard)
-                except VCardError as error:
-                    error.context['File'] = filename
-                    error.context['File line'] = index
-                    err_type = type(error)
-                    raise err_type(error.message, error.context)
 
-    except VCardError as error:
-        result += str(error)
+def iter_vcards(file_pointer, filename=None, first_line=0, cache=None):
+    """
+    Create object for each vCard in a file, reading it in bounded chunks.
+
+    @param file_pointer: File-like object opened in text mode
+    @param filename: Name to report in error context
+    @param first_line: File line number of the first line in file_pointer
+    @param cache: ValidationCache. vCards it has stored as valid are skipped,
+    the errors it has stored are yielded without parsing the vCard, and the
+    results for other vCards are stored in it.
+    @return: Generator of VCard objects, or VCardError objects for the first
+    error in vCards which failed to validate
+    """
+    for vcard, diagnostics in iter_vcard_diagnostics(file_pointer, filename, first_line, cache, first_only=True):
+        for diagnostic in diagnostics:
+            if diagnostic.severity == WARNING:
+                warnings.warn(diagnostic.message)
+        error = get_first_error(diagnostics)
+        if error is not None:
+            yield error.to_error()
+        elif vcard is not None:
+            yield vcard
+
+
+def iter_vcard_diagnostics(file_pointer, filename=None, first_line=0, cache=None, first_only=False, first_offset=0):
+    """
+    Validate each vCard in a file without raising exceptions.
+
+    @param file_pointer: File-like object opened in text mode
+    @param filename: Name to report in error context
+    @param first_line: File line number of the first line in file_pointer
+    @param cache: ValidationCache. vCards found in it aren't parsed, and the
+    results for other vCards are stored in it.
+    @param first_only: Stop validating each vCard at its first error
+    @param first_offset: Byte offset of the first line in file_pointer
+    @return: Generator of (VCard object, list of Diagnostic objects) pairs.
+    The VCard is None for cached vCards and for lines remaining after the
+    last vCard. Diagnostics have the File line of the end of the vCard, and
+    the File offset of the start of its encoded text.
+    """
+    lines = []
+    offset = first_offset
+    for index, line in enumerate(read_lines(file_pointer), first_line):
+        lines.append(line)
+
+        if line == NEWLINE_CHARACTERS:
+            text = ''.join(lines)
+            vcard, diagnostics = _get_vcard(text, filename, cache, first_only)
+            for diagnostic in diagnostics:
+                diagnostic.context['File'] = filename
+                diagnostic.context['File line'] = index
+                diagnostic.context['File offset'] = offset
+            yield vcard, diagnostics
+            offset += len(text.encode(ENCODING))
+            lines = []
+
+    if lines:
+        yield None, [get_remaining_lines_diagnostic(filename, ''.join(lines))]
+
+
+def get_vcard_diagnostics(text, first_only=False):
+    """
+    Validate a single vCard without raising exceptions.
+
+    @param text: String containing a single vCard
+    @param first_only: Stop validating at the first error
+    @return: List of Diagnostic objects, without File context
+    """
+    diagnostics = []
+    parse_vcard(text, diagnostics, first_only)
+    return diagnostics
 
-    if vcard_text != '' and result == '':
-        result += 'Could not process entire %s - %i lines remain' % (filename, len(vcard_text.splitlines(False)))
 
-    if result == '':
-        return None
-    return result
+def get_remaining_lines_diagnostic(filename, text):
+    """
+    @param filename: Name to report in the message
+    @param text: Lines after the last vCard
+    @return: Diagnostic for text which isn't part of a vCard
+    """
+    return Diagnostic(
+        'Could not process entire {0} - {1:d} lines remain'.format(filename, len(text.splitlines())),
+        {},
+        error_type=VCardItemCountError,
+        code='REMAINING_LINES')
+
+
+def _get_vcard(text, filename, cache, first_only):
+    """
+    @return: (VCard object, list of Diagnostic objects). The VCard is None if
+    the result is from the cache.
+    """
+    if cache is None:
+        diagnostics = []
+        return VCard(text, filename, diagnostics, first_only), diagnostics
+
+    try:
+        diagnostics = cache.get(text)
+        vcard = None
+    except KeyError:
+        # Cache every diagnostic, so the result is the same whether or not the next lookup is first only
+        diagnostics = []
+        vcard = VCard(text, filename, diagnostics)
+        cache.set(text, diagnostics)
+
+    if first_only:
+        diagnostics = _get_diagnostics_to_first_error(diagnostics)
+    return vcard, diagnostics
+
+
+def _get_diagnostics_to_first_error(diagnostics):
+    """
+    @return: The diagnostics up to and including the first error, like
+    validating with first_only
+    """
+    for index, diagnostic in enumerate(diagnostics):
+        if diagnostic.severity == ERROR:
+            return diagnostics[:index + 1]
+    return diagnostics
+
+
+def read_lines(file_pointer, chunk_size=READ_CHUNK_SIZE):
+    """
+    Split a file into lines, keeping line endings, without reading it all.
+
+    @param file_pointer: File-like object opened in text mode
+    @param chunk_size: Maximum number of characters to read at a time
+    @return: Generator of lines, split like str.splitlines(True)
+    """
+    pending = ''
+    while True:
+        chunk = file_pointer.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).splitlines(True)
+        # The last line may be incomplete, or a CR whose LF is in the next chunk
+        pending = lines.pop()
+        for line in lines:
+            yield line
+
+    if pending:
+        yield pending
 
 
 class VCard():
     """Container for structured and unstructured vCard contents."""
 
-    def __init__(self, text, filename=None):
+    def __init__(self, text, filename=None, diagnostics=None, first_only=False, lazy=False):
         """
         Create vCard object from text string. Includes text (the entire
         unprocessed vCard), group (optional prefix on each line) and
         properties.
 
         @param text: String containing a single vCard
+        @param diagnostics: List to append a Diagnostic to for each problem,
+        instead of raising the first one as a VCardError. Properties which
+        failed to validate are left out.
+        @param first_only: Stop validating at the first problem
+        @param lazy: Only find where each property is. Properties are parsed
+        and validated when get first returns them, and the whole vCard by
+        validate, which is called on first access to group or properties.
         """
-        if text == '' or text is None:
-            raise VCardError(NOTE_EMPTY_VCARD, {'vCard line': 1, 'File line': 1})
-
         self.text = text
 
         self.filename = filename
 
-        lines = unfold_vcard_lines(self.text.splitlines(True))
-
-        # Groups
-        self.group = get_vcard_group(lines)
-        lines = remove_vcard_groups(lines, self.group)
+        self._properties_by_name = {}
+        self._property_views = None
+        if not lazy:
+            self.validate(diagnostics, first_only)
 
-        # Properties
-        self.properties = get_vcard_properties(lines)
+    def __getattr__(self, name):
+        # Only called for missing attributes, so lazy vCards are validated on first access
+        if name in ('group', 'properties'):
+            self.validate()
+            return getattr(self, name)
+        raise AttributeError(name)
 
     def __str__(self):
-        return self.text.encode('utf-8')
+        if six.PY2:
+            return self.text.encode('utf-8')
+        return self.text
+
+    def validate(self, diagnostics=None, first_only=False):
+        """
+        Parse and validate the whole vCard, setting group and properties.
+
+        @param diagnostics: List to append a Diagnostic to for each problem,
+        instead of raising the first one as a VCardError. Properties which
+        failed to validate are left out.
+        @param first_only: Stop validating at the first problem
+        @raise VCardError: If diagnostics is None and the vCard is invalid
+        """
+        if diagnostics is None:
+            diagnostics = []
+            group, properties = parse_vcard(self.text, diagnostics, True)
+            _raise_diagnostics(diagnostics)
+        else:
+            group, properties = parse_vcard(self.text, diagnostics, first_only)
+        self.group = group
+        self.properties = properties
+        self._properties_by_name = {}
+
+    def get(self, name):
+        """
+        Get the properties with a name. Unless the vCard has been validated,
+        they are parsed and validated on first access, without checking the
+        rest of the vCard.
+
+        @param name: Property name, case insensitive
+        @return: List of VcardProperty objects, in vCard order
+        @raise VCardError: If one of the properties is invalid
+        """
+        name = name.upper()
+        try:
+            return self._properties_by_name[name]
+        except KeyError:
+            pass
+
+        if 'properties' in self.__dict__:
+            properties = [property_ for property_ in self.properties if property_.name.upper() == name]
+        else:
+            properties = [view.parse() for view in self.get_views(name)]
+        self._properties_by_name[name] = properties
+        return properties
+
+    def get_views(self, name):
+        """
+        Get the properties with a name without parsing or validating them.
+
+        @param name: Property name, case insensitive
+        @return: List of PropertyView objects, in vCard order
+        """
+        if self._property_views is None:
+            self._property_views = {}
+            for view in iter_property_views(self.text):
+                self._property_views.setdefault(view.name, []).append(view)
+        return self._property_views.get(name.upper(), [])
 
 
-def unfold_vcard_lines(lines):
+class PropertyView(object):
+    """
+    Property found without parsing it: its name, and the span of its folded
+    lines in a string or an encoded buffer, like a memory map. Strings are
+    only created for the parts which are asked for.
+    """
+    __slots__ = ('buffer', 'name', 'index', 'start', 'end')
+
+    def __init__(self, buffer, name, index, start, end):
+        """
+        @param buffer: String, or bytes or memory map of ENCODING text
+        @param name: Upper case property name
+        @param index: Unfolded line index in the vCard
+        @param start: Offset of the first line in buffer
+        @param end: Offset after the line ending of the last folded line
+        """
+        self.buffer = buffer
+        self.name = name
+        self.index = index
+        self.start = start
+        self.end = end
+
+    def get_text(self, errors='strict'):
+        """
+        @param errors: Decoding error handler for encoded buffers
+        @return: Folded lines, with line endings
+        """
+        return self._decode(self.start, self.end, errors)
+
+    def get_value(self, errors='strict'):
+        """
+        @param errors: Decoding error handler for encoded buffers
+        @return: Unfolded text after the colon which starts the value, without
+        un-escaping or validating it, or None if there's no such colon
+        """
+        line = _FOLDING.sub('', self._decode(self.start, self.end - len(NEWLINE_CHARACTERS), errors))
+        colon = find_value_colon(line)
+        if colon == -1:
+            return None
+        return line[colon + 1:]
+
+    def parse(self):
+        """
+        Parse and validate the property, without checking the rest of the
+        vCard.
+
+        @return: VcardProperty
+        @raise VCardError: If the property is invalid, with its vCard line
+        """
+        try:
+            lines = unfold_vcard_lines(self.get_text().splitlines(True))
+            # Lines folded with a tab aren't continuations in vCard 3.0, so report them like a full validation does
+            for line in lines[1:]:
+                get_vcard_property(line)
+            line = lines[0]
+            group_match = VALID_GROUP.match(line)
+            if group_match is not None:
+                line = line[group_match.end():]
+            return get_vcard_property(line)
+        except VCardError as error:
+            error.context['vCard line'] = self.index
+            raise
+
+    def _decode(self, start, end, errors):
+        text = self.buffer[start:end]
+        if isinstance(text, bytes):
+            text = text.decode(ENCODING, errors)
+        return text
+
+
+def iter_property_views(buffer, start=0, end=None, names=None):
+    """
+    Find the properties in a vCard without parsing them or copying its text.
+
+    @param buffer: String, or bytes or memory map of ENCODING text
+    @param start: Offset of the vCard in buffer
+    @param end: Offset after the vCard, by default the end of buffer
+    @param names: Upper case names of the properties to find, by default
+    all. Other lines are skipped without creating views, so the views have
+    no index.
+    @return: Generator of PropertyView objects in vCard order. Lines which
+    aren't properties are left out.
+
+    Examples:
+    >>> views = list(iter_property_views(u'BEGIN:VCARD\\r\\nitem1.NOTE:a\\r\\n b\\r\\n'))
+    >>> [(view.name, view.index, view.start, view.end) for view in views]
+    [('BEGIN', 0, 0, 13), ('NOTE', 1, 13, 31)]
+    >>> print(views[1].get_value())
+    ab
+    >>> [view.name for view in iter_property_views(u'N:a\\r\\nFN:b\\r\\n', names=('FN',))]
+    ['FN']
+    """
+    if end is None:
+        end = len(buffer)
+    encoded = not isinstance(buffer, six.text_type)
+    matches = _get_property_lines_regex(names, encoded).finditer(buffer, start, end)
+    for index, match in enumerate(matches):
+        name = match.group(1)
+        if encoded:
+            name = name.decode('ascii')
+        yield PropertyView(
+            buffer, intern_text(name.upper()), None if names else index, match.start(), match.end())
+
+
+def _get_property_lines_regex(names, encoded):
+    """
+    @return: Compiled regular expression for the lines of the named
+    properties, or every property if names is None
+    """
+    try:
+        return _PROPERTY_LINES_REGEXES[(names, encoded)]
+    except KeyError:
+        name_pattern = '[A-Za-z0-9-]+' if names is None else '|'.join(re.escape(name) for name in names)
+        pattern = _PROPERTY_LINES_PATTERN.format(name_pattern)
+        if encoded:
+            pattern = pattern.encode('ascii')
+        regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+        _PROPERTY_LINES_REGEXES[(names, encoded)] = regex
+        return regex
+
+
+def _raise_diagnostics(diagnostics):
+    """
+    Emit warnings with warnings.warn, and raise the first error.
+
+    @param diagnostics: List of Diagnostic objects
+    @raise VCardError: If there are any errors
+    """
+    for diagnostic in diagnostics:
+        if diagnostic.severity == WARNING:
+            warnings.warn(diagnostic.message)
+    error = get_first_error(diagnostics)
+    if error is not None:
+        raise error.to_error()
+
+
+def parse_vcard(text, diagnostics, first_only=False):
+    """
+    Get the group and properties of a vCard without raising exceptions.
+
+    @param text: String containing a single vCard
+    @param diagnostics: List to append a Diagnostic to for each problem
+    @param first_only: Stop at the first error
+    @return: (group, list of valid properties). Line and group problems stop
+    parsing, returning (None, []), while each invalid property is reported
+    and skipped.
+    """
+    if text == '' or text is None:
+        diagnostics.append(Diagnostic(NOTE_EMPTY_VCARD, {'vCard line': 1, 'File line': 1}))
+        return None, []
+
+    try:
+        lines = unfold_vcard_lines(text.splitlines(True), diagnostics)
+        group = get_vcard_group(lines)
+        lines = remove_vcard_groups(lines, group)
+    except VCardError as error:
+        diagnostics.append(Diagnostic.from_error(error))
+        return None, []
+
+    return group, _get_vcard_properties(lines, diagnostics, first_only)
+
+
+def unfold_vcard_lines(lines, diagnostics=None, limits=None):
     """
     Un-split lines in vCard, warning about short lines. RFC 2426 page 8.
+    The size of inline binary values is counted as each line is seen, so a
+    value over the limit stops unfolding before it is joined.
 
     @param lines: List of potentially folded vCard lines
+    @param diagnostics: List to append a WARNING Diagnostic to for each
+    warning, or None to emit a warning with warnings.warn for each kind
+    @param limits: PayloadLimits for inline binary values, by default
+    vcard_payload.payload_limits
     @return: List of lines, one per property
+    @raise VCardValueError: If an inline binary value is invalid or too large
     """
+    payload_checker = PayloadChecker(limits)
     property_lines = []
+    folded_line = None  # Fragments of the current property line, if folded
+    long_lines = []
+    short_folded_lines = []
+    empty_folded_lines = []
     for index in range(len(lines)):
         line = lines[index]
         if not line.endswith(NEWLINE_CHARACTERS):
             raise VCardLineError(NOTE_INVALID_LINE_SEPARATOR, {'File line': index + 1})
 
         if len(line) > VCARD_LINE_MAX_LENGTH_RAW:
-            warnings.warn('Long line in vCard: {0}'.format(line.encode('utf-8')))
+            long_lines.append(index)
 
         if line.startswith(' '):
             if index == 0:
                 raise VCardLineError(NOTE_CONTINUATION_AT_START, {'File line': index + 1})
             elif len(lines[index - 1]) < VCARD_LINE_MAX_LENGTH_RAW:
-                warnings.warn('Short folded line at line {0:d}'.format(index - 1))
+                short_folded_lines.append(index - 1)
             elif line == SPACE_CHARACTER + NEWLINE_CHARACTERS:
-                warnings.warn('Empty folded line at line {0:d}'.format(index))
-            property_lines[-1] = \
-                property_lines[-1][:-len(NEWLINE_CHARACTERS)] + line[1:]
+                empty_folded_lines.append(index)
+            if folded_line is None:
+                folded_line = [property_lines[-1][:-len(NEWLINE_CHARACTERS)]]
+            fragment = line[1:-len(NEWLINE_CHARACTERS)]
+            payload_checker.add(fragment)
+            folded_line.append(fragment)
         else:
+            if folded_line is not None:
+                property_lines[-1] = ''.join(folded_line) + NEWLINE_CHARACTERS
+                folded_line = None
+            if property_lines:
+                payload_checker.finish(property_lines[-1])
+            payload_checker.start(line, index)
             property_lines.append(line)
 
+    if folded_line is not None:
+        property_lines[-1] = ''.join(folded_line) + NEWLINE_CHARACTERS
+    if property_lines:
+        payload_checker.finish(property_lines[-1])
+
+    for message, indexes in (
+            (WARN_LONG_LINE, long_lines),
+            (WARN_SHORT_FOLDED_LINE, short_folded_lines),
+            (WARN_EMPTY_FOLDED_LINE, empty_folded_lines)):
+        if diagnostics is None:
+            _warn_lines(message, indexes)
+        else:
+            for index in indexes:
+                diagnostics.append(Diagnostic(message, {'vCard line': index}, WARNING))
+
     return property_lines
 
 
+def _warn_lines(message, indexes):
+    """
+    Emit a single warning for all the lines with the same problem.
+
+    @param message: Warning message
+    @param indexes: Line indexes
+    """
+    if len(indexes) == 1:
+        warnings.warn('{0} at line {1:d}'.format(message, indexes[0]))
+    elif indexes:
+        warnings.warn('{0} at lines {1}'.format(message, ', '.join(str(index) for index in indexes)))
+
+
 def get_vcard_group(lines):
     """
     Get & validate group. RFC 2426 pages 28, 29.
@@ -139,9 +659,7 @@ def get_vcard_group(lines):
     """
     group = None
 
-    group_re = re.compile('^([{0}]*)\.'.format(re.escape(ID_CHARACTERS)))
-
-    group_match = group_re.match(lines[0])
+    group_match = VALID_GROUP.match(lines[0])
     if group_match is not None:
         group = group_match.group(1)
 
@@ -151,7 +669,9 @@ def get_vcard_group(lines):
 
         for index in range(len(lines)):
             line = lines[index]
-            next_match = group_re.match(line)
+            if line == NEWLINE_CHARACTERS:
+                continue
+            next_match = VALID_GROUP.match(line)
             if not next_match:
                 raise VCardLineError(NOTE_MISSING_GROUP, {'File line': index + 1})
             if next_match.group(1) != group:
@@ -160,7 +680,7 @@ def get_vcard_group(lines):
     else:
         # Make sure there are no groups elsewhere
         for index in range(len(lines)):
-            next_match = group_re.match(lines[index])
+            next_match = VALID_GROUP.match(lines[index])
             if next_match:
                 raise VCardNameError(
                     '{0}: {1} != {2}'.format(NOTE_MISMATCH_GROUP, next_match.group(1), group), {'File line': index + 1})
@@ -177,7 +697,8 @@ def remove_vcard_groups(lines, group):
     """
     if group:
         for index in range(len(lines)):
-            lines[index] = lines[index][len(group):]
+            if lines[index] != NEWLINE_CHARACTERS:
+                lines[index] = lines[index][len(group) + 1:]
     return lines
 
 
@@ -190,67 +711,142 @@ def get_vcard_properties(lines):
     and duplicates add no information, but ignoring this to make sure vCard
     output looks like the original.
     """
+    diagnostics = []
+    properties = _get_vcard_properties(lines, diagnostics, True)
+    _raise_diagnostics(diagnostics)
+    return properties
+
+
+def _get_vcard_properties(lines, diagnostics, first_only):
+    """
+    Get the valid properties, and a diagnostic for each problem.
+    """
     properties = []
-    for index in range(len(lines)):
-        property_line = lines[index]
+    names = set()
+    for index, property_line in enumerate(lines):
         if property_line != NEWLINE_CHARACTERS:
-            try:
-                properties.append(get_vcard_property(property_line))
-            except VCardError as error:
+            count = len(diagnostics)
+            property_, error = _get_cached_vcard_property(property_line, diagnostics)
+            if error is not None:
                 error.context['vCard line'] = index
-                err_type = type(error)
-                raise err_type(
-                    error.message,
-                    error.context)
+                diagnostics.append(error)
+                if first_only:
+                    return properties
+                # Don't report a mandatory property as missing when it's invalid
+                names.add(property_line.split(':', 1)[0].split(';', 1)[0].upper())
+                continue
+            for diagnostic in diagnostics[count:]:
+                diagnostic.context['vCard line'] = index
+            properties.append(property_)
+            names.add(property_.name.upper())
 
     for mandatory_property in MANDATORY_PROPERTIES:
-        if mandatory_property not in [property_.name.upper() for property_ in properties]:
-            raise VCardItemCountError(
-                '{0}: {1}'.format(NOTE_MISSING_PROPERTY, mandatory_property), {'Property': mandatory_property})
+        if mandatory_property not in names:
+            diagnostics.append(Diagnostic(
+                '{0}: {1}'.format(NOTE_MISSING_PROPERTY, mandatory_property),
+                {'Property': mandatory_property},
+                error_type=VCardItemCountError))
 
     return properties
 
 
-def get_vcard_property(property_line):
+def get_vcard_property(property_line, diagnostics=None):
     """
-    Get a single property.
+    Get a single property, reusing the result for lines in property_cache.
 
     @param property_line: Single unfolded vCard line
+    @param diagnostics: List to append a WARNING Diagnostic to for each
+    warning, or None to emit them with warnings.warn
     @return: Dictionary with name, parameters and values
+    @raise VCardError: If the property is invalid
     """
-    property_parts = vcard_utils.split_unescaped(property_line, ':')
-    if len(property_parts) < 2:
-        raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_VALUE_STRING, property_line), {})
-    elif len(property_parts) > 2:
-        # Merge - Colon doesn't have to be escaped in values
-        property_parts[1] = ':'.join(property_parts[1:])
-        property_parts = property_parts[:2]
-    property_string, values_string = property_parts
+    property_, error = _get_cached_vcard_property(property_line, diagnostics)
+    if error is not None:
+        raise error.to_error()
+    return property_
+
+
+def _get_cached_vcard_property(property_line, diagnostics):
+    """
+    Like get_vcard_property, but without raising. Character, parameter and
+    count errors are reported as a Diagnostic; other checks raise the first
+    time an invalid line is seen, and later copies of the line get their
+    Diagnostic from property_cache.
+
+    @return: (VcardProperty, None), or (None, Diagnostic) if the property is
+    invalid
+    """
+    try:
+        property_, error, property_warnings = property_cache.get(property_line)
+    except KeyError:
+        property_warnings = []
+        try:
+            property_, error = _get_vcard_property(property_line, property_warnings)
+        except VCardError as exception:
+            error = Diagnostic.from_error(exception)
+        if error is not None:
+            property_cache.set(property_line, (None, (error.error_type, error.message, dict(error.context)), ()))
+            return None, error
+        property_cache.set(property_line, (
+            property_.freeze(),
+            None,
+            tuple(property_warnings)))
+    else:
+        if error is not None:
+            error_type, message, context = error
+            return None, Diagnostic(message, dict(context), error_type=error_type)
+        property_ = property_.copy()
+
+    for diagnostic in property_warnings:
+        if diagnostics is None:
+            warnings.warn(diagnostic.message)
+        else:
+            diagnostics.append(Diagnostic(diagnostic.message, dict(diagnostic.context), WARNING))
+    return property_, None
+
 
-    # Split property name and property parameters
-    property_name_and_params = vcard_utils.split_unescaped(property_string, ';')
+def _get_vcard_property(property_line, diagnostics):
+    """
+    @return: (VcardProperty, None), or (None, Diagnostic) if the property is
+    invalid
+    @raise VCardError: If the line can't be tokenized, or a value check other
+    than the character and count checks fails
+    """
+    property_name, param_tokens, values = tokenize_property_line(property_line)
 
-    property_ = VcardProperty(property_name_and_params.pop(0))
+    property_ = VcardProperty(property_name)
 
     # String validation
-    if not property_.name.upper() in ALL_PROPERTIES and not re.match(
-            '^X-[{0}]+$'.format(re.escape(ID_CHARACTERS)), property_.name, re.IGNORECASE):
-        raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PROPERTY_NAME, property_.name), {})
+    if not property_.name.upper() in ALL_PROPERTIES and not VALID_X_PROPERTY_NAME.match(property_.name):
+        return None, Diagnostic(
+            '{0}: {1}'.format(NOTE_INVALID_PROPERTY_NAME, property_.name), {}, error_type=VCardNameError)
 
+    error = None
     try:
-        if len(property_name_and_params) != 0:
-            property_.parameters = get_vcard_property_params(';'.join(property_name_and_params))
-        property_.values = get_vcard_property_values(values_string)
-
-        # Validate
-        vcard_validators.validate_vcard_property(property_)
-    except VCardError as error:
+        if param_tokens is not None:
+            property_.parameters, error = _get_vcard_property_params(param_tokens)
+        if error is None:
+            for sub_values in values:
+                error = _get_sub_values_error(sub_values)
+                if error is not None:
+                    break
+        if error is None:
+            property_.values = values
+
+            # Validate
+            error = vcard_validators.get_vcard_property_error(property_, diagnostics)
+    except VCardError as exception:
+        error = Diagnostic.from_error(exception)
+
+    if error is not None:
         # Add parameter name to error
         error.context['Property line'] = property_line
-        err_type = type(error)
-        raise err_type(error.message, error.context)
+        return None, error
 
-    return property_
+    for diagnostic in diagnostics:
+        diagnostic.context['Property line'] = property_line
+
+    return property_, None
 
 
 def get_vcard_property_params(params_string):
@@ -268,16 +864,44 @@ def get_vcard_property_params(params_string):
 
     for parameter_string in vcard_utils.split_unescaped(params_string, ';'):
         parameter = get_vcard_property_parameter(parameter_string)
-        param_name = parameter['name'].upper()  # To be able to merge TYPE & type
-        if param_name not in params:
-            params[param_name] = parameter['values']
-        else:
-            # Merge
-            params[param_name] = params[param_name].union(parameter['values'])
+        _merge_vcard_property_parameter(params, parameter)
 
     return params
 
 
+def _get_vcard_property_params(param_tokens):
+    """
+    Get the parameters and their values from tokenize_property_line output.
+
+    @param param_tokens: List of parameter tokens
+    @return: (Dictionary of parameters, like get_vcard_property_params, None),
+    or (None, Diagnostic) if a parameter is invalid
+    """
+    params = {}
+    if len(param_tokens) == 1 and param_tokens[0][0] == '':
+        return params, None
+
+    for param_string, param_name, param_values in param_tokens:
+        if param_name is None:
+            return None, Diagnostic(
+                '{0}: {1}'.format(NOTE_MISSING_PARAM_VALUE, param_string), {}, error_type=VCardItemCountError)
+        parameter, error = _get_vcard_property_parameter(param_name, param_values)
+        if error is not None:
+            return None, error
+        _merge_vcard_property_parameter(params, parameter)
+
+    return params, None
+
+
+def _merge_vcard_property_parameter(params, parameter):
+    param_name = intern_text(parameter['name'].upper())  # To be able to merge TYPE & type
+    if param_name not in params:
+        params[param_name] = parameter['values']
+    else:
+        # Merge
+        params[param_name] = intern_frozenset(params[param_name].union(parameter['values']))
+
+
 def get_vcard_property_values(values_string):
     """
     Get the property values.
@@ -304,18 +928,28 @@ def get_vcard_property_parameter(param_string):
     @param param_string: Single parameter and values
     @return: Dictionary with a parameter name and values
     """
-    try:
-        param_name, values_string = vcard_utils.split_unescaped(param_string, '=')
-    except ValueError as error:
-        raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_PARAM_VALUE, str(error)), {})
+    param_parts = vcard_utils.split_unescaped(param_string, '=')
+    if len(param_parts) != 2:
+        raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_PARAM_VALUE, param_string), {})
+    param_name, values_string = param_parts
 
-    values = get_vcard_property_param_values(values_string)
+    parameter, error = _get_vcard_property_parameter(param_name, vcard_utils.split_unescaped(values_string, ','))
+    if error is not None:
+        raise error.to_error()
+    return parameter
+
+
+def _get_vcard_property_parameter(param_name, param_values):
+    values, error = _get_vcard_property_param_values(param_values)
+    if error is not None:
+        return None, error
 
     # Validate
-    if not re.match('^[{0}]+$'.format(re.escape(ID_CHARACTERS)), param_name):
-        raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, param_name), {})
+    if not VALID_ID.match(param_name):
+        return None, Diagnostic(
+            '{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, param_name), {}, error_type=VCardNameError)
 
-    return {'name': param_name, 'values': values}
+    return {'name': param_name, 'values': values}, None
 
 
 def get_vcard_property_sub_values(value_string):
@@ -326,13 +960,17 @@ def get_vcard_property_sub_values(value_string):
     @return: List of values (RFC 2426 page 9)
     """
     sub_values = vcard_utils.split_unescaped(value_string, ',')
+    error = _get_sub_values_error(sub_values)
+    if error is not None:
+        raise error.to_error()
+    return sub_values
 
-    # Validate string
-    for sub_value in sub_values:
-        if not re.match(u'^[{0}]*$'.format(re.escape(VALUE_CHARACTERS)), sub_value):
-            raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_SUB_VALUE, sub_value), {})
 
-    return sub_values
+def _get_sub_values_error(sub_values):
+    for sub_value in sub_values:
+        if not VALID_VALUE.match(sub_value):
+            return Diagnostic('{0}: {1}'.format(NOTE_INVALID_SUB_VALUE, sub_value), {}, error_type=VCardValueError)
+    return None
 
 
 def get_vcard_property_param_values(values_string):
@@ -340,16 +978,22 @@ def get_vcard_property_param_values(values_string):
     Get the parameter values. RFC 2426 page 29.
 
     @param values_string: Comma separated values
-    @return: Set of values. Assumes that sequence doesn't matter and that
+    @return: Frozenset of values. Assumes that sequence doesn't matter and that
     duplicate values can be discarded, even though RFC 2426 doesn't explicitly
     say this. I.e., assumes that TYPE=WORK,VOICE,WORK === TYPE=VOICE,WORK.
     """
-    values = set(vcard_utils.split_unescaped(values_string, ','))
+    values, error = _get_vcard_property_param_values(vcard_utils.split_unescaped(values_string, ','))
+    if error is not None:
+        raise error.to_error()
+    return values
+
+
+def _get_vcard_property_param_values(param_values):
+    values = intern_frozenset(frozenset(intern_text(value) for value in param_values))
 
     # Validate
     for value in values:
-        if not re.match(u'^[{0}]+$|^"[{1}]+"$'.format(
-                re.escape(SAFE_CHARACTERS), re.escape(QUOTE_SAFE_CHARACTERS)), value):
-            raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_VALUE, value), {})
+        if not VALID_PARAM_VALUE.match(value):
+            return None, Diagnostic('{0}: {1}'.format(NOTE_INVALID_VALUE, value), {}, error_type=VCardValueError)
 
-    return values
+    return values, None
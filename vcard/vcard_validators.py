@@ -11,9 +11,6 @@ import re
 import six
 import warnings
 
-# Third party modules
-import isodate
-
 # Local modules
 from .vcard_definitions import (
     DOUBLE_QUOTE_CHARACTER, ID_CHARACTERS, ESCAPED_CHARACTERS, QUOTE_SAFE_CHARACTERS, SAFE_CHARACTERS, SPACE_CHARACTER)
@@ -39,25 +36,39 @@ from .vcard_errors import (
     WARN_DEFAULT_TYPE_VALUE,
     WARN_INVALID_EMAIL_TYPE,
     WARN_MULTIPLE_NAMES,
-    # Functions
-    show_warning,
+    # Severities
+    WARNING,
     # Classes
+    Diagnostic,
     VCardError,
     VCardItemCountError,
     VCardNameError,
     VCardValueError
 )
-
-VALID_DATE = re.compile(r'^\d{4}-?\d{2}-?\d{2}$')
-VALID_TIMEZONE = re.compile(r'^(Z|[+-]\d{2}:?\d{2})$')
-VALID_TIME_WITH_TIMEZONE = re.compile(r'^(\d{2}:?\d{2}:?\d{2}(?:,\d+)?)(.*)$')
-VALID_LANGUAGE_TAG = re.compile(r'^([a-z]{1,8})(-[a-z]{1,8})*$')
-VALID_X_NAME = re.compile(r'^X-[{0}]+$'.format(re.escape(ID_CHARACTERS)))
-VALID_PRESENTATION_TEXT = re.compile(u'^[{0}]*$'.format(re.escape(SAFE_CHARACTERS)))
-VALID_TEXT = re.compile(u'^([{0}:{1}]|(\\\\[{2}]))*$'.format(
+from .vcard_utils import LazyRegex
+
+VALID_DATE = LazyRegex(r'^\d{4}-?\d{2}-?\d{2}$')
+VALID_TIMEZONE = LazyRegex(r'^(Z|[+-]\d{2}:?\d{2})$')
+VALID_TIME_WITH_TIMEZONE = LazyRegex(r'^(\d{2}:?\d{2}:?\d{2}(?:,\d+)?)(.*)$')
+VALID_LANGUAGE_TAG = LazyRegex(r'^([a-z]{1,8})(-[a-z]{1,8})*$')
+VALID_X_NAME = LazyRegex(r'^X-[{0}]+$'.format(re.escape(ID_CHARACTERS)))
+VALID_PRESENTATION_TEXT = LazyRegex(u'^[{0}]*$'.format(re.escape(SAFE_CHARACTERS)))
+VALID_TEXT = LazyRegex(u'^([{0}:{1}]|(\\\\[{2}]))*$'.format(
     re.escape(SAFE_CHARACTERS), DOUBLE_QUOTE_CHARACTER, re.escape(ESCAPED_CHARACTERS)))
-VALID_QUOTED_STRING = re.compile(u'^{0}[{1}]{0}$'.format(DOUBLE_QUOTE_CHARACTER, re.escape(QUOTE_SAFE_CHARACTERS)))
-VALID_FLOAT = re.compile(r'^[+-]?\d+(\.\d+)?$')
+VALID_QUOTED_STRING = LazyRegex(
+    u'^{0}[{1}]{0}$'.format(DOUBLE_QUOTE_CHARACTER, re.escape(QUOTE_SAFE_CHARACTERS)))
+VALID_FLOAT = LazyRegex(r'^[+-]?\d+(\.\d+)?$')
+
+# Common forms which are range checked without isodate
+_DATE_FIELDS = LazyRegex(r'^([0-9]{4})(-?)([0-9]{2})\2([0-9]{2})$')
+_TIME_FIELDS = LazyRegex(r'^([0-9]{2})(:?)([0-9]{2})\2([0-9]{2})(?:,[0-9]+)?$')
+_TIME_ZONE_FIELDS = LazyRegex(r'^(?:Z|[+-]([0-9]{2}):?([0-9]{2}))$')
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Prefix of URIs which urlparse splits into a scheme and a non-empty ASCII authority without brackets, or a non-empty
+# path, as long as the rest has no characters it strips
+_VALID_URI_PREFIX = LazyRegex(
+    u'^[A-Za-z][A-Za-z0-9+.-]*:(?://(?:(?![/?#\\[\\]\t\r\n])[\x00-\x7f])+(?:[/?#]|$)|/(?!/)|[^/?#;\t\r\n])')
 
 LABEL_TYPE_VALUES = ('dom', 'intl', 'postal', 'parcel', 'home', 'work', 'pref')
 TELEPHONE_TYPE_VALUES = (
@@ -68,7 +79,7 @@ EMAIL_TYPE_VALUES = ('internet', 'x400', 'pref', 'dom', 'intl', 'postal', 'parce
 def _expect_no_parameters(property_):
     parameters = __get_parameters(property_)
     if parameters is not None:
-        raise VCardItemCountError('{0}: {1}'.format(NOTE_NON_EMPTY_PARAMETER, parameters), {})
+        raise VCardItemCountError('{0}: {1}'.format(NOTE_NON_EMPTY_PARAMETER, _format_parameters(parameters)), {})
 
 
 def _expect_parameters(property_):
@@ -77,14 +88,29 @@ def _expect_parameters(property_):
 
 
 def _expect_value_count(values, count):
-    if len(values) != count:
-        raise VCardItemCountError('{0}: {1:d} (expected {2})'.format(NOTE_INVALID_VALUE_COUNT, len(values), count), {})
+    error = _get_value_count_error(values, count)
+    if error is not None:
+        raise error.to_error()
 
 
 def _expect_sub_value_count(sub_values, count):
+    error = _get_sub_value_count_error(sub_values, count)
+    if error is not None:
+        raise error.to_error()
+
+
+def _get_value_count_error(values, count):
+    if len(values) != count:
+        return Diagnostic(
+            '{0}: {1:d} (expected {2})'.format(NOTE_INVALID_VALUE_COUNT, len(values), count), {},
+            error_type=VCardItemCountError)
+
+
+def _get_sub_value_count_error(sub_values, count):
     if len(sub_values) != count:
-        raise VCardItemCountError(
-            '{0}: {1:d} (expected {2})'.format(NOTE_INVALID_SUB_VALUE_COUNT, len(sub_values), count), {})
+        return Diagnostic(
+            '{0}: {1:d} (expected {2})'.format(NOTE_INVALID_SUB_VALUE_COUNT, len(sub_values), count), {},
+            error_type=VCardItemCountError)
 
 
 def validate_date(text):
@@ -93,16 +119,52 @@ def validate_date(text):
     that it specifies a subset of ISO 8601.
 
     @param text: String
+
+    Examples:
+    >>> validate_date('2000-02-29')
+    >>> validate_date('20000229')
+    >>> validate_date('1900-02-29') # Not a leap year # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardValueError: Invalid date (See RFC 2425 section 5.8.4 for date syntax)
+    String: 1900-02-29
+    >>> validate_date('2000-00-10') # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardValueError: Invalid date (See RFC 2425 section 5.8.4 for date syntax)
+    String: 2000-00-10
+    >>> validate_date('2000-0101') # Mixed separators # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardValueError: Invalid date (See RFC 2425 section 5.8.4 for date syntax)
+    String: 2000-0101
     """
+    fields = _DATE_FIELDS.match(text)
+    if fields is not None:
+        year, _, month, day = fields.groups()
+        if not _is_valid_date(int(year), int(month), int(day)):
+            raise VCardValueError(NOTE_INVALID_DATE, {'String': text})
+        return
+
     if VALID_DATE.match(text) is None:
         raise VCardValueError(NOTE_INVALID_DATE, {'String': text})
 
+    import isodate  # Only needed for unusual dates, and slow to import
+
     try:
         isodate.parse_date(text)
     except (isodate.ISO8601Error, ValueError):
         raise VCardValueError(NOTE_INVALID_DATE, {'String': text})
 
 
+def _is_valid_date(year, month, day):
+    """
+    @return: True if the date exists in the proleptic Gregorian calendar
+    """
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    if month == 2 and day == 29:
+        return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return day <= _DAYS_IN_MONTH[month - 1]
+
+
 def validate_time_zone(text):
     """
     Based on http://tools.ietf.org/html/rfc2425#section-5.8.4 and the fact
@@ -147,10 +209,23 @@ def validate_time_zone(text):
     ... # doctest: +ELLIPSIS +IGNORE_EXCEPTION_DETAIL
     Traceback (most recent call last):
     VCardValueError: Invalid time zone ...
+    >>> validate_time_zone('+24:00') # doctest: +ELLIPSIS +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardValueError: Invalid time zone ...
+    String: +24:00
     """
+    fields = _TIME_ZONE_FIELDS.match(text)
+    if fields is not None:
+        hour, minute = fields.groups()
+        if hour is not None and (int(hour) > 23 or int(minute) > 59):
+            raise VCardValueError(NOTE_INVALID_TIME_ZONE, {'String': text})
+        return
+
     if not VALID_TIMEZONE.match(text):
         raise VCardValueError(NOTE_INVALID_TIME_ZONE, {'String': text})
 
+    import isodate
+
     try:
         isodate.parse_tzinfo(text.replace('+', 'Z+').replace('-', 'Z-'))
     except (isodate.ISO8601Error, ValueError):
@@ -191,10 +266,18 @@ def validate_time(text):
         raise VCardValueError(NOTE_INVALID_TIME, {'String': text})
 
     time_str, timezone_str = time_timezone.groups()
-    try:
-        isodate.parse_time(time_str)
-    except (isodate.ISO8601Error, ValueError):
-        raise VCardValueError(NOTE_INVALID_TIME, {'String': text})
+    fields = _TIME_FIELDS.match(time_str)
+    if fields is not None:
+        hour, _, minute, second = fields.groups()
+        if int(hour) > 23 or int(minute) > 59 or int(second) > 59:
+            raise VCardValueError(NOTE_INVALID_TIME, {'String': text})
+    else:
+        import isodate
+
+        try:
+            isodate.parse_time(time_str)
+        except (isodate.ISO8601Error, ValueError):
+            raise VCardValueError(NOTE_INVALID_TIME, {'String': text})
 
     if timezone_str == '':
         return
@@ -367,17 +450,20 @@ def validate_text_parameter(parameter):
 
     if param_name == 'VALUE':
         if param_values != {'ptext'}:
-            raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
+            raise VCardValueError(
+                '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
         return
     elif param_name == 'LANGUAGE':
         if len(param_values) != 1:
-            raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
+            raise VCardValueError(
+                '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
         for param_value in param_values:
             validate_language_tag(param_value)
     else:
         validate_x_name(param_name)
         if len(param_values) != 1:
-            raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
+            raise VCardValueError(
+                '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
         validate_param_value(param_values[0])
 
 
@@ -417,7 +503,7 @@ def validate_float(text):
     VCardValueError: Invalid sub-value ...
     """
     if VALID_FLOAT.match(text) is None:
-        raise VCardValueError('{0}, expected float value: {1}'.format(NOTE_INVALID_SUB_VALUE, text), {})
+        raise VCardValueError('{0}: {1} (expected float value)'.format(NOTE_INVALID_SUB_VALUE, text), {})
 
 
 def validate_uri(text):
@@ -436,281 +522,431 @@ def validate_uri(text):
     Traceback (most recent call last):
     VCardValueError: Invalid URI ...
     String: http:
+    >>> validate_uri('mailto:john@example.org')
+    >>> validate_uri('http:?query') # doctest: +ELLIPSIS +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    VCardValueError: Invalid URI ...
+    String: http:?query
     """
+    # Python 2 urlparse treats some of these differently, for example "name:80"
+    if six.PY3 and _VALID_URI_PREFIX.match(text) is not None and not _has_unsafe_uri_characters(text):
+        return
+
     parts = six.Module_six_moves_urllib.parse.urlparse(text)
     if parts[0] == '' or (parts[1] == '' and parts[2] == ''):
         raise VCardValueError(NOTE_INVALID_URI, {'String': text})
 
 
-def validate_vcard_property(property_):
+def _has_unsafe_uri_characters(text):
+    return '\t' in text or '\r' in text or '\n' in text
+
+
+class PropertyRule(object):
+    """
+    Validation rule for a single property name. The checks run in this order:
+    parameters, value count, sub-value count of the first value, first
+    sub-value of the first value, and finally any other checks.
+    """
+    def __init__(
+            self, parameters=None, value_count=None, sub_value_count=None, value_validator=None, validator=None,
+            get_warnings=None):
+        """
+        @param parameters: Function checking the property parameters, or None
+        @param value_count: Expected number of values, or None
+        @param sub_value_count: Expected number of sub-values in the first
+        value, or None
+        @param value_validator: Function checking the first sub-value of the
+        first value, or None
+        @param validator: Function checking anything else about the property,
+        or None
+        @param get_warnings: Function returning a list of warning messages
+        for a valid property, or None
+        """
+        self.parameters = parameters
+        self.value_count = value_count
+        self.sub_value_count = sub_value_count
+        self.value_validator = value_validator
+        self.validator = validator
+        self.get_warnings = get_warnings
+
+    def validate(self, property_):
+        """
+        @param property_: Formatted property
+        @raise VCardError: If the property is invalid
+        """
+        error = self.get_error(property_)
+        if error is not None:
+            raise error.to_error()
+
+    def get_error(self, property_):
+        """
+        Check the property. Value counts are reported without raising.
+
+        @param property_: Formatted property
+        @return: Diagnostic for the first problem, or None
+        @raise VCardError: If the parameters or values are invalid
+        """
+        if self.parameters is not None:
+            self.parameters(property_)
+        if self.value_count is not None:
+            error = _get_value_count_error(property_.values, self.value_count)
+            if error is not None:
+                return error
+        if self.sub_value_count is not None:
+            error = _get_sub_value_count_error(property_.values[0], self.sub_value_count)
+            if error is not None:
+                return error
+        if self.value_validator is not None:
+            self.value_validator(property_.values[0][0])
+        if self.validator is not None:
+            self.validator(property_)
+
+
+def register_property_rule(property_name, rule):
+    """
+    Add or replace the rule used to validate a property, for example an
+    X- property.
+
+    @param property_name: Case insensitive property name
+    @param rule: PropertyRule instance
+    """
+    from .vcard_validator import property_cache  # Imports this module
+
+    PROPERTY_RULES[property_name.upper()] = rule
+    # Lines validated with the old rule would otherwise keep their results
+    property_cache.clear()
+
+
+def validate_vcard_property(property_, diagnostics=None):
     """
     Checks any property according to
     <http://tools.ietf.org/html/rfc2426#section-3> and
     <http://tools.ietf.org/html/rfc2426#section-4>. Checks are grouped by
-    property to allow easy overview rather than a short function.
+    property in PROPERTY_RULES to allow easy overview rather than a short
+    function.
+
+    @param property_: Formatted property
+    @param diagnostics: List to append a WARNING Diagnostic to for each
+    warning, or None to emit them with warnings.warn
+    @raise VCardError: If the property is invalid
+    """
+    error = get_vcard_property_error(property_, diagnostics)
+    if error is not None:
+        raise error.to_error()
+
+
+def get_vcard_property_error(property_, diagnostics=None):
+    """
+    Like validate_vcard_property, but returns the error. Checks which are
+    common on dirty data, like value counts, don't raise an exception.
 
     @param property_: Formatted property
+    @param diagnostics: List to append a WARNING Diagnostic to for each
+    warning, or None to emit them with warnings.warn
+    @return: Diagnostic for the first problem, or None
     """
     property_name = property_.name.upper()
 
+    rule = PROPERTY_RULES.get(property_name)
+    if rule is None:
+        return None
+
     try:
-        if property_name in ('BEGIN', 'END'):
-            # <http://tools.ietf.org/html/rfc2426#section-2.1.1>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            if property_.values[0][0].lower() != 'vcard':
+        error = rule.get_error(property_)
+    except VCardError as exception:
+        error = Diagnostic.from_error(exception)
+    if error is not None:
+        error.context['Property'] = property_name
+        return error
+
+    if rule.get_warnings is not None:
+        for message in rule.get_warnings(property_):
+            if diagnostics is None:
+                warnings.warn(message)
+            else:
+                diagnostics.append(Diagnostic(message, {'Property': property_name}, WARNING))
+    return None
+
+
+def _validate_text_parameters(property_):
+    if property_.parameters is not None:
+        for parameter in property_.parameters.items():
+            validate_text_parameter(parameter)
+
+
+def _validate_vcard_value(property_):
+    if property_.values[0][0].lower() != 'vcard':
+        raise VCardValueError(
+            '{0}: {1} (expected "VCARD")'.format(NOTE_INVALID_VALUE, property_.values[0][0]), {})
+
+
+def _validate_profile_value(property_):
+    _validate_vcard_value(property_)
+    validate_text_value(property_.values[0][0])
+
+
+def _validate_source_parameters(property_):
+    _expect_parameters(property_)
+    for parameter_name, param_values in property_.parameters.items():
+        if parameter_name.upper() == 'VALUE':
+            if param_values != {'uri'}:
                 raise VCardValueError(
-                    '{0}: {1} (expected "VCARD")'.format(NOTE_INVALID_VALUE, property_.values[0][0]), {})
-
-        if property_name == 'NAME':
-            # <http://tools.ietf.org/html/rfc2426#section-2.1.2>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        if property_name == 'PROFILE':
-            # <http://tools.ietf.org/html/rfc2426#section-2.1.3>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            if property_.values[0][0].lower() != 'vcard':
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
+            if 'CONTEXT' in property_.parameters:
                 raise VCardValueError(
-                    '{0}: {1} (expected "VCARD")'.format(NOTE_INVALID_VALUE, property_.values[0][0]), {})
-            validate_text_value(property_.values[0][0])
-
-        if property_name == 'SOURCE':
-            # <http://tools.ietf.org/html/rfc2426#section-2.1.4>
-            _expect_parameters(property_)
-            for parameter_name, param_values in property_.parameters.items():
-                if parameter_name.upper() == 'VALUE':
-                    if param_values != {'uri'}:
-                        raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
-                    if 'CONTEXT' in property_.parameters:
-                        raise VCardValueError(
-                            '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('VALUE', 'CONTEXT')), {})
-                elif parameter_name.upper() == 'CONTEXT':
-                    if param_values != {'word'}:
-                        raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
-                    if 'VALUE' in property_.parameters:
-                        raise VCardValueError(
-                            '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('VALUE', 'CONTEXT')), {})
-                else:
-                    raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
-
-        if property_name == 'FN':
-            # <http://tools.ietf.org/html/rfc2426#section-3.1.1>
-            if property_.parameters is not None:
-                for parameter in property_.parameters.items():
-                    validate_text_parameter(parameter)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'VERSION':
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            if property_.values[0][0] != '3.0':
+                    '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('VALUE', 'CONTEXT')), {})
+        elif parameter_name.upper() == 'CONTEXT':
+            if param_values != {'word'}:
+                raise VCardValueError(
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
+            if 'VALUE' in property_.parameters:
+                raise VCardValueError(
+                    '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('VALUE', 'CONTEXT')), {})
+        else:
+            raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
+
+
+def _validate_version_value(property_):
+    if property_.values[0][0] != '3.0':
+        raise VCardValueError(
+            '{0}: {1} (expected "3.0")'.format(NOTE_INVALID_VALUE, property_.values[0][0]), {})
+
+
+def _validate_name_values(property_):
+    for names in property_.values:
+        for name in names:
+            validate_text_value(name)
+
+
+def _get_name_warnings(property_):
+    # Should names be split?
+    messages = []
+    for names in property_.values:
+        for name in names:
+            if name.find(SPACE_CHARACTER) != -1 and \
+                    ''.join([''.join(names) for names in property_.values]) != name:
+                # Space in name
+                # Not just a single name
+                messages.append('{0}: {1}'.format(WARN_MULTIPLE_NAMES, name))
+    return messages
+
+
+def _validate_image_parameters(property_):
+    for parameter_name, param_values in property_.parameters.items():
+        if parameter_name.upper() == 'ENCODING':
+            if param_values != {'b'}:
+                raise VCardValueError(
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
+            if 'VALUE' in property_.parameters:
+                raise VCardValueError(
+                    '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('ENCODING', 'VALUE')), {})
+        elif parameter_name.upper() == 'TYPE' and 'ENCODING' not in property_.parameters:
+            raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_PARAMETER, 'ENCODING'), {})
+        elif parameter_name.upper() == 'VALUE':
+            if param_values != {'uri'}:
                 raise VCardValueError(
-                    '{0}: {1} (expected "3.0")'.format(NOTE_INVALID_VALUE, property_.values[0][0]), {})
-        elif property_name == 'N':
-            # <http://tools.ietf.org/html/rfc2426#section-3.1.2>
-            if property_.parameters is not None:
-                for parameter in property_.parameters.items():
-                    validate_text_parameter(parameter)
-            _expect_value_count(property_.values, 5)
-            # Should names be split?
-            for names in property_.values:
-                warnings.showwarning = show_warning
-                for name in names:
-                    validate_text_value(name)
-                    if name.find(SPACE_CHARACTER) != -1 and \
-                            ''.join([''.join(names) for names in property_.values]) != name:
-                        # Space in name
-                        # Not just a single name
-                        warnings.warn('{0}: {1}'.format(WARN_MULTIPLE_NAMES, name.encode('utf-8')))
-
-        elif property_name == 'NICKNAME':
-            # <http://tools.ietf.org/html/rfc2426#section-3.1.3>
-            if property_.parameters is not None:
-                for parameter in property_.parameters.items():
-                    validate_text_parameter(parameter)
-            _expect_value_count(property_.values, 1)
-
-        elif property_name in ['PHOTO', 'LOGO']:
-            # <http://tools.ietf.org/html/rfc2426#section-3.1.4>
-            # <http://tools.ietf.org/html/rfc2426#section-3.5.4>
-            _expect_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            for parameter_name, param_values in property_.parameters.items():
-                if parameter_name.upper() == 'ENCODING':
-                    if param_values != {'b'}:
-                        raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
-                    if 'VALUE' in property_.parameters:
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
+            else:
+                validate_uri(property_.values[0][0])
+        elif parameter_name.upper() not in ['ENCODING', 'TYPE', 'VALUE']:
+            raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
+
+
+def _validate_label_parameters(property_):
+    if property_.parameters is not None:
+        for parameter_name, param_values in property_.parameters.items():
+            if parameter_name.upper() == 'TYPE':
+                for param_sub_value in param_values:
+                    if param_sub_value not in LABEL_TYPE_VALUES:
                         raise VCardValueError(
-                            '{0}: {1} and {2}'.format(NOTE_MISMATCH_PARAMETER, ('ENCODING', 'VALUE')), {})
-                elif parameter_name.upper() == 'TYPE' and 'ENCODING' not in property_.parameters:
-                    raise VCardItemCountError('{0}: {1}'.format(NOTE_MISSING_PARAMETER, 'ENCODING'), {})
-                elif parameter_name.upper() == 'VALUE':
-                    if param_values != {'uri'}:
-                        raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
-                    else:
-                        validate_uri(property_.values[0][0])
-                elif parameter_name.upper() not in ['ENCODING', 'TYPE', 'VALUE']:
-                    raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
-
-        elif property_name == 'BDAY':
-            # <http://tools.ietf.org/html/rfc2426#section-3.1.5>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_date(property_.values[0][0])
-
-        elif property_name == 'ADR':
-            # <http://tools.ietf.org/html/rfc2426#section-3.2.1>
-            _expect_value_count(property_.values, 7)
-            if property_.parameters is not None:
-                for parameter_name, param_values in property_.parameters.items():
-                    if parameter_name.upper() == 'TYPE':
-                        for param_sub_value in param_values:
-                            if param_sub_value not in LABEL_TYPE_VALUES:
-                                raise VCardValueError(
-                                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_sub_value), {})
-                        if param_values == {'intl', 'postal', 'parcel', 'work'}:
-                            warnings.warn('{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values))
-                    else:
-                        validate_text_parameter(property_)
-
-        elif property_name == 'LABEL':
-            # <http://tools.ietf.org/html/rfc2426#section-3.2.2>
-            if property_.parameters is not None:
-                for parameter_name, param_values in property_.parameters.items():
-                    if parameter_name.upper() == 'TYPE':
-                        for param_sub_value in param_values:
-                            if param_sub_value not in LABEL_TYPE_VALUES:
-                                raise VCardValueError(
-                                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_sub_value), {})
-                        if param_values == {'intl', 'postal', 'parcel', 'work'}:
-                            warnings.warn('{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values))
-                    else:
-                        validate_text_parameter(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'TEL':
-            # <http://tools.ietf.org/html/rfc2426#section-3.3.1>
-            if property_.parameters is not None:
-                for parameter_name, param_values in property_.parameters.items():
-                    if parameter_name.upper() == 'TYPE':
-                        for param_sub_value in param_values:
-                            if param_sub_value.lower() not in TELEPHONE_TYPE_VALUES:
-                                raise VCardValueError(
-                                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_sub_value), {})
-                        if set([value.lower() for value in param_values]) == {'voice'}:
-                            warnings.warn('{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values))
-                    else:
-                        raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-
-        elif property_name == 'EMAIL':
-            # <http://tools.ietf.org/html/rfc2426#section-3.3.2>
-            if property_.parameters is not None:
-                for parameter_name, param_values in property_.parameters.items():
-                    if parameter_name.upper() == 'TYPE':
-                        for param_sub_value in param_values:
-                            if param_sub_value.lower() not in EMAIL_TYPE_VALUES:
-                                warnings.warn('{0}: {1}'.format(WARN_INVALID_EMAIL_TYPE, param_sub_value))
-                        if set([value.lower() for value in param_values]) == {'internet'}:
-                            warnings.warn('{0}: {1[values]}'.format(WARN_DEFAULT_TYPE_VALUE, property_))
-                    else:
-                        raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'MAILER':
-            # <http://tools.ietf.org/html/rfc2426#section-3.3.3>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'TZ':
-            # <http://tools.ietf.org/html/rfc2426#section-3.4.1>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            value = property_.values[0][0]
-            validate_time_zone(value)
-
-        elif property_name == 'GEO':
-            # <http://tools.ietf.org/html/rfc2426#section-3.4.2>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 2)
-            # can the following be...
-            #   _expect_sub_value_count(property_.values[0], 2)
-            # ...?
-            for value in property_.values:
-                if len(value) != 1:
-                    raise VCardItemCountError(
-                        '{0}: {1:d} (expected 1)'.format(NOTE_INVALID_SUB_VALUE_COUNT, len(property_.values[0])), {})
-                validate_float(value[0])
-
-        elif property_name == 'TITLE':
-            # <http://tools.ietf.org/html/rfc2426#section-3.5.1>
-            if property_.parameters is not None:
-                for parameter in property_.parameters.items():
-                    validate_text_parameter(parameter)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'ROLE':
-            # <http://tools.ietf.org/html/rfc2426#section-3.5.2>
-            if property_.parameters is not None:
-                for parameter in property_.parameters.items():
-                    validate_text_parameter(parameter)
-            _expect_value_count(property_.values, 1)
-            _expect_sub_value_count(property_.values[0], 1)
-            validate_text_value(property_.values[0][0])
-
-        elif property_name == 'AGENT':
-            # <http://tools.ietf.org/html/rfc2426#section-3.5.4>
-            if property_.parameters is not None:
-                for parameter_name, param_values in property_.parameters.items():
-                    if parameter_name.upper() != 'VALUE':
-                        raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, param_values), {})
-                    if param_values != {'uri'}:
-                        raise VCardValueError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_values), {})
-                _expect_value_count(property_.values, 1)
-                # can this be...
-                #   _expect_sub_value_count(property_.values[0], 1)
-                # ...?
-                for value in property_.values:
-                    if len(value) != 1:
-                        raise VCardItemCountError(
-                            '{0}: {1:d} (expected 1)'.format(
-                                NOTE_INVALID_SUB_VALUE_COUNT, len(property_.values[0])), {})
-                    validate_uri(value[0])
+                            '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_sub_value), {})
             else:
-                # Inline vCard object
-                pass  # TODO: Un-escape and validate value
+                validate_text_parameter(property_)
 
-        elif property_name == 'URL':
-            # <http://tools.ietf.org/html/rfc2426#section-3.6.8>
-            _expect_no_parameters(property_)
-            _expect_value_count(property_.values, 1)
-            validate_uri(property_.values[0][0])
 
-    except VCardError as error:
-        error.context['Property'] = property_name
-        err_type = type(error)
-        raise err_type(error.message, error.context)
+def _get_label_warnings(property_):
+    if property_.parameters is not None and property_.parameters.get('TYPE') == {'intl', 'postal', 'parcel', 'work'}:
+        return ['{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values)]
+    return []
+
+
+def _validate_telephone_parameters(property_):
+    if property_.parameters is not None:
+        for parameter_name, param_values in property_.parameters.items():
+            if parameter_name.upper() == 'TYPE':
+                for param_sub_value in param_values:
+                    if param_sub_value.lower() not in TELEPHONE_TYPE_VALUES:
+                        raise VCardValueError(
+                            '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, param_sub_value), {})
+            else:
+                raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
+
+
+def _get_telephone_warnings(property_):
+    if property_.parameters is not None and _lower(property_.parameters.get('TYPE')) == {'voice'}:
+        return ['{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values)]
+    return []
+
+
+def _validate_email_parameters(property_):
+    if property_.parameters is not None:
+        for parameter_name, param_values in property_.parameters.items():
+            if parameter_name.upper() != 'TYPE':
+                raise VCardNameError('{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, parameter_name), {})
+
+
+def _get_email_warnings(property_):
+    messages = []
+    if property_.parameters is not None and 'TYPE' in property_.parameters:
+        param_values = property_.parameters['TYPE']
+        for param_sub_value in param_values:
+            if param_sub_value.lower() not in EMAIL_TYPE_VALUES:
+                messages.append('{0}: {1}'.format(WARN_INVALID_EMAIL_TYPE, param_sub_value))
+        if _lower(param_values) == {'internet'}:
+            messages.append('{0}: {1}'.format(WARN_DEFAULT_TYPE_VALUE, property_.values))
+    return messages
+
+
+def _format_param_values(values):
+    """
+    @param values: Parameter values
+    @return: Sorted, comma separated values for messages
+
+    Examples:
+    >>> print(_format_param_values(frozenset(['work', 'home'])))
+    home,work
+    """
+    return ','.join(sorted(values))
+
+
+def _format_parameters(parameters):
+    """
+    @param parameters: Dictionary of parameter names to values
+    @return: Sorted, semicolon separated parameters for messages
+
+    Examples:
+    >>> print(_format_parameters({'TYPE': frozenset(['work', 'home']), 'CHARSET': frozenset(['utf-8'])}))
+    CHARSET=utf-8;TYPE=home,work
+    """
+    return ';'.join(
+        '{0}={1}'.format(name, _format_param_values(values)) for name, values in sorted(parameters.items()))
+
+
+def _lower(values):
+    """
+    @return: Set of lower case values, or None
+    """
+    if values is not None:
+        return set(value.lower() for value in values)
+
+
+def _validate_mailer_value(property_):
+    _expect_value_count(property_.values[0], 1)
+    validate_text_value(property_.values[0][0])
+
+
+def _validate_geo_values(property_):
+    # can the following be...
+    #   _expect_sub_value_count(property_.values[0], 2)
+    # ...?
+    for value in property_.values:
+        if len(value) != 1:
+            raise VCardItemCountError(
+                '{0}: {1:d} (expected 1)'.format(NOTE_INVALID_SUB_VALUE_COUNT, len(property_.values[0])), {})
+        validate_float(value[0])
+
+
+def _validate_agent(property_):
+    if property_.parameters is not None:
+        for parameter_name, param_values in property_.parameters.items():
+            if parameter_name.upper() != 'VALUE':
+                raise VCardNameError(
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_NAME, _format_param_values(param_values)), {})
+            if param_values != {'uri'}:
+                raise VCardValueError(
+                    '{0}: {1}'.format(NOTE_INVALID_PARAMETER_VALUE, _format_param_values(param_values)), {})
+        _expect_value_count(property_.values, 1)
+        # can this be...
+        #   _expect_sub_value_count(property_.values[0], 1)
+        # ...?
+        for value in property_.values:
+            if len(value) != 1:
+                raise VCardItemCountError(
+                    '{0}: {1:d} (expected 1)'.format(
+                        NOTE_INVALID_SUB_VALUE_COUNT, len(property_.values[0])), {})
+            validate_uri(value[0])
+    else:
+        # Inline vCard object
+        pass  # TODO: Un-escape and validate value
 
 
 def __get_parameters(property_):
     return property_.parameters
+
+
+PROPERTY_RULES = {
+    # <http://tools.ietf.org/html/rfc2426#section-2.1.1>
+    'BEGIN': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, validator=_validate_vcard_value),
+    'END': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, validator=_validate_vcard_value),
+    # <http://tools.ietf.org/html/rfc2426#section-2.1.2>
+    'NAME': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value),
+    # <http://tools.ietf.org/html/rfc2426#section-2.1.3>
+    'PROFILE': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, validator=_validate_profile_value),
+    # <http://tools.ietf.org/html/rfc2426#section-2.1.4>
+    'SOURCE': PropertyRule(parameters=_validate_source_parameters),
+    # <http://tools.ietf.org/html/rfc2426#section-3.1.1>
+    'FN': PropertyRule(
+        parameters=_validate_text_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value),
+    'VERSION': PropertyRule(parameters=_expect_no_parameters, value_count=1, validator=_validate_version_value),
+    # <http://tools.ietf.org/html/rfc2426#section-3.1.2>
+    'N': PropertyRule(
+        parameters=_validate_text_parameters, value_count=5, validator=_validate_name_values,
+        get_warnings=_get_name_warnings),
+    # <http://tools.ietf.org/html/rfc2426#section-3.1.3>
+    'NICKNAME': PropertyRule(parameters=_validate_text_parameters, value_count=1),
+    # <http://tools.ietf.org/html/rfc2426#section-3.1.4>
+    'PHOTO': PropertyRule(
+        parameters=_expect_parameters, value_count=1, sub_value_count=1, validator=_validate_image_parameters),
+    # <http://tools.ietf.org/html/rfc2426#section-3.1.5>
+    'BDAY': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, value_validator=validate_date),
+    # <http://tools.ietf.org/html/rfc2426#section-3.2.1>
+    'ADR': PropertyRule(value_count=7, validator=_validate_label_parameters, get_warnings=_get_label_warnings),
+    # <http://tools.ietf.org/html/rfc2426#section-3.2.2>
+    'LABEL': PropertyRule(
+        parameters=_validate_label_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value,
+        get_warnings=_get_label_warnings),
+    # <http://tools.ietf.org/html/rfc2426#section-3.3.1>
+    'TEL': PropertyRule(
+        parameters=_validate_telephone_parameters, value_count=1, sub_value_count=1,
+        get_warnings=_get_telephone_warnings),
+    # <http://tools.ietf.org/html/rfc2426#section-3.3.2>
+    'EMAIL': PropertyRule(
+        parameters=_validate_email_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value,
+        get_warnings=_get_email_warnings),
+    # <http://tools.ietf.org/html/rfc2426#section-3.3.3>
+    'MAILER': PropertyRule(parameters=_expect_no_parameters, value_count=1, validator=_validate_mailer_value),
+    # <http://tools.ietf.org/html/rfc2426#section-3.4.1>
+    'TZ': PropertyRule(
+        parameters=_expect_no_parameters, value_count=1, sub_value_count=1, value_validator=validate_time_zone),
+    # <http://tools.ietf.org/html/rfc2426#section-3.4.2>
+    'GEO': PropertyRule(parameters=_expect_no_parameters, value_count=2, validator=_validate_geo_values),
+    # <http://tools.ietf.org/html/rfc2426#section-3.5.1>
+    'TITLE': PropertyRule(
+        parameters=_validate_text_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value),
+    # <http://tools.ietf.org/html/rfc2426#section-3.5.2>
+    'ROLE': PropertyRule(
+        parameters=_validate_text_parameters, value_count=1, sub_value_count=1, value_validator=validate_text_value),
+    # <http://tools.ietf.org/html/rfc2426#section-3.5.3>
+    'LOGO': PropertyRule(
+        parameters=_expect_parameters, value_count=1, sub_value_count=1, validator=_validate_image_parameters),
+    # <http://tools.ietf.org/html/rfc2426#section-3.5.4>
+    'AGENT': PropertyRule(validator=_validate_agent),
+    # <http://tools.ietf.org/html/rfc2426#section-3.6.8>
+    'URL': PropertyRule(parameters=_expect_no_parameters, value_count=1, value_validator=validate_uri),
+}
+"""Validation rule per upper case property name"""